@@ -0,0 +1,174 @@
+"""asyncio facade over WeatherPredictor for high-concurrency callers.
+
+Requests that arrive within `window` seconds of each other are micro-batched:
+their elevations are resolved in one bulk lookup and their dates go through the
+models in one predict_batch call on a bounded executor, so the event loop never
+runs model code. Reads and writes of the shared SQLite result cache, which can
+wait on other processes for its lock, run on a separate cache thread; a batch's
+forecasts are written there in one transaction. Elevation lookups go through the same shared cache as
+WeatherPredictor.get_elevations; misses are awaited natively with aiohttp when
+it is installed and the provider supports it, and fall back to the executor
+otherwise.
+"""
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from backend import WeatherPredictor, ELEVATION_FALLBACKS
+
+
+class AsyncWeatherPredictor:
+    """Awaitable predict_single_day with micro-batching and bounded concurrency"""
+
+    def __init__(self, predictor=None, window=0.005, max_batch=512, max_pending=1024, workers=1):
+        self.predictor = predictor or WeatherPredictor()
+        self.window = window
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+
+        # Model work and blocking lookups run here, never on the event loop
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="weather-model")
+        self.cache_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="weather-cache")
+        self.slots = asyncio.Semaphore(max_pending)
+        self.in_flight = 0
+        self.pending = []
+        self.flush_handle = None
+        self.session = None
+
+        # Running batches, held so they are not garbage collected mid-flight and can be awaited on close
+        self.tasks = set()
+
+    @property
+    def saturated(self):
+        """True when every slot is taken and new requests will wait; callers can shed load on this"""
+        return self.in_flight >= self.max_pending
+
+    async def predict_single_day(self, city, state, country, target_date):
+        """Same result as WeatherPredictor.predict_single_day, batched with concurrent callers"""
+        is_valid, result = self.predictor.validate_date(target_date)
+        if not is_valid:
+            return result
+        lat, lng = self.predictor.get_coordinates(city, state, country)
+
+        # Known cities in a fresh forecast matrix, or forecasts another process made, need no model work at all
+        precomputed = self.predictor.precomputed_forecast(city, state, country, result, target_date, lat, lng)
+        if precomputed is not None:
+            return precomputed.to_dict()
+        if self.predictor.result_cache_key(lat, lng, result) is not None:
+            cached = await asyncio.get_running_loop().run_in_executor(
+                self.cache_executor, self.predictor.cached_forecast, city, state, country, result, target_date, lat, lng)
+            if cached is not None:
+                return cached.to_dict()
+
+        # Backpressure: at most max_pending requests are queued or being predicted
+        async with self.slots:
+            self.in_flight += 1
+            try:
+                forecast, i, elevation = await self.submit(result, lat, lng)
+            finally:
+                self.in_flight -= 1
+        return self.predictor.forecast_result(forecast, i, city, state, country, target_date, lat, lng, elevation).to_dict()
+
+    def submit(self, date, lat, lng):
+        """Queue one request for the next batch, returning a future of (forecast, row, elevation)"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((date, lat, lng, future))
+
+        if len(self.pending) >= self.max_batch:
+            self.flush()
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(self.window, self.flush)
+        return future
+
+    def flush(self):
+        """Start predicting everything queued so far as one batch"""
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        batch, self.pending = self.pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self.run_batch(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def run_batch(self, batch):
+        dates, lats, lngs, futures = zip(*batch)
+        try:
+            elevations, resolved = await self.elevations(lats, lngs)
+            loop = asyncio.get_running_loop()
+            forecast = await loop.run_in_executor(self.executor, self.predictor.predict_batch, list(dates), elevations)
+        except Exception as error:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for i, future in enumerate(futures):
+            if not future.done():
+                future.set_result((forecast, i, float(elevations[i])))
+
+        # Share the batch with other processes once its callers have their results, except rows whose
+        # elevation fell back to 0, which would outlive the outage in every other process
+        rows = np.flatnonzero(resolved)
+        results = [self.predictor.forecast_result(forecast, i, None, None, None, None, lats[i], lngs[i], float(elevations[i]))
+                   for i in rows]
+        if not results:
+            return
+        try:
+            await loop.run_in_executor(self.cache_executor, self.predictor.cache_forecasts, results,
+                                       [dates[i] for i in rows])
+        except sqlite3.Error as error:
+            print(f"⚠️ Could not share {len(results)} forecasts: {error}")
+
+    async def elevations(self, lats, lngs):
+        """Bulk elevations for a batch and which of them were resolved, as get_elevations(return_resolved=True)"""
+        predictor = self.predictor
+        loop = asyncio.get_running_loop()
+        if aiohttp is None or not hasattr(predictor.elevation_provider, 'lookup_async'):
+            return await loop.run_in_executor(self.executor, predictor.get_elevations, list(zip(lats, lngs)), True)
+        if not predictor.shares_elevations():
+            values = await self.lookup_async(lats, lngs)
+            resolved = ~np.isnan(values)
+            ELEVATION_FALLBACKS.inc(amount=int((~resolved).sum()))
+            return np.nan_to_num(values, nan=0.0), resolved
+
+        # Only locations no process on this host has resolved yet go to the provider
+        coordinates, known, missing = await loop.run_in_executor(
+            self.cache_executor, predictor.cached_elevations, list(zip(lats, lngs)))
+        if missing:
+            values = await self.lookup_async(*zip(*missing))
+            known.update(await loop.run_in_executor(self.cache_executor, predictor.cache_elevations, missing, values))
+        return (np.array([known.get(point, 0.0) for point in coordinates]),
+                np.array([point in known for point in coordinates]))
+
+    async def lookup_async(self, lats, lngs):
+        """The provider's elevations over this facade's aiohttp session, NaN where unresolved"""
+        provider = self.predictor.elevation_provider
+        if self.session is None:
+            self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=provider.max_workers))
+        return await provider.lookup_async(lats, lngs, self.session)
+
+    async def close(self):
+        """Finish every queued and running batch, then release the session and executors"""
+        self.flush()
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        self.executor.shutdown(wait=False)
+        self.cache_executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
@@ -1,80 +1,375 @@
-import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_absolute_error, accuracy_score
-import requests
 from datetime import datetime, timedelta
-import warnings
 import os
-from dotenv import load_dotenv
+import json
+import pickle
+import hashlib
+import itertools
+from dataclasses import dataclass
 
-# Load environment variables
-load_dotenv()
+import profiling
+import metrics
 
-warnings.filterwarnings('ignore')
+# pandas, scikit-learn, requests and dotenv are imported by the stage that first needs
+# them, so importing this module for date validation or the rule tables stays cheap.
 raindata="weather_prediction/test/RF_NE_1901-2021.csv"
 tempdata="weather_prediction/test/TEMP_ANNUAL_SEASONAL_MEAN.csv"
+historydir="weather_prediction/cache/daily_history"
+modeldir="weather_prediction/cache/models"
+matrixdir="weather_prediction/cache/forecast_matrix"
+resultcache="weather_prediction/cache/shared/results.sqlite"
+
+# Label table shared by every DAY_TYPE column and the day type model.
+# Kept in sorted order so integer codes rank exactly like the string labels did.
+DAY_TYPES = ['cloudy', 'cloudy_rainy', 'rainy', 'sunny_cool',
+             'sunny_hot', 'sunny_warm', 'thunderstorm']
+
+# Declarative threshold rules, checked top to bottom with the first match winning.
+# A rule matches when every listed input is strictly greater than its threshold.
+TRAINING_DAY_TYPE_RULES = [
+    ({'rainfall': 20, 'wind_speed': 25}, 'thunderstorm'),
+    ({'rainfall': 10}, 'rainy'),
+    ({'rainfall': 2}, 'cloudy_rainy'),
+    ({'rainfall': 0.1}, 'cloudy'),
+    ({'temperature': 35}, 'sunny_hot'),
+    ({'temperature': 25}, 'sunny_warm'),
+]
+TRAINING_DAY_TYPE_DEFAULT = ('sunny_cool',)
+
+DAY_TYPE_RULES = [
+    ({'rainfall': 25, 'wind_speed': 30, 'rain_probability': 80}, 'thunderstorm', '⛈️ Thunderstorm Day'),
+    ({'rainfall': 15, 'wind_speed': 25}, 'thunderstorm', '⛈️ Thunderstorm Day'),
+    ({'rainfall': 20}, 'heavy_rain', '🌧️ Heavy Rain Day'),
+    ({'rainfall': 10}, 'rainy', '🌧️ Rainy Day'),
+    ({'rainfall': 5}, 'moderate_rain', '🌦️ Moderate Rain Day'),
+    ({'rainfall': 2}, 'light_rain', '🌦️ Light Rain Day'),
+    ({'rainfall': 0.1}, 'cloudy_rainy', '🌧️☁️ Cloudy with Rain'),
+    ({'rain_probability': 60}, 'cloudy_rainy', '🌧️☁️ Cloudy with Rain'),
+    ({'rain_probability': 40}, 'cloudy', '☁️ Cloudy Day'),
+    ({'temperature': 35}, 'sunny_hot', '☀️🔥 Sunny Hot Day'),
+    ({'temperature': 30}, 'sunny_warm', '☀️🌡️ Sunny Warm Day'),
+    ({'temperature': 25}, 'sunny_pleasant', '☀️😊 Sunny Pleasant Day'),
+    ({'temperature': 20}, 'sunny_cool', '☀️❄️ Sunny Cool Day'),
+]
+DAY_TYPE_DEFAULT = ('sunny_cold', '☀️🧊 Sunny Cold Day')
+
+WEATHER_CONDITION_RULES = [
+    ({'rain_prob': 70, 'wind_speed': 25}, 'Stormy'),
+    ({'rain_prob': 70, 'wind_speed': 15}, 'Rainy with strong winds'),
+    ({'rain_prob': 70}, 'Rainy'),
+    ({'rain_prob': 40, 'wind_speed': 20}, 'Cloudy with strong winds'),
+    ({'rain_prob': 40}, 'Cloudy with chance of rain'),
+    ({'temp': 35, 'wind_speed': 20}, 'Hot and windy'),
+    ({'temp': 35}, 'Hot and sunny'),
+    ({'temp': 25, 'wind_speed': 15}, 'Warm and breezy'),
+    ({'temp': 25}, 'Warm and pleasant'),
+    ({'temp': 15, 'wind_speed': 15}, 'Cool and windy'),
+    ({'temp': 15}, 'Cool and clear'),
+]
+WEATHER_CONDITION_DEFAULT = ('Cold',)
+
+def evaluate_rules(rules, default, **inputs):
+    """Evaluate a threshold rule table over arrays, returning one output array per rule column"""
+    inputs = {name: np.asarray(values) for name, values in inputs.items()}
+    conditions = []
+    for thresholds, *_ in rules:
+        condition = True
+        for name, threshold in thresholds.items():
+            condition = condition & (inputs[name] > threshold)
+        conditions.append(condition)
+    rule_index = np.select(conditions, np.arange(len(rules)), default=len(rules))
+    
+    columns = list(zip(*[outputs for _, *outputs in rules], default))
+    return tuple(np.array(column, dtype=object)[rule_index] for column in columns)
+
+# Distribution summaries added to every forecast, from the per-tree predictions
+FORECAST_QUANTILES = [10, 50, 90]
+RAINFALL_EXCEEDANCE_MM = [10]
+
+# Known city locations; anything else falls back to the centre of India
+CITY_COORDINATES = {
+    'delhi': (28.6139, 77.2090), 'mumbai': (19.0760, 72.8777),
+    'chennai': (13.0827, 80.2707), 'bangalore': (12.9716, 77.5946),
+    'kolkata': (22.5726, 88.3639), 'hyderabad': (17.3850, 78.4867),
+    'pune': (18.5204, 73.8567), 'ahmedabad': (23.0225, 72.5714),
+    'jaipur': (26.9124, 75.7873), 'lucknow': (26.8467, 80.9462),
+    'kochi': (9.9312, 76.2673), 'goa': (15.2993, 74.1240),
+    'shimla': (31.1048, 77.1734), 'darjeeling': (27.0412, 88.2663)
+}
+DEFAULT_COORDINATES = (20.5937, 78.9629)
+
+# Model inputs, in the column order of build_features; defined for training and serving in feature_store.py
+FEATURE_COLUMNS = [
+    'YEAR', 'MONTH', 'DAY', 'DAY_OF_YEAR', 'YEAR_TREND',
+    'DAY_SIN', 'DAY_COS', 'MONTH_SIN', 'MONTH_COS',
+    'TEMP_LAG1', 'RAIN_LAG1', 'WIND_LAG1', 'TEMP_ROLL7', 'RAIN_ROLL7',
+    'ANNUAL_TEMP'
+]
+
+# Columns serving reads from daily_df for its lag features
+INFERENCE_COLUMNS = ['YEAR', 'MONTH', 'DAY', 'TEMP_LAG1', 'RAIN_LAG1', 'WIND_LAG1', 'TEMP_ROLL7', 'RAIN_ROLL7']
+
+# Bumped whenever serving features or forecast distributions change meaning, so models,
+# matrices and cached results built against the old ones are not reused
+FEATURE_VERSION = 3
+
+# Label tables of the forecast-side rules; compact array results store indexes into them
+FORECAST_DAY_TYPES = list(dict.fromkeys([label for _, label, _ in DAY_TYPE_RULES] + [DAY_TYPE_DEFAULT[0]]))
+DAY_TYPE_DESCRIPTIONS = dict([(label, description) for _, label, description in DAY_TYPE_RULES] + [DAY_TYPE_DEFAULT])
+WEATHER_CONDITIONS = [label for _, label in WEATHER_CONDITION_RULES] + list(WEATHER_CONDITION_DEFAULT)
+
+# Distribution keys of a forecast, in the order compact results store them
+SPREAD_KEYS = ([f'{name}_p{quantile}' for name in ('temperature', 'rainfall', 'wind_speed') for quantile in FORECAST_QUANTILES]
+               + [f'chance_rain_over_{threshold}mm' for threshold in RAINFALL_EXCEEDANCE_MM])
+
+# Keys of a predict_batch result, in its order
+BATCH_KEYS = (['temperature', 'rain_probability', 'expected_rainfall', 'wind_speed'] + SPREAD_KEYS
+              + ['ml_day_type', 'ml_confidence', 'day_type', 'day_type_description', 'condition'])
+
+# One row of a bulk forecast: the site's position in the request, the date, and unformatted values
+RESULT_DTYPE = np.dtype(
+    [('site', np.int32), ('date', 'datetime64[D]'), ('elevation', np.float32),
+     ('temperature', np.float32), ('rain_probability', np.float32), ('expected_rainfall', np.float32),
+     ('wind_speed', np.float32), ('ml_confidence', np.float32),
+     ('condition', np.int8), ('day_type', np.int8), ('ml_day_type', np.int8)]
+    + [(key, np.float32) for key in SPREAD_KEYS]
+)
+# The same row at full precision, for stored forecasts that must read back exactly as computed
+MATRIX_DTYPE = np.dtype([(name, np.float64 if RESULT_DTYPE[name] == np.float32 else RESULT_DTYPE[name])
+                         for name in RESULT_DTYPE.names])
+
+@dataclass(slots=True)
+class ForecastResult:
+    """One day's forecast with raw values; display strings and rounding are produced on access"""
+    city: str
+    state: str
+    country: str
+    date: str
+    temperature: float
+    rain_probability: float
+    expected_rainfall: float
+    wind_speed: float
+    condition: str
+    day_type: str
+    ml_day_type: str
+    ml_confidence: float
+    elevation: float
+    lat: float
+    lng: float
+    spread: tuple
+    
+    @classmethod
+    def from_row(cls, row, city, state, country, date, lat, lng):
+        """Rebuild a result from one RESULT_DTYPE / MATRIX_DTYPE row"""
+        return cls(
+            city, state, country, date,
+            float(row['temperature']), float(row['rain_probability']),
+            float(row['expected_rainfall']), float(row['wind_speed']),
+            WEATHER_CONDITIONS[row['condition']], FORECAST_DAY_TYPES[row['day_type']],
+            DAY_TYPES[row['ml_day_type']], float(row['ml_confidence']),
+            float(row['elevation']), lat, lng,
+            tuple(float(row[key]) for key in SPREAD_KEYS)
+        )
+    
+    @classmethod
+    def from_cache(cls, values, city, state, country, date):
+        """Rebuild a result from cache_values() for the caller's location strings"""
+        return cls(city, state, country, date, *values[:-1], tuple(values[-1]))
+    
+    def cache_values(self):
+        """The fields after date as a JSON-friendly list, for the shared result cache"""
+        return [self.temperature, self.rain_probability, self.expected_rainfall, self.wind_speed,
+                self.condition, self.day_type, self.ml_day_type, self.ml_confidence,
+                self.elevation, self.lat, self.lng, list(self.spread)]
+    
+    @property
+    def day_name(self):
+        return datetime.strptime(self.date, "%Y-%m-%d").strftime("%A")
+    
+    @property
+    def day_type_description(self):
+        return DAY_TYPE_DESCRIPTIONS[self.day_type]
+    
+    @property
+    def coordinates(self):
+        return f"({self.lat:.4f}, {self.lng:.4f})"
+    
+    def to_dict(self):
+        """The prediction dict predict_single_day returns"""
+        record = {
+            'city': self.city,
+            'state': self.state,
+            'country': self.country,
+            'date': self.date,
+            'day_name': self.day_name,
+            'temperature': round(self.temperature, 1),
+            'rain_probability': round(self.rain_probability, 1),
+            'expected_rainfall': round(self.expected_rainfall, 1),
+            'wind_speed': round(self.wind_speed, 1),
+            'condition': self.condition,
+            'day_type': self.day_type,
+            'day_type_description': self.day_type_description,
+            'ml_day_type': self.ml_day_type,
+            'ml_confidence': round(self.ml_confidence * 100, 1),
+            'elevation': round(self.elevation, 1),
+            'coordinates': self.coordinates
+        }
+        for key, value in zip(SPREAD_KEYS, self.spread):
+            record[key] = round(value, 1)
+        return record
+
+# Fitted models save_models / load_models persist
+MODEL_NAMES = ['temp_model', 'rain_model', 'rain_class_model', 'wind_model', 'day_type_model']
+
+# Training target of each model
+MODEL_TARGETS = {
+    'temp_model': 'TEMPERATURE',
+    'rain_model': 'RAINFALL',
+    'rain_class_model': 'HAS_RAIN',
+    'wind_model': 'WIND_SPEED',
+    'day_type_model': 'DAY_TYPE',
+}
+
+# Production metrics, exported by METRICS_PORT / METRICS_FILE; see metrics.py
+PREDICTIONS = metrics.REGISTRY.counter(
+    'weather_predictions_total', "Forecasts served, by where they came from.", ['source'])
+PREDICTION_ERRORS = metrics.REGISTRY.counter(
+    'weather_prediction_errors_total', "Forecast requests refused.", ['reason'])
+CACHE_LOOKUPS = metrics.REGISTRY.counter(
+    'weather_cache_lookups_total', "Forecast matrix and shared cache lookups.", ['cache', 'result'])
+ELEVATION_FALLBACKS = metrics.REGISTRY.counter(
+    'weather_elevation_fallbacks_total', "Locations whose elevation could not be resolved and fell back to 0.")
+STAGE_SECONDS = metrics.REGISTRY.histogram(
+    'weather_stage_seconds', "Wall time of the prediction stages.", ['stage'])
+MODEL_SECONDS = metrics.REGISTRY.histogram(
+    'weather_model_seconds', "Model training and loading time.", ['operation'],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600))
+
+def save_history(df, path, fingerprint=None):
+    """Persist a daily history frame as one .npy file per column"""
+    import pandas as pd
+    os.makedirs(path, exist_ok=True)
+    meta = {'rows': len(df), 'columns': {}, 'categories': {}, 'fingerprint': fingerprint}
+    
+    for column in df.columns:
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Categorical columns are stored as int8 codes plus their label table
+            meta['categories'][column] = [str(c) for c in values.cat.categories]
+            values = values.cat.codes.astype(np.int8)
+        array = np.ascontiguousarray(values.to_numpy())
+        np.save(os.path.join(path, f"{column}.npy"), array)
+        meta['columns'][column] = str(array.dtype)
+    
+    # Write metadata last so a partially written store is never picked up
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+def load_history(path, columns=None, fingerprint=None):
+    """Load a persisted daily history, optionally projecting to a subset of columns"""
+    import pandas as pd
+    meta_path = os.path.join(path, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if fingerprint is not None and meta.get('fingerprint') != fingerprint:
+        return None
+    
+    data = {}
+    for column in (columns or list(meta['columns'])):
+        # Memory-mapped reads only touch the pages of the requested columns
+        array = np.load(os.path.join(path, f"{column}.npy"), mmap_mode='r')
+        if column in meta['categories']:
+            data[column] = pd.Categorical.from_codes(array, meta['categories'][column])
+        else:
+            data[column] = np.array(array)
+    return pd.DataFrame(data)
+
 class WeatherPredictor:
-    def __init__(self):
+    def __init__(self, model_params=None, train=True, model_backend=None, seed=None):
+        import pandas as pd
+        from dotenv import load_dotenv
+        from elevation import BulkElevationResolver, DEMElevationProvider
+        
+        # Load environment variables
+        load_dotenv()
+        
         # Load historical data
         self.rainfall_df = pd.read_csv(raindata)
         self.temperature_df = pd.read_csv(tempdata)
         
         # API endpoints
         self.elevation_api = "https://api.open-elevation.com/api/v1/lookup"
+        # Local SRTM tiles, when configured, replace the elevation service entirely
+        dem_tile_dir = os.getenv('DEM_TILE_DIR')
+        if dem_tile_dir:
+            self.elevation_provider = DEMElevationProvider(dem_tile_dir)
+        else:
+            self.elevation_provider = BulkElevationResolver(self.elevation_api)
+        
+        # Precomputed forecasts for the known cities, see forecast_matrix.py
+        self.forecast_matrix = None
+        
+        # Forecasts and elevations shared with other predictor processes on this host, see result_cache.py
+        self.result_cache = self.open_result_cache()
         
         # Current year
         self.current_year = 2025
         
-        # Create and prepare data
-        self.create_daily_dataset()
-        self.prepare_features()
-        self.train_models()
+        # Seed for the synthetic daily history, so every process trains on identical data
+        self.seed = int(os.getenv('WEATHER_SEED', 42)) if seed is None else seed
+        
+        # How years missing from the CSVs are filled: 'recent_mean' or 'trend'
+        self.gap_fill = os.getenv('HISTORY_GAP_FILL', 'recent_mean')
+        
+        # Reuse the persisted history generated from the same seed and sources, otherwise rebuild it
+        self.fingerprint = self.history_fingerprint()
+        self.history_path = os.path.join(historydir, self.history_key(self.fingerprint))
+        # A predictor that will not train only reads the lag inputs; full_history() loads the rest on demand
+        self.daily_df = load_history(self.history_path, columns=None if train else INFERENCE_COLUMNS,
+                                     fingerprint=self.fingerprint)
+        if self.daily_df is None:
+            peak_rss = metrics.peak_resident_memory_bytes()
+            self.create_daily_dataset()
+            self.prepare_features()
+            self.report_peak_rss("building the history", peak_rss)
+            save_history(self.daily_df, self.history_path, fingerprint=self.fingerprint)
+        else:
+            print(f"✅ Historical data loaded from {self.history_path}: {len(self.daily_df)} daily records")
+        
+        if train:
+            self.train_models(model_params, model_backend)
         
         # Date validation limits
         self.today = datetime.now().date()
         self.max_future_date = self.today + timedelta(days=180)  # 6 months
+        
+        if train:
+            self.load_forecast_matrix()
     
-    def create_daily_dataset(self):
+    @profiling.stage
+    def create_daily_dataset(self, rng=None):
         """Create synthetic daily data from seasonal data"""
+        import pandas as pd
         print("Loading and processing historical weather data...")
         
-        daily_data = []
+        # All daily variation comes from one seeded generator
+        if rng is None:
+            rng = np.random.default_rng(self.seed)
         
-        for year in range(1901, self.current_year + 1):
-            # Get yearly data
-            temp_data = self.temperature_df[self.temperature_df['YEAR'] == year]
-            rain_data = self.rainfall_df[self.rainfall_df['YEAR'] == year]
-            
-            if temp_data.empty or rain_data.empty:
-                # Use average values if data missing
-                recent_temp = self.temperature_df.tail(5).mean()
-                recent_rain = self.rainfall_df.tail(5).mean()
-                
-                jan_feb_temp = recent_temp.get('JAN-FEB', 20)
-                mar_may_temp = recent_temp.get('MAR-MAY', 25)
-                jun_sep_temp = recent_temp.get('JUN-SEP', 28)
-                oct_dec_temp = recent_temp.get('OCT-DEC', 22)
-                annual_temp = recent_temp.get('ANNUAL', 25)
-                
-                jun_rain = recent_rain.get('JUN', 300)
-                jul_rain = recent_rain.get('JUL', 300)
-                aug_rain = recent_rain.get('AUG', 300)
-                sep_rain = recent_rain.get('SEP', 300)
-            else:
-                # Extract seasonal values from actual data
-                jan_feb_temp = temp_data['JAN-FEB'].values[0]
-                mar_may_temp = temp_data['MAR-MAY'].values[0]
-                jun_sep_temp = temp_data['JUN-SEP'].values[0]
-                oct_dec_temp = temp_data['OCT-DEC'].values[0]
-                annual_temp = temp_data['ANNUAL'].values[0]
-                
-                jun_rain = rain_data['JUN'].values[0]
-                jul_rain = rain_data['JUL'].values[0]
-                aug_rain = rain_data['AUG'].values[0]
-                sep_rain = rain_data['SEP'].values[0]
-            
+        # Seasonal inputs for every year, gaps already filled
+        seasonal = self.seasonal_table()
+        
+        # One preallocated array per column, rather than a dict per day, holds the history until the frame is built
+        rows = sum(366 if (year % 4 == 0 and year % 100 != 0) or (year % 400 == 0) else 365 for year in seasonal.index)
+        years, months, days = (np.empty(rows, dtype=np.int64) for _ in range(3))
+        temperature, rainfall, wind_speed, annual = (np.empty(rows) for _ in range(4))
+        row = 0
+        
+        for year, (jan_feb_temp, mar_may_temp, jun_sep_temp, oct_dec_temp, annual_temp,
+                   jun_rain, jul_rain, aug_rain, sep_rain) in zip(seasonal.index, seasonal.to_numpy()):
             # Create daily data for the year
             for month in range(1, 13):
                 # Calculate days in month
@@ -107,9 +402,15 @@ class WeatherPredictor:
                 else:
                     base_rain = 0
                 
+                month_rows = slice(row, row + days_in_month)
+                years[month_rows] = year
+                months[month_rows] = month
+                days[month_rows] = np.arange(1, days_in_month + 1)
+                annual[month_rows] = annual_temp
+                
                 for day in range(1, days_in_month + 1):
                     # Create daily variations
-                    daily_temp = base_temp + np.random.normal(0, 2)
+                    daily_temp = base_temp + rng.normal(0, 2)
                     
                     # Seasonal adjustment
                     if month in [12, 1, 2]:
@@ -123,54 +424,107 @@ class WeatherPredictor:
                     
                     # Rainfall with different intensities
                     if month in [6, 7, 8, 9]:
-                        rain_prob = 60 + np.random.normal(0, 15)
-                        if np.random.random() < rain_prob / 100:
+                        rain_prob = 60 + rng.normal(0, 15)
+                        if rng.random() < rain_prob / 100:
                             # Vary rainfall intensity
-                            rain_intensity = np.random.choice(['light', 'moderate', 'heavy'], 
+                            rain_intensity = rng.choice(['light', 'moderate', 'heavy'], 
                                                            p=[0.5, 0.3, 0.2])
                             if rain_intensity == 'light':
-                                daily_rain = max(0, base_rain * np.random.lognormal(-1, 0.3))
+                                daily_rain = max(0, base_rain * rng.lognormal(-1, 0.3))
                             elif rain_intensity == 'moderate':
-                                daily_rain = max(0, base_rain * np.random.lognormal(0, 0.3))
+                                daily_rain = max(0, base_rain * rng.lognormal(0, 0.3))
                             else:  # heavy
-                                daily_rain = max(0, base_rain * np.random.lognormal(1, 0.4))
+                                daily_rain = max(0, base_rain * rng.lognormal(1, 0.4))
                         else:
                             daily_rain = 0
                     else:
-                        rain_prob = 10 + np.random.normal(0, 5)
-                        daily_rain = 0 if np.random.random() > rain_prob / 100 else np.random.exponential(2)
+                        rain_prob = 10 + rng.normal(0, 5)
+                        daily_rain = 0 if rng.random() > rain_prob / 100 else rng.exponential(2)
                     
                     # Wind speed with variations for different conditions
                     if daily_rain > 0:
                         if daily_rain > 20:  # Heavy rain likely with storm
-                            base_wind = 20 + np.random.normal(0, 5)
+                            base_wind = 20 + rng.normal(0, 5)
                         else:
-                            base_wind = 12 + np.random.normal(0, 3)
+                            base_wind = 12 + rng.normal(0, 3)
                     elif month in [6, 7, 8, 9]:  # Monsoon
-                        base_wind = 10 + np.random.normal(0, 2)
+                        base_wind = 10 + rng.normal(0, 2)
                     else:
-                        base_wind = 8 + np.random.normal(0, 2)
+                        base_wind = 8 + rng.normal(0, 2)
                     
-                    daily_wind = max(0, base_wind + np.random.normal(0, 2))
+                    daily_wind = max(0, base_wind + rng.normal(0, 2))
                     
-                    # Determine day type for training
-                    day_type = self.determine_day_type(daily_rain, daily_temp, daily_wind)
-                    
-                    daily_data.append({
-                        'YEAR': int(year),
-                        'MONTH': int(month),
-                        'DAY': int(day),
-                        'TEMPERATURE': float(daily_temp),
-                        'RAINFALL': float(daily_rain),
-                        'WIND_SPEED': float(daily_wind),
-                        'HAS_RAIN': 1 if daily_rain > 0.1 else 0,
-                        'ANNUAL_TEMP': float(annual_temp),
-                        'DAY_TYPE': day_type
-                    })
-        
-        self.daily_df = pd.DataFrame(daily_data)
+                    temperature[row] = daily_temp
+                    rainfall[row] = daily_rain
+                    wind_speed[row] = daily_wind
+                    row += 1
+        
+        self.daily_df = pd.DataFrame({
+            'YEAR': years,
+            'MONTH': months,
+            'DAY': days,
+            'TEMPERATURE': temperature,
+            'RAINFALL': rainfall,
+            'WIND_SPEED': wind_speed,
+            'HAS_RAIN': (rainfall > 0.1).astype(np.int64),
+            'ANNUAL_TEMP': annual
+        })
+        # The frame holds its own copy, so release the column arrays before the day types are added
+        del years, months, days, temperature, rainfall, wind_speed, annual
+        
+        # Determine day types for training in one vectorized pass
+        self.daily_df['DAY_TYPE'] = pd.Categorical.from_codes(
+            self.determine_day_types(self.daily_df['RAINFALL'], self.daily_df['TEMPERATURE'], self.daily_df['WIND_SPEED']),
+            DAY_TYPES
+        )
         print(f"✅ Historical data loaded: {len(self.daily_df)} daily records")
     
+    def seasonal_table(self, last_year=None):
+        """Year-indexed seasonal temperatures and monsoon rainfall up to last_year (default: current_year),
+        with missing years filled in one step"""
+        import pandas as pd
+        years = pd.RangeIndex(1901, (last_year or self.current_year) + 1, name='YEAR')
+        temp_defaults = {'JAN-FEB': 20, 'MAR-MAY': 25, 'JUN-SEP': 28, 'OCT-DEC': 22, 'ANNUAL': 25}
+        rain_defaults = {'JUN': 300, 'JUL': 300, 'AUG': 300, 'SEP': 300}
+        
+        # A year counts as present only when both sources have a row for it
+        temp = self.temperature_df.drop_duplicates('YEAR').set_index('YEAR').reindex(columns=list(temp_defaults))
+        rain = self.rainfall_df.drop_duplicates('YEAR').set_index('YEAR').reindex(columns=list(rain_defaults))
+        observed = temp.join(rain, how='inner')
+        table = observed.reindex(years)
+        missing = ~table.index.isin(observed.index)
+        if not missing.any():
+            return table
+        
+        if self.gap_fill == 'trend':
+            # Extrapolate each column's linear trend over the last 30 observed years
+            recent = observed.dropna().tail(30)
+            slope, intercept = np.polyfit(recent.index.to_numpy(), recent.to_numpy(), 1)
+            fill = np.outer(table.index[missing], slope) + intercept
+        else:
+            # Use average values of the most recent rows, as the source order gives them
+            recent_temp = self.temperature_df.tail(5).mean(numeric_only=True)
+            recent_rain = self.rainfall_df.tail(5).mean(numeric_only=True)
+            recent = {**{column: recent_temp.get(column, default) for column, default in temp_defaults.items()},
+                      **{column: recent_rain.get(column, default) for column, default in rain_defaults.items()}}
+            fill = np.array([recent[column] for column in table.columns])
+        
+        table.loc[missing] = fill
+        return table
+    
+    def history_fingerprint(self):
+        """Identify the seed, sources and year range the daily history is generated from"""
+        sources = {}
+        for path in (raindata, tempdata):
+            with open(path, 'rb') as f:
+                sources[os.path.basename(path)] = hashlib.sha256(f.read()).hexdigest()
+        return {'seed': self.seed, 'sources': sources, 'years': [1901, self.current_year],
+                'gap_fill': self.gap_fill, 'day_types': DAY_TYPES}
+    
+    def history_key(self, fingerprint):
+        """Short stable key naming the cache directory of one fingerprint"""
+        return hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode()).hexdigest()[:16]
+    
     def determine_day_type(self, rainfall, temperature, wind_speed):
         """Determine the type of day based on weather parameters"""
         if rainfall > 20 and wind_speed > 25:
@@ -188,6 +542,14 @@ class WeatherPredictor:
         else:
             return 'sunny_cool'
     
+    def determine_day_types(self, rainfall, temperature, wind_speed):
+        """Vectorized determine_day_type returning int8 codes into DAY_TYPES"""
+        rules = [(thresholds, DAY_TYPES.index(label)) for thresholds, label in TRAINING_DAY_TYPE_RULES]
+        default = (DAY_TYPES.index(TRAINING_DAY_TYPE_DEFAULT[0]),)
+        codes, = evaluate_rules(rules, default, rainfall=rainfall, temperature=temperature, wind_speed=wind_speed)
+        return codes.astype(np.int8)
+    
+    @profiling.stage
     def prepare_features(self):
         """Prepare features for machine learning"""
         # Ensure correct data types
@@ -195,83 +557,227 @@ class WeatherPredictor:
         self.daily_df['MONTH'] = self.daily_df['MONTH'].astype(int)
         self.daily_df['DAY'] = self.daily_df['DAY'].astype(int)
         
-        # Date features
-        def calculate_day_of_year(row):
-            try:
-                date_obj = datetime(int(row['YEAR']), int(row['MONTH']), int(row['DAY']))
-                return date_obj.timetuple().tm_yday
-            except:
-                return (int(row['MONTH']) - 1) * 30 + int(row['DAY'])
-        
-        self.daily_df['DAY_OF_YEAR'] = self.daily_df.apply(calculate_day_of_year, axis=1)
-        
-        # Cyclical features
-        self.daily_df['DAY_SIN'] = np.sin(2 * np.pi * self.daily_df['DAY_OF_YEAR'] / 365)
-        self.daily_df['DAY_COS'] = np.cos(2 * np.pi * self.daily_df['DAY_OF_YEAR'] / 365)
-        self.daily_df['MONTH_SIN'] = np.sin(2 * np.pi * self.daily_df['MONTH'] / 12)
-        self.daily_df['MONTH_COS'] = np.cos(2 * np.pi * self.daily_df['MONTH'] / 12)
-        
-        # Lag features and rolling averages
-        self.daily_df['TEMP_LAG1'] = self.daily_df['TEMPERATURE'].shift(1)
-        self.daily_df['RAIN_LAG1'] = self.daily_df['RAINFALL'].shift(1)
-        self.daily_df['WIND_LAG1'] = self.daily_df['WIND_SPEED'].shift(1)
-        self.daily_df['TEMP_ROLL7'] = self.daily_df['TEMPERATURE'].rolling(7, min_periods=1).mean()
-        self.daily_df['RAIN_ROLL7'] = self.daily_df['RAINFALL'].rolling(7, min_periods=1).mean()
+        # Date, cyclical and climate trend features, computed as serving computes them,
+        # then lag features and rolling averages, added in one copy of the frame
+        from feature_store import to_dates, calendar_columns, lag_columns
+        dates = to_dates(self.daily_df['YEAR'], self.daily_df['MONTH'], self.daily_df['DAY'])
+        self.daily_df = self.daily_df.assign(**calendar_columns(dates), **lag_columns(self.daily_df))
         
-        # Fill NaN values
-        self.daily_df = self.daily_df.fillna(method='bfill').fillna(method='ffill')
-        
-        # Climate trend
-        self.daily_df['YEAR_TREND'] = self.daily_df['YEAR'] - 1900
+        # Fill NaN values in place, so no second and third copy of the frame is alive at once
+        self.daily_df.bfill(inplace=True)
+        self.daily_df.ffill(inplace=True)
         
         print("✅ Feature engineering completed")
     
-    def train_models(self):
+    @profiling.stage(histogram=MODEL_SECONDS, labels=('train',))
+    def train_models(self, model_params=None, model_backend=None):
         """Train machine learning models including day type classification"""
-        feature_columns = [
-            'YEAR', 'MONTH', 'DAY', 'DAY_OF_YEAR', 'YEAR_TREND',
-            'DAY_SIN', 'DAY_COS', 'MONTH_SIN', 'MONTH_COS',
-            'TEMP_LAG1', 'RAIN_LAG1', 'WIND_LAG1', 'TEMP_ROLL7', 'RAIN_ROLL7',
-            'ANNUAL_TEMP'
-        ]
+        from sklearn.metrics import accuracy_score
+        from model_backends import make_model_backend
+        peak_rss = metrics.peak_resident_memory_bytes()
         
-        X = self.daily_df[feature_columns]
-        y_temp = self.daily_df['TEMPERATURE']
-        y_rain = self.daily_df['RAINFALL']
-        y_rain_binary = self.daily_df['HAS_RAIN']
-        y_wind = self.daily_df['WIND_SPEED']
-        y_day_type = self.daily_df['DAY_TYPE']
+        # The backend decides which estimators serve the five targets
+        self.model_backend = make_model_backend(model_backend or os.getenv('MODEL_BACKEND', 'random_forest'),
+                                                model_params)
+        self.model_version = self.model_key(self.model_backend.name, model_params)
         
-        # Split data
-        X_train, X_test, y_temp_train, y_temp_test = train_test_split(X, y_temp, test_size=0.2, random_state=42)
-        _, _, y_rain_train, y_rain_test = train_test_split(X, y_rain, test_size=0.2, random_state=42)
-        _, _, y_rain_binary_train, y_rain_binary_test = train_test_split(X, y_rain_binary, test_size=0.2, random_state=42)
-        _, _, y_wind_train, y_wind_test = train_test_split(X, y_wind, test_size=0.2, random_state=42)
-        _, _, y_day_type_train, y_day_type_test = train_test_split(X, y_day_type, test_size=0.2, random_state=42)
+        # Split data, in the dtype the backend's estimators compute in
+        X_train, X_test, y_train, y_test = self.training_data(self.model_backend.training_dtype)
         
         # Train models
-        self.temp_model = RandomForestRegressor(n_estimators=100, random_state=42, max_depth=15)
-        self.temp_model.fit(X_train, y_temp_train)
+        self.temp_model = self.model_backend.regressor()
+        self.temp_model.fit(X_train, y_train['temp_model'])
+        
+        self.rain_model = self.model_backend.regressor()
+        self.rain_model.fit(X_train, y_train['rain_model'])
         
-        self.rain_model = RandomForestRegressor(n_estimators=100, random_state=42, max_depth=15)
-        self.rain_model.fit(X_train, y_rain_train)
+        self.rain_class_model = self.model_backend.classifier()
+        self.rain_class_model.fit(X_train, y_train['rain_class_model'])
         
-        self.rain_class_model = RandomForestClassifier(n_estimators=100, random_state=42, max_depth=15)
-        self.rain_class_model.fit(X_train, y_rain_binary_train)
+        self.wind_model = self.model_backend.regressor()
+        self.wind_model.fit(X_train, y_train['wind_model'])
         
-        self.wind_model = RandomForestRegressor(n_estimators=100, random_state=42, max_depth=15)
-        self.wind_model.fit(X_train, y_wind_train)
+        # Held-out rows give backends without ensemble members the spread of their forecasts
+        for name in ('temp_model', 'rain_model', 'wind_model'):
+            self.model_backend.calibrate(getattr(self, name), X_test, y_test[name])
         
         # Day type classification model
-        self.day_type_model = RandomForestClassifier(n_estimators=100, random_state=42, max_depth=15)
-        self.day_type_model.fit(X_train, y_day_type_train)
+        self.day_type_model = self.model_backend.classifier()
+        self.day_type_model.fit(X_train, y_train['day_type_model'])
         
         # Evaluate day type model
         day_type_pred = self.day_type_model.predict(X_test)
-        day_type_accuracy = accuracy_score(y_day_type_test, day_type_pred)
+        day_type_accuracy = accuracy_score(y_test['day_type_model'], day_type_pred)
         
-        print("✅ Machine learning models trained successfully")
+        print(f"✅ Machine learning models trained successfully ({self.model_backend.name})")
         print(f"📊 Day Type Classification Accuracy: {day_type_accuracy:.2%}")
+        self.report_peak_rss("training", peak_rss)
+    
+    def training_data(self, dtype=np.float64):
+        """train_models' 80/20 split as (X_train, X_test, y_train, y_test), targets keyed by model name.
+        
+        One shuffled row order puts the training rows first and the test rows after them, so the
+        feature matrix is built once, contiguous and in dtype, and every split is a view of it.
+        """
+        from sklearn.model_selection import train_test_split
+        history = self.full_history()
+        
+        # Plain arrays, as at prediction time, so the models are not tied to column names
+        train_rows, test_rows = train_test_split(np.arange(len(history)), test_size=0.2, random_state=42)
+        order = np.concatenate([train_rows, test_rows])
+        X = np.empty((len(order), len(FEATURE_COLUMNS)), dtype=dtype)
+        for i, column in enumerate(FEATURE_COLUMNS):
+            X[:, i] = history[column].to_numpy()[order]
+        
+        targets = {}
+        for name, column in MODEL_TARGETS.items():
+            values = history[column]
+            targets[name] = (values.cat.codes if values.dtype == 'category' else values).to_numpy()[order]
+        split = len(train_rows)
+        return (X[:split], X[split:], {name: y[:split] for name, y in targets.items()},
+                {name: y[split:] for name, y in targets.items()})
+    
+    def full_history(self):
+        """daily_df with every column, reloaded from the store if it was loaded with only INFERENCE_COLUMNS"""
+        if not {*FEATURE_COLUMNS, *MODEL_TARGETS.values()}.issubset(self.daily_df.columns):
+            self.daily_df = load_history(self.history_path, fingerprint=self.fingerprint)
+        return self.daily_df
+    
+    def report_peak_rss(self, stage, before):
+        """Print how far a stage raised this process's peak RSS"""
+        after = metrics.peak_resident_memory_bytes()
+        print(f"🧠 Peak RSS {before / 2 ** 20:.0f} MB before {stage}, {after / 2 ** 20:.0f} MB after")
+    
+    def model_key(self, model_backend=None, model_params=None):
+        """Version of the models training on this history with the given backend and params produces"""
+        name = model_backend or os.getenv('MODEL_BACKEND', 'random_forest')
+        key = self.history_key({'history': getattr(self, 'fingerprint', None), 'backend': name,
+                                'params': model_params or {}, 'features': FEATURE_VERSION})
+        return f"{name}-{key}"
+    
+    def model_path(self, model_backend=None, model_params=None):
+        """Where models trained on this history with the given backend and params are persisted"""
+        return os.path.join(modeldir, f"{self.model_key(model_backend, model_params)}.pkl")
+    
+    def save_models(self, path):
+        """Persist the backend and fitted models so other processes can skip training"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        state = {'model_backend': self.model_backend, 'model_version': self.model_version,
+                 'models': {name: getattr(self, name) for name in MODEL_NAMES}}
+        
+        # Write then rename, so concurrent readers never see a partial file
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+    
+    def load_models(self, path):
+        """Restore models written by save_models; returns False when there is nothing to load"""
+        if not os.path.exists(path):
+            return False
+        with MODEL_SECONDS.time('load'), open(path, "rb") as f:
+            state = pickle.load(f)
+        self.model_backend = state['model_backend']
+        self.model_version = state.get('model_version')
+        for name, model in state['models'].items():
+            setattr(self, name, model)
+        print(f"✅ Models loaded from {path} ({self.model_backend.name})")
+        self.load_forecast_matrix()
+        return True
+    
+    def load_forecast_matrix(self, path=None):
+        """Use the precomputed forecast matrix at path (default: the nightly one) if it exists"""
+        from forecast_matrix import ForecastMatrix
+        
+        self.forecast_matrix = ForecastMatrix.load(path or os.path.join(matrixdir, "latest"))
+        if self.forecast_matrix is not None:
+            status = self.forecast_matrix.status()
+            fresh = self.forecast_matrix.is_fresh(getattr(self, 'model_version', None),
+                                                  getattr(self.elevation_provider, 'source', None))
+            print(f"{'✅' if fresh else '⚠️ '} Forecast matrix: {status['rows']} forecasts, "
+                  f"{status['bytes'] / 1024:.0f} KB, built {status['age_hours']:.1f}h ago"
+                  + ("" if fresh else " (stale, using live inference)"))
+        return self.forecast_matrix
+    
+    def precomputed_forecast(self, city, state, country, date, target_date, lat, lng):
+        """The stored ForecastResult for a known city and date, or None when it must be predicted live"""
+        matrix = getattr(self, 'forecast_matrix', None)
+        if matrix is None or not matrix.is_fresh(getattr(self, 'model_version', None),
+                                                 getattr(self.elevation_provider, 'source', None)):
+            return None
+        row = matrix.lookup(city, date)
+        CACHE_LOOKUPS.inc('matrix', 'miss' if row is None else 'hit')
+        if row is None:
+            return None
+        PREDICTIONS.inc('matrix')
+        return ForecastResult.from_row(row, city, state, country, target_date, lat, lng)
+    
+    def open_result_cache(self):
+        """The shared result cache at RESULT_CACHE_PATH, or None when that is set empty"""
+        from result_cache import SharedResultCache
+        
+        path = os.getenv('RESULT_CACHE_PATH', resultcache)
+        if not path:
+            return None
+        return SharedResultCache(path, max_entries=int(os.getenv('RESULT_CACHE_MAX_ENTRIES', 100_000)))
+    
+    def result_cache_key(self, lat, lng, date):
+        """Shared cache key of a forecast, or None when it cannot be shared with other processes"""
+        model_version = getattr(self, 'model_version', None)
+        source = getattr(self.elevation_provider, 'source', None)
+        if getattr(self, 'result_cache', None) is None or model_version is None or source is None:
+            return None
+        return model_version, source, float(lat), float(lng), date.isoformat()
+    
+    def cached_forecast(self, city, state, country, date, target_date, lat, lng):
+        """A ForecastResult some predictor on this host already computed, or None"""
+        key = self.result_cache_key(lat, lng, date)
+        if key is None:
+            return None
+        values = self.result_cache.get_forecast(*key)
+        CACHE_LOOKUPS.inc('forecast', 'miss' if values is None else 'hit')
+        if values is None:
+            return None
+        PREDICTIONS.inc('cache')
+        return ForecastResult.from_cache(values, city, state, country, target_date)
+    
+    def cache_forecast(self, result, date):
+        """Share a live ForecastResult with the other predictors on this host"""
+        key = self.result_cache_key(result.lat, result.lng, date)
+        if key is not None:
+            self.result_cache.put_forecast(*key, result.cache_values())
+    
+    def cache_forecasts(self, results, dates):
+        """Share many live ForecastResults in one cache transaction"""
+        rows = []
+        for result, date in zip(results, dates):
+            key = self.result_cache_key(result.lat, result.lng, date)
+            if key is not None:
+                rows.append((*key, result.cache_values()))
+        if rows:
+            self.result_cache.put_forecasts(rows)
+    
+    def known_forecast(self, city, state, country, target_date, shared=True):
+        """predict_single_day's ForecastResult when it needs no model work, otherwise None
+        
+        shared=False skips the SQLite result cache, which may wait on another process's lock, and
+        answers from memory only.
+        """
+        is_valid, result = self.validate_date(target_date)
+        if not is_valid:
+            return None
+        lat, lng = self.get_coordinates(city, state, country)
+        precomputed = self.precomputed_forecast(city, state, country, result, target_date, lat, lng)
+        if precomputed is not None or not shared:
+            return precomputed
+        return self.cached_forecast(city, state, country, result, target_date, lat, lng)
+    
+    def predict_day_type(self, features):
+        """Predict day type labels and their confidence from a single predict_proba pass"""
+        proba = self.day_type_model.predict_proba(features)
+        best = np.argmax(proba, axis=1)
+        codes = self.day_type_model.classes_[best]
+        labels = [DAY_TYPES[code] for code in codes]
+        return labels, proba[np.arange(len(best)), best]
     
     def classify_day_type(self, rainfall, temperature, wind_speed, rain_probability):
         """Classify the day type based on predicted weather parameters"""
@@ -303,146 +809,330 @@ class WeatherPredictor:
         else:
             return 'sunny_cold', '☀️🧊 Sunny Cold Day'
     
+    def classify_day_types(self, rainfall, temperature, wind_speed, rain_probability):
+        """Vectorized classify_day_type returning arrays of day types and descriptions"""
+        return evaluate_rules(DAY_TYPE_RULES, DAY_TYPE_DEFAULT, rainfall=rainfall, temperature=temperature,
+                              wind_speed=wind_speed, rain_probability=rain_probability)
+    
     def validate_date(self, date_str):
         """Validate if date is within allowed range (today to 6 months future)"""
         try:
             input_date = datetime.strptime(date_str, "%Y-%m-%d").date()
             
             if input_date < self.today:
+                PREDICTION_ERRORS.inc('past_date')
                 return False, "Date cannot be in the past. Please select today or a future date."
             elif input_date > self.max_future_date:
+                PREDICTION_ERRORS.inc('beyond_horizon')
                 return False, f"Date cannot be more than 6 months in the future. Maximum allowed: {self.max_future_date}"
             else:
                 return True, input_date
         except ValueError:
+            PREDICTION_ERRORS.inc('invalid_date')
             return False, "Invalid date format. Please use YYYY-MM-DD format."
     
     def get_coordinates(self, city, state, country):
         """Get coordinates for the location"""
-        city_coords = {
-            'delhi': (28.6139, 77.2090), 'mumbai': (19.0760, 72.8777),
-            'chennai': (13.0827, 80.2707), 'bangalore': (12.9716, 77.5946),
-            'kolkata': (22.5726, 88.3639), 'hyderabad': (17.3850, 78.4867),
-            'pune': (18.5204, 73.8567), 'ahmedabad': (23.0225, 72.5714),
-            'jaipur': (26.9124, 75.7873), 'lucknow': (26.8467, 80.9462),
-            'kochi': (9.9312, 76.2673), 'goa': (15.2993, 74.1240),
-            'shimla': (31.1048, 77.1734), 'darjeeling': (27.0412, 88.2663)
-        }
-        
         city_key = city.lower()
-        return city_coords.get(city_key, (20.5937, 78.9629))
+        return CITY_COORDINATES.get(city_key, DEFAULT_COORDINATES)
     
     def get_elevation(self, lat, lng):
         """Get elevation data"""
-        try:
-            params = {'locations': f'{lat},{lng}'}
-            response = requests.get(self.elevation_api, params=params, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                return data['results'][0]['elevation'] if data['results'] else 0
-        except:
-            pass
-        return 0
-    
-    def predict_single_day(self, city, state, country, target_date):
+        return float(self.get_elevations([(lat, lng)])[0])
+    
+    @profiling.stage(histogram=STAGE_SECONDS, labels=('get_elevations',))
+    def get_elevations(self, coordinates, return_resolved=False):
+        """Elevations for a list of (lat, lng) pairs in bulk; unresolved locations fall back to 0.
+        
+        With return_resolved, also returns a boolean array marking the locations that were actually
+        resolved, so forecasts made from the fallback can be kept out of shared caches.
+        """
+        provider = self.elevation_provider
+        if not coordinates:
+            elevations, resolved = np.zeros(0), np.zeros(0, dtype=bool)
+        elif not self.shares_elevations():
+            lats, lngs = zip(*coordinates)
+            elevations = provider.lookup(lats, lngs)
+            resolved = ~np.isnan(elevations)
+            ELEVATION_FALLBACKS.inc(amount=int((~resolved).sum()))
+            elevations = np.nan_to_num(elevations, nan=0.0)
+        else:
+            # Only locations no process on this host has resolved yet go to the provider
+            coordinates, known, missing = self.cached_elevations(coordinates)
+            if missing:
+                lats, lngs = zip(*missing)
+                known.update(self.cache_elevations(missing, provider.lookup(lats, lngs)))
+            resolved = np.array([point in known for point in coordinates])
+            elevations = np.array([known.get(point, 0.0) for point in coordinates])
+        return (elevations, resolved) if return_resolved else elevations
+    
+    def shares_elevations(self):
+        """True when elevations go through the shared result cache, i.e. a remote provider and a cache"""
+        return getattr(self, 'result_cache', None) is not None and getattr(self.elevation_provider, 'remote', False)
+    
+    def cached_elevations(self, coordinates):
+        """The coordinates as floats, the elevations of those already in the shared cache, and the points still missing"""
+        coordinates = [(float(lat), float(lng)) for lat, lng in coordinates]
+        known = self.result_cache.get_elevations(self.elevation_provider.source, coordinates)
+        missing = list(dict.fromkeys(point for point in coordinates if point not in known))
+        CACHE_LOOKUPS.inc('elevation', 'hit', amount=len(known))
+        CACHE_LOOKUPS.inc('elevation', 'miss', amount=len(missing))
+        return coordinates, known, missing
+    
+    def cache_elevations(self, points, elevations):
+        """Share the provider's elevations for points; returns the resolved ones by point, leaving out NaNs"""
+        resolved = {point: float(value) for point, value in zip(points, elevations) if not np.isnan(value)}
+        self.result_cache.put_elevations(self.elevation_provider.source, resolved)
+        ELEVATION_FALLBACKS.inc(amount=len(points) - len(resolved))
+        return resolved
+    
+    def features(self):
+        """The FeatureStore serving this predictor's forecast window, built on first use"""
+        if getattr(self, 'feature_store', None) is None:
+            from feature_store import FeatureStore
+            start = getattr(self, 'today', datetime.now().date())
+            end = getattr(self, 'max_future_date', start + timedelta(days=180))
+            annual_temperature = self.seasonal_table(end.year)['ANNUAL']
+            self.feature_store = FeatureStore(self.daily_df, annual_temperature, start, end)
+        return self.feature_store
+    
+    @profiling.stage(histogram=STAGE_SECONDS, labels=('build_features',))
+    def build_features(self, dates):
+        """Build the model feature matrix for a list of dates"""
+        return self.features().features_for(dates)
+    
+    def member_predictions(self, model_name, features):
+        """Per-member predictions of a regressor, shape (rows, members); one column per tree for forests"""
+        return self.model_backend.members(getattr(self, model_name), features)
+    
+    @profiling.stage(histogram=STAGE_SECONDS, labels=('predict_batch',))
+    def predict_batch(self, dates, elevation=0):
+        """Predict weather and day type for many dates at once, returning a dict of arrays"""
+        # Features only depend on the date, so each distinct date goes through the models once
+        unique_dates, rows = np.unique(np.array(dates, dtype='datetime64[D]'), return_inverse=True)
+        PREDICTIONS.inc('live', amount=len(rows))
+        features = self.build_features(unique_dates)
+        years = features[rows, 0]
+        
+        # Every member's prediction gives the point estimate (their mean) and the spread
+        temp_members = self.member_predictions('temp_model', features)[rows]
+        rain_members = self.member_predictions('rain_model', features)[rows]
+        wind_members = self.member_predictions('wind_model', features)[rows]
+        
+        # Adjust for elevation and climate
+        temp_members += ((-0.0065 * np.asarray(elevation)) + (0.02 * (years - 2000)))[:, None]
+        
+        forecast = {
+            'temperature': temp_members.mean(axis=1),
+            'rain_probability': self.rain_class_model.predict_proba(features)[rows, 1] * 100,
+            'expected_rainfall': np.maximum(rain_members.mean(axis=1), 0),
+            'wind_speed': np.maximum(wind_members.mean(axis=1), 0),
+        }
+        for name, members in (('temperature', temp_members), ('rainfall', rain_members), ('wind_speed', wind_members)):
+            for quantile, values in zip(FORECAST_QUANTILES, np.percentile(members, FORECAST_QUANTILES, axis=1)):
+                # Residual spreads are symmetric enough to reach below zero, which rain and wind cannot
+                forecast[f'{name}_p{quantile}'] = values if name == 'temperature' else np.maximum(values, 0)
+        for threshold in RAINFALL_EXCEEDANCE_MM:
+            forecast[f'chance_rain_over_{threshold}mm'] = (rain_members > threshold).mean(axis=1) * 100
+        
+        # Predict day type using ML model; label and confidence come from one pass
+        day_type_labels, day_type_confidence = self.predict_day_type(features)
+        forecast['ml_day_type'] = np.array(day_type_labels, dtype=object)[rows]
+        forecast['ml_confidence'] = day_type_confidence[rows]
+        
+        # Enhanced day type classification and general condition
+        forecast['day_type'], forecast['day_type_description'] = self.classify_day_types(
+            forecast['expected_rainfall'], forecast['temperature'], forecast['wind_speed'], forecast['rain_probability']
+        )
+        forecast['condition'] = self.get_weather_conditions(
+            forecast['temperature'], forecast['rain_probability'], forecast['wind_speed']
+        )
+        return forecast
+    
+    def forecast_result(self, forecast, i, city, state, country, date, lat, lng, elevation):
+        """Row i of a predict_batch result as a compact ForecastResult"""
+        return ForecastResult(
+            city, state, country, date,
+            float(forecast['temperature'][i]),
+            float(forecast['rain_probability'][i]),
+            float(forecast['expected_rainfall'][i]),
+            float(forecast['wind_speed'][i]),
+            forecast['condition'][i],
+            forecast['day_type'][i],
+            forecast['ml_day_type'][i],
+            float(forecast['ml_confidence'][i]),
+            elevation, lat, lng,
+            tuple(float(forecast[key][i]) for key in SPREAD_KEYS)
+        )
+    
+    def forecast_record(self, forecast, i, city, state, country, date, lat, lng, elevation):
+        """Format row i of a predict_batch result as a prediction dict"""
+        return self.forecast_result(forecast, i, city, state, country, date, lat, lng, elevation).to_dict()
+    
+    def forecast_array(self, forecast, sites, dates, elevations, dtype=RESULT_DTYPE):
+        """A predict_batch result as a RESULT_DTYPE structured array, labels stored as small integer codes"""
+        import pandas as pd
+        array = np.empty(len(dates), dtype=dtype)
+        array['site'] = sites
+        array['date'] = dates
+        array['elevation'] = elevations
+        for name in ('temperature', 'rain_probability', 'expected_rainfall', 'wind_speed', 'ml_confidence', *SPREAD_KEYS):
+            array[name] = forecast[name]
+        array['condition'] = pd.Categorical(forecast['condition'], categories=WEATHER_CONDITIONS).codes
+        array['day_type'] = pd.Categorical(forecast['day_type'], categories=FORECAST_DAY_TYPES).codes
+        array['ml_day_type'] = pd.Categorical(forecast['ml_day_type'], categories=DAY_TYPES).codes
+        return array
+    
+    @profiling.stage(histogram=STAGE_SECONDS, labels=('predict_single_day',))
+    def predict_single_day(self, city, state, country, target_date, compact=False):
         """Predict weather for a single specific day with day type classification"""
         # Validate date
         is_valid, result = self.validate_date(target_date)
         if not is_valid:
             return result
         
-        target_date_obj = result
-        
         # Get location data
         lat, lng = self.get_coordinates(city, state, country)
+        
+        # Known cities inside a fresh precomputed window are a single row read
+        precomputed = self.precomputed_forecast(city, state, country, result, target_date, lat, lng)
+        if precomputed is not None:
+            return precomputed if compact else precomputed.to_dict()
+        
+        # Then anything another process on this host already predicted
+        cached = self.cached_forecast(city, state, country, result, target_date, lat, lng)
+        if cached is not None:
+            return cached if compact else cached.to_dict()
+        
+        elevations, resolved = self.get_elevations([(lat, lng)], return_resolved=True)
+        elevation = float(elevations[0])
+        forecast = self.predict_batch([result], elevation)
+        prediction = self.forecast_result(forecast, 0, city, state, country, target_date, lat, lng, elevation)
+        
+        # A forecast from the fallback elevation would outlive the outage in every other process
+        if resolved[0]:
+            self.cache_forecast(prediction, result)
+        return prediction if compact else prediction.to_dict()
+    
+    @profiling.stage
+    def predict_range(self, city, state, country, start_date, end_date):
+        """Predict every day from start_date to end_date (inclusive) in a single batch"""
+        is_valid, start = self.validate_date(start_date)
+        if not is_valid:
+            return start
+        is_valid, end = self.validate_date(end_date)
+        if not is_valid:
+            return end
+        if end < start:
+            return "End date cannot be before the start date."
+        
+        lat, lng = self.get_coordinates(city, state, country)
         elevation = self.get_elevation(lat, lng)
         
-        # Extract date components
-        year = target_date_obj.year
-        month = target_date_obj.month
-        day = target_date_obj.day
-        day_of_year = target_date_obj.timetuple().tm_yday
-        
-        # Get historical data for features
-        recent_data = self.daily_df[
-            (self.daily_df['YEAR'] == year - 1) & 
-            (self.daily_df['MONTH'] == month) & 
-            (self.daily_df['DAY'] == day)
+        dates = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+        forecast = self.predict_batch(dates, elevation)
+        return [
+            self.forecast_record(forecast, i, city, state, country, date.strftime("%Y-%m-%d"), lat, lng, elevation)
+            for i, date in enumerate(dates)
         ]
+    
+    def iter_forecasts(self, sites, start_date, end_date, batch_size=None, chunk_rows=4096, compact=False):
+        """Lazily yield the prediction dict of every (city, state, country) site for each day from
+        start_date to end_date, site by site; with batch_size, yield lists of up to that many records.
+        With compact, ForecastResult objects are yielded instead of dicts."""
+        dates = self.forecast_dates(start_date, end_date)
+        records = self.forecast_chunks(iter(sites), dates, chunk_rows, compact)
+        if batch_size is None:
+            return records
+        return iter(lambda: list(itertools.islice(records, batch_size)), [])
+    
+    def iter_forecast_arrays(self, sites, start_date, end_date, chunk_rows=4096, dtype=RESULT_DTYPE):
+        """Lazily yield RESULT_DTYPE arrays covering every site and day, one per predicted chunk;
+        the 'site' field is the site's position in `sites`"""
+        dates = self.forecast_dates(start_date, end_date)
+        return self.forecast_array_chunks(iter(sites), dates, chunk_rows, dtype)
+    
+    def forecast_dates(self, start_date, end_date):
+        """Every date from start_date to end_date, raising ValueError with predict_range's messages"""
+        is_valid, start = self.validate_date(start_date)
+        if not is_valid:
+            raise ValueError(start)
+        is_valid, end = self.validate_date(end_date)
+        if not is_valid:
+            raise ValueError(end)
+        if end < start:
+            raise ValueError("End date cannot be before the start date.")
+        return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    
+    def predict_chunks(self, sites, dates, chunk_rows):
+        """Yield (sites, coordinates, elevations, forecast) for bounded chunks of sites x dates"""
+        max_sites = max(1, chunk_rows // len(dates))
         
-        if recent_data.empty:
-            # Use average of similar dates
-            similar_data = self.daily_df[
-                (self.daily_df['MONTH'] == month) & 
-                (self.daily_df['DAY'] == day) &
-                (self.daily_df['YEAR'] >= year - 5)
-            ]
+        # Start with one site so the first result arrives quickly, then grow to full chunks
+        chunk_sites = 1
+        while True:
+            chunk = list(itertools.islice(sites, chunk_sites))
+            if not chunk:
+                return
+            chunk_sites = min(chunk_sites * 2, max_sites)
             
-            if not similar_data.empty:
-                temp_lag = similar_data['TEMPERATURE'].mean()
-                rain_lag = similar_data['RAINFALL'].mean()
-                wind_lag = similar_data['WIND_SPEED'].mean()
-                temp_roll = similar_data['TEMPERATURE'].mean()
-                rain_roll = similar_data['RAINFALL'].mean()
-            else:
-                temp_lag, rain_lag, wind_lag, temp_roll, rain_roll = 25, 0, 10, 25, 0
-        else:
-            temp_lag = recent_data['TEMPERATURE'].values[0]
-            rain_lag = recent_data['RAINFALL'].values[0]
-            wind_lag = recent_data['WIND_SPEED'].values[0]
-            temp_roll = recent_data['TEMPERATURE'].values[0]
-            rain_roll = recent_data['RAINFALL'].values[0]
-        
-        # Prepare features
-        features = np.array([[
-            year, month, day, day_of_year, year - 1900,
-            np.sin(2 * np.pi * day_of_year / 365),
-            np.cos(2 * np.pi * day_of_year / 365),
-            np.sin(2 * np.pi * month / 12),
-            np.cos(2 * np.pi * month / 12),
-            temp_lag, rain_lag, wind_lag, temp_roll, rain_roll,
-            25 + 0.02 * (year - 2000)
-        ]])
-        
-        # Make predictions
-        temp_pred = float(self.temp_model.predict(features)[0])
-        rain_amount_pred = max(0, float(self.rain_model.predict(features)[0]))
-        rain_prob = float(self.rain_class_model.predict_proba(features)[0][1] * 100)
-        wind_pred = max(0, float(self.wind_model.predict(features)[0]))
-        
-        # Predict day type using ML model
-        ml_day_type = self.day_type_model.predict(features)[0]
-        ml_day_type_proba = np.max(self.day_type_model.predict_proba(features))
+            coordinates = [self.get_coordinates(city, state, country) for city, state, country in chunk]
+            elevations = self.get_elevations(coordinates)
+            forecast = self.predict_batch(dates * len(chunk), np.repeat(elevations, len(dates)))
+            yield chunk, coordinates, elevations, forecast
+    
+    def forecast_chunks(self, sites, dates, chunk_rows, compact=False):
+        """Records for sites x dates, one site after another"""
+        date_strings = [date.strftime("%Y-%m-%d") for date in dates]
+        make_record = self.forecast_result if compact else self.forecast_record
+        for chunk, coordinates, elevations, forecast in self.predict_chunks(sites, dates, chunk_rows):
+            row = 0
+            for (city, state, country), (lat, lng), elevation in zip(chunk, coordinates, elevations):
+                for date in date_strings:
+                    yield make_record(forecast, row, city, state, country, date, lat, lng, float(elevation))
+                    row += 1
+    
+    def forecast_array_chunks(self, sites, dates, chunk_rows, dtype=RESULT_DTYPE):
+        """Structured arrays for sites x dates, one per predicted chunk"""
+        dates = np.array(dates, dtype='datetime64[D]')
+        first_site = 0
+        for chunk, _, elevations, forecast in self.predict_chunks(sites, list(dates.astype(object)), chunk_rows):
+            yield self.forecast_array(forecast, np.repeat(np.arange(first_site, first_site + len(chunk)), len(dates)),
+                                      np.tile(dates, len(chunk)), np.repeat(elevations, len(dates)), dtype)
+            first_site += len(chunk)
+    
+    def predict_cities(self, cities, target_date):
+        """Predict one date for many (city, state, country) locations, best parade venue first"""
+        import pandas as pd
+        is_valid, result = self.validate_date(target_date)
+        if not is_valid:
+            return result
         
-        # Adjust for elevation and climate
-        temp_pred += (-0.0065 * elevation) + (0.02 * (year - 2000))
+        # Resolve every location up front; repeated coordinates are looked up once
+        coordinates = [self.get_coordinates(city, state, country) for city, state, country in cities]
+        elevations = self.get_elevations(coordinates)
         
-        # Enhanced day type classification
-        day_type, day_type_description = self.classify_day_type(
-            rain_amount_pred, temp_pred, wind_pred, rain_prob
-        )
+        # The date's features and model outputs are shared, only the elevation differs per city;
+        # the models reject an empty batch, so no cities give an empty table with the same columns
+        if cities:
+            forecast = self.predict_batch([result] * len(cities), elevations)
+        else:
+            forecast = {key: np.zeros(0) for key in BATCH_KEYS}
         
-        # Determine weather condition
-        condition = self.get_weather_condition(temp_pred, rain_prob, wind_pred)
-        
-        return {
-            'city': city,
-            'state': state,
-            'country': country,
-            'date': target_date,
-            'day_name': target_date_obj.strftime("%A"),
-            'temperature': round(temp_pred, 1),
-            'rain_probability': round(rain_prob, 1),
-            'expected_rainfall': round(rain_amount_pred, 1),
-            'wind_speed': round(wind_pred, 1),
-            'condition': condition,
-            'day_type': day_type,
-            'day_type_description': day_type_description,
-            'ml_day_type': ml_day_type,
-            'ml_confidence': round(ml_day_type_proba * 100, 1),
-            'elevation': round(elevation, 1),
-            'coordinates': f"({lat:.4f}, {lng:.4f})"
-        }
+        table = pd.DataFrame(list(cities), columns=['city', 'state', 'country'])
+        table['lat'] = [lat for lat, _ in coordinates]
+        table['lng'] = [lng for _, lng in coordinates]
+        table['elevation'] = elevations
+        for column, values in forecast.items():
+            table[column] = values
+        table['date'] = target_date
+        
+        # Driest, calmest and then mildest venues rank first
+        table['comfort'] = (table['temperature'] - 25).abs()
+        table = table.sort_values([f'chance_rain_over_{RAINFALL_EXCEEDANCE_MM[0]}mm', 'rain_probability', 'wind_speed', 'comfort'],
+                                  kind='stable', ignore_index=True)
+        table.insert(0, 'rank', np.arange(1, len(table) + 1))
+        return table.drop(columns='comfort')
     
     def get_weather_condition(self, temp, rain_prob, wind_speed):
         """Determine weather condition"""
@@ -459,6 +1149,12 @@ class WeatherPredictor:
                 return "Cool and windy" if wind_speed > 15 else "Cool and clear"
             else:
                 return "Cold"
+    
+    def get_weather_conditions(self, temp, rain_prob, wind_speed):
+        """Vectorized get_weather_condition returning an array of conditions"""
+        conditions, = evaluate_rules(WEATHER_CONDITION_RULES, WEATHER_CONDITION_DEFAULT,
+                                     temp=temp, rain_prob=rain_prob, wind_speed=wind_speed)
+        return conditions
 
 def display_prediction(prediction):
     """Display the weather prediction with day type classification"""
@@ -483,6 +1179,12 @@ def display_prediction(prediction):
     print(f"   💨 Wind Speed: {prediction['wind_speed']} km/h")
     print(f"   ☁️  General Condition: {prediction['condition']}")
     
+    print("\n📈 Forecast Range (10th-90th percentile):")
+    print(f"   🌡️  Temperature: {prediction['temperature_p10']} - {prediction['temperature_p90']}°C")
+    print(f"   💧 Rainfall: {prediction['rainfall_p10']} - {prediction['rainfall_p90']} mm")
+    print(f"   💨 Wind Speed: {prediction['wind_speed_p10']} - {prediction['wind_speed_p90']} km/h")
+    print(f"   ⛈️  Chance of more than 10 mm rain: {prediction['chance_rain_over_10mm']}%")
+    
     # Specialized recommendations based on day type
     print(f"\n💡 {prediction['day_type_description'].split(' ')[-1]} DAY RECOMMENDATIONS:")
     
@@ -531,6 +1233,9 @@ def main():
         print(f"❌ Error initializing system: {e}")
         return
     
+    # Metrics endpoint and file dump, when METRICS_PORT / METRICS_FILE ask for them
+    metrics.start_exporters()
+    
     # Display date limits
     print(f"\n📅 Date Range Available:")
     print(f"   Today: {predictor.today}")
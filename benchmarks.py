@@ -0,0 +1,1218 @@
+"""Performance benchmarks for the weather prediction backend.
+
+Run a benchmark with `python benchmarks.py <name>`; run without arguments to list them.
+Benchmarks use the same CSV sources as the backend, so run them from the project root.
+Correctness checks live in test_weather.py.
+"""
+import os
+import sys
+import time
+import pickle
+import resource
+import tempfile
+import itertools
+import threading
+import subprocess
+import multiprocessing
+import json
+
+import backend
+from conftest import SyntheticTerrain, bare_predictor, write_plane_tile, MockElevationHandler, mock_elevation_server
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    # ru_maxrss survives fork+exec, so prefer the per-address-space high water mark
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _measure(func, *args):
+    """Run func in this process and report (seconds, rows, columns, RSS growth in MB)"""
+    rss_before = _peak_rss_mb()
+    start = time.perf_counter()
+    df = func(*args)
+    elapsed = time.perf_counter() - start
+    return elapsed, len(df), len(df.columns), _peak_rss_mb() - rss_before
+
+
+def _in_fresh_process(func, *args):
+    """Run func in a spawned interpreter so RSS numbers are not polluted by earlier runs"""
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(func, args)
+
+
+def _regenerate_history():
+    predictor = bare_predictor()
+    predictor.create_daily_dataset()
+    predictor.prepare_features()
+    return predictor.daily_df
+
+
+def bench_history_store():
+    """Compare regenerating daily_df from CSV against loading the columnar store"""
+    with tempfile.TemporaryDirectory() as store:
+        backend.save_history(_regenerate_history(), store)
+
+        runs = [
+            ("regenerate from CSV", _measure, _regenerate_history),
+            ("columnar store, all columns", _measure, backend.load_history, store),
+            ("columnar store, inference columns", _measure, backend.load_history, store,
+             backend.INFERENCE_COLUMNS),
+        ]
+        print(f"{'variant':<36}{'time':>10}{'rows':>10}{'cols':>6}{'RSS +MB':>10}")
+        for label, *call in runs:
+            elapsed, rows, cols, rss = _in_fresh_process(*call)
+            print(f"{label:<36}{elapsed * 1000:>8.1f}ms{rows:>10}{cols:>6}{rss:>10.1f}")
+
+
+def bench_day_type():
+    """Time the day type classifier per request; test_weather.py checks the single pass against predict"""
+    np = backend.np
+    predictor = bare_predictor()
+    predictor.create_daily_dataset()
+    predictor.prepare_features()
+    predictor.train_models()
+    daily_df = predictor.daily_df
+    
+    row = daily_df[backend.FEATURE_COLUMNS].to_numpy()[:1]
+    runs = 200
+    start = time.perf_counter()
+    for _ in range(runs):
+        predictor.day_type_model.predict(row)
+        np.max(predictor.day_type_model.predict_proba(row))
+    two_pass = (time.perf_counter() - start) / runs
+    start = time.perf_counter()
+    for _ in range(runs):
+        predictor.predict_day_type(row)
+    one_pass = (time.perf_counter() - start) / runs
+    print(f"predict + predict_proba: {two_pass * 1000:.2f} ms/request")
+    print(f"single predict_proba:    {one_pass * 1000:.2f} ms/request ({two_pass / one_pass:.2f}x)")
+
+
+def bench_rules():
+    """Time the rule tables against the scalar if/elif chains at 1M rows; test_weather.py checks they agree"""
+    predictor = backend.WeatherPredictor.__new__(backend.WeatherPredictor)
+    rng = backend.np.random.default_rng(0)
+    
+    rows = 1_000_000
+    rain, temp, wind, prob = (rng.uniform(0, 40, rows), rng.uniform(10, 40, rows),
+                              rng.uniform(0, 40, rows), rng.uniform(0, 100, rows))
+    timings = [
+        ("classify_day_type (scalar loop)",
+         lambda: [predictor.classify_day_type(*row) for row in zip(rain, temp, wind, prob)]),
+        ("classify_day_types (rule table)",
+         lambda: predictor.classify_day_types(rain, temp, wind, prob)),
+        ("get_weather_condition (scalar loop)",
+         lambda: [predictor.get_weather_condition(*row) for row in zip(temp, prob, wind)]),
+        ("get_weather_conditions (rule table)",
+         lambda: predictor.get_weather_conditions(temp, prob, wind)),
+    ]
+    for label, run in timings:
+        start = time.perf_counter()
+        run()
+        print(f"{label:<40}{(time.perf_counter() - start) * 1000:>10.1f} ms for {rows:,} rows")
+
+
+def bench_distribution():
+    """Compare the per-tree distribution path with plain point-estimate predictions"""
+    np = backend.np
+    predictor = bare_predictor()
+    predictor.create_daily_dataset()
+    predictor.prepare_features()
+    predictor.train_models()
+    
+    start_date = backend.datetime.now().date()
+    for rows in (1, 180):
+        dates = [start_date + backend.timedelta(days=offset) for offset in range(rows)]
+        features = predictor.build_features(dates)
+        
+        # The mean of the members must reproduce each forest's own predict()
+        for name in ('temp_model', 'rain_model', 'wind_model'):
+            members = predictor.member_predictions(name, features)
+            assert np.allclose(members.mean(axis=1), getattr(predictor, name).predict(features))
+        
+        runs = 20
+        start = time.perf_counter()
+        for _ in range(runs):
+            for name in ('temp_model', 'rain_model', 'wind_model'):
+                getattr(predictor, name).predict(features)
+        point = (time.perf_counter() - start) / runs
+        start = time.perf_counter()
+        for _ in range(runs):
+            for name in ('temp_model', 'rain_model', 'wind_model'):
+                np.percentile(predictor.member_predictions(name, features), backend.FORECAST_QUANTILES, axis=1)
+        distribution = (time.perf_counter() - start) / runs
+        print(f"{rows:>4} rows: point estimates {point * 1000:7.2f} ms, "
+              f"with quantiles {distribution * 1000:7.2f} ms ({distribution / point:.2f}x)")
+
+
+def bench_model_backends():
+    """Side-by-side training time, latency, size and holdout accuracy of every model backend"""
+    from model_backends import MODEL_BACKENDS
+    np = backend.np
+    predictor = backend.WeatherPredictor(train=False)
+    history = predictor.full_history()
+    
+    # Hold out the most recent 20% of years so neighbouring days cannot leak into the score
+    cutoff = np.quantile(history['YEAR'].unique(), 0.8)
+    train, test = history[history['YEAR'] < cutoff], history[history['YEAR'] >= cutoff]
+    X_test = test[backend.FEATURE_COLUMNS].to_numpy()
+    dates = [predictor.today + backend.timedelta(days=offset) for offset in range(180)]
+    
+    rows = []
+    for name in MODEL_BACKENDS:
+        predictor.daily_df = train
+        start = time.perf_counter()
+        predictor.train_models(model_backend=name)
+        train_time = time.perf_counter() - start
+        predictor.daily_df = history
+        
+        models = [predictor.temp_model, predictor.rain_model, predictor.rain_class_model,
+                  predictor.wind_model, predictor.day_type_model]
+        size = sum(len(pickle.dumps(model)) for model in models)
+        
+        latencies = []
+        for batch in (dates[:1], dates):
+            predictor.predict_batch(batch)
+            start = time.perf_counter()
+            for _ in range(10):
+                predictor.predict_batch(batch)
+            latencies.append((time.perf_counter() - start) / 10)
+        
+        # Every backend has a real spread: its p10-p90 band should hold about 80% of held-out temperatures
+        members = predictor.member_predictions('temp_model', X_test)
+        assert members.shape[1] > 1, f"{name} gives point estimates only"
+        p10, p90 = np.percentile(members, [10, 90], axis=1)
+        
+        rows.append((
+            name, train_time, latencies[0], latencies[1], size,
+            np.mean(np.abs(predictor.temp_model.predict(X_test) - test['TEMPERATURE'])),
+            np.mean(np.abs(predictor.rain_model.predict(X_test) - test['RAINFALL'])),
+            np.mean(np.abs(predictor.wind_model.predict(X_test) - test['WIND_SPEED'])),
+            np.mean(predictor.day_type_model.predict(X_test) == test['DAY_TYPE'].cat.codes),
+            np.mean((test['TEMPERATURE'] >= p10) & (test['TEMPERATURE'] <= p90)),
+        ))
+    
+    print(f"\n{'backend':<24}{'train':>9}{'1 day':>10}{'180 days':>10}{'size':>9}"
+          f"{'temp MAE':>10}{'rain MAE':>10}{'wind MAE':>10}{'day type':>10}{'temp p10-90':>13}")
+    for name, train_time, one, many, size, temp, rain, wind, day_type, coverage in rows:
+        print(f"{name:<24}{train_time:>8.1f}s{one * 1000:>8.1f}ms{many * 1000:>8.1f}ms{size / 1e6:>7.1f}MB"
+              f"{temp:>10.3f}{rain:>10.3f}{wind:>10.3f}{day_type:>10.1%}{coverage:>13.1%}")
+
+
+def bench_cities():
+    """Throughput of predict_cities for 1k cities against one predict_single_day call per city"""
+    np = backend.np
+    predictor = backend.WeatherPredictor(model_params={'n_estimators': 100})
+    # Time the model path only; elevation lookups are network-bound and benchmarked separately
+    predictor.elevation_provider = SyntheticTerrain()
+    
+    rng = np.random.default_rng(0)
+    known = list(backend.CITY_COORDINATES)
+    cities = [(known[i % len(known)].title() if i % 3 else f"Town {i}", "State", "India") for i in range(1000)]
+    backend.CITY_COORDINATES.update({f"town {i}": (rng.uniform(8, 32), rng.uniform(68, 96)) for i in range(0, 1000, 3)})
+    date = (predictor.today + backend.timedelta(days=30)).strftime("%Y-%m-%d")
+    
+    start = time.perf_counter()
+    table = predictor.predict_cities(cities, date)
+    fan_out = time.perf_counter() - start
+    
+    sample = cities[:50]
+    start = time.perf_counter()
+    for city, state, country in sample:
+        predictor.predict_single_day(city, state, country, date)
+    per_city = (time.perf_counter() - start) / len(sample)
+    
+    print(table.head(5)[['rank', 'city', 'temperature', 'rain_probability', 'wind_speed', 'day_type']])
+    print(f"predict_cities:     {len(cities) / fan_out:>10.0f} cities/s ({fan_out * 1000:.1f} ms for {len(cities)})")
+    print(f"predict_single_day: {1 / per_city:>10.0f} cities/s ({per_city * 1000:.1f} ms each)")
+
+
+def bench_elevation():
+    """Bulk elevation resolver against a local mock service: throughput, and how fast an outage fails"""
+    import requests
+    from elevation import BulkElevationResolver
+    np = backend.np
+    rng = np.random.default_rng(0)
+    lats, lngs = rng.uniform(8, 32, 1000).round(4), rng.uniform(68, 96, 1000).round(4)
+    
+    server, url = mock_elevation_server(latency=0.02)
+    sample = 100
+    start = time.perf_counter()
+    for lat, lng in zip(lats[:sample], lngs[:sample]):
+        requests.get(url, params={'locations': f'{lat},{lng}'}, timeout=10).json()
+    per_get = (time.perf_counter() - start) / sample
+    
+    resolver = BulkElevationResolver(url)
+    start = time.perf_counter()
+    elevations = resolver.lookup(lats, lngs)
+    bulk = time.perf_counter() - start
+    expected = [MockElevationHandler.elevation(None, lat, lng) for lat, lng in zip(lats, lngs)]
+    assert np.allclose(elevations, expected)
+    server.shutdown()
+    print(f"one GET per location:  {per_get * 1000:8.2f} ms/location")
+    print(f"bulk POST resolver:    {bulk / len(lats) * 1000:8.2f} ms/location "
+          f"({len(lats)} locations in {bulk * 1000:.0f} ms)")
+    
+    # A sustained outage opens the breaker, after which lookups fail fast
+    server, url = mock_elevation_server(latency=0, fail_first=10 ** 9)
+    resolver = BulkElevationResolver(url, backoff=0.01)
+    start = time.perf_counter()
+    assert np.isnan(resolver.lookup(lats[:10], lngs[:10])).all()
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    assert np.isnan(resolver.lookup(lats[:10], lngs[:10])).all()
+    second = time.perf_counter() - start
+    server.shutdown()
+    print(f"✅ Outage: first lookup gave up after {first * 1000:.0f} ms, "
+          f"next failed fast in {second * 1000:.2f} ms with the breaker open")
+
+
+def bench_dem():
+    """Offline DEM lookup throughput; test_weather.py checks exactness, seams, voids and missing tiles"""
+    from elevation import DEMElevationProvider
+    np = backend.np
+    rng = np.random.default_rng(0)
+    
+    with tempfile.TemporaryDirectory() as tile_dir:
+        write_plane_tile(tile_dir, 19, 72)
+        write_plane_tile(tile_dir, 19, 73)
+        provider = DEMElevationProvider(tile_dir)
+        
+        lats, lngs = rng.uniform(19, 20, 100_000), rng.uniform(72, 74, 100_000)
+        start = time.perf_counter()
+        provider.lookup(lats, lngs)
+        elapsed = time.perf_counter() - start
+        
+        predictor = backend.WeatherPredictor.__new__(backend.WeatherPredictor)
+        predictor.elevation_provider = provider
+        predictor.get_elevation(19.25, 73.25)
+        start = time.perf_counter()
+        predictor.get_elevation(19.25, 73.25)
+        single_elapsed = time.perf_counter() - start
+    
+    print(f"vectorized lookup:  {elapsed / len(lats) * 1e6:8.3f} µs/location ({len(lats)} locations)")
+    print(f"get_elevation():    {single_elapsed * 1e6:8.1f} µs (tile already mapped)")
+
+
+async def _serve_concurrently(predict, requests_, heartbeat=0.001):
+    """Fire every request at once; return wall time, per-request latencies, results and worst event-loop lag"""
+    import asyncio
+    lag = [0.0]
+    
+    async def ticker():
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(heartbeat)
+            lag[0] = max(lag[0], time.perf_counter() - start - heartbeat)
+    
+    async def timed(args):
+        start = time.perf_counter()
+        result = await predict(*args)
+        return time.perf_counter() - start, result
+    
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(*(timed(args) for args in requests_))
+    wall = time.perf_counter() - start
+    tick.cancel()
+    return wall, [latency for latency, _ in outcomes], [result for _, result in outcomes], lag[0]
+
+
+def bench_async():
+    """1k concurrent requests through AsyncWeatherPredictor against threads around the sync predictor"""
+    import asyncio
+    from elevation import BulkElevationResolver
+    from async_predictor import AsyncWeatherPredictor
+    np = backend.np
+    
+    server, url = mock_elevation_server(latency=0.02)
+    predictor = backend.WeatherPredictor(model_params={'n_estimators': 100})
+    predictor.elevation_provider = BulkElevationResolver(url)
+    # Measure batching alone; otherwise the threaded run would warm the shared cache for the facade
+    predictor.result_cache = None
+    
+    cities = list(backend.CITY_COORDINATES)
+    requests_ = [(cities[i % len(cities)].title(), "State", "India",
+                  (predictor.today + backend.timedelta(days=i % 180)).strftime("%Y-%m-%d")) for i in range(1000)]
+    
+    async def threaded(*args):
+        return await asyncio.to_thread(predictor.predict_single_day, *args)
+    
+    async def batched():
+        async with AsyncWeatherPredictor(predictor) as facade:
+            return await _serve_concurrently(facade.predict_single_day, requests_)
+    
+    sample = requests_[:200]
+    rows = [("threads around sync", len(sample)) + asyncio.run(_serve_concurrently(threaded, sample)),
+            ("AsyncWeatherPredictor", len(requests_)) + asyncio.run(batched())]
+    
+    # Micro-batching must not change any answer
+    for args, result in zip(requests_[:20], rows[1][4]):
+        assert result == predictor.predict_single_day(*args)
+    server.shutdown()
+    
+    print(f"{'':<24}{'requests':>9}{'req/s':>9}{'p50':>10}{'p99':>10}{'loop lag':>10}")
+    for name, count, wall, latencies, _, lag in rows:
+        print(f"{name:<24}{count:>9}{count / wall:>9.0f}{np.percentile(latencies, 50) * 1000:>8.0f}ms"
+              f"{np.percentile(latencies, 99) * 1000:>8.0f}ms{lag * 1000:>8.1f}ms")
+
+
+def _bulk_in_subprocess(jobs_path, output_path, tile_dir):
+    """Run the bulk CLI in a fresh interpreter; return its summary line and the peak RSS of it and its workers"""
+    code = ("import sys, resource, bulk, benchmarks; bulk.main(sys.argv[1:]); "
+            "print(benchmarks._peak_rss_mb(), resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024)")
+    env = dict(os.environ, DEM_TILE_DIR=tile_dir, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", code, jobs_path, output_path],
+                            capture_output=True, text=True, env=env, check=True)
+    lines = result.stdout.strip().splitlines()
+    parent, workers = map(float, lines[-1].split())
+    return lines[-2], parent, workers
+
+
+def bench_bulk():
+    """Bulk CLI: throughput and memory at two input sizes, and resuming an interrupted run"""
+    import bulk
+    
+    # Elevations come from an empty tile directory, so no job touches the network
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ['DEM_TILE_DIR'] = workdir
+        predictor = backend.WeatherPredictor(train=False)
+        predictor.load_models(bulk.prepare_models())
+        
+        cities = list(backend.CITY_COORDINATES)
+        dates = [(predictor.today + backend.timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range(180)]
+        
+        sample = 200
+        start = time.perf_counter()
+        for i in range(sample):
+            predictor.predict_single_day(cities[i % len(cities)].title(), "State", "India", dates[i % len(dates)])
+        per_job = (time.perf_counter() - start) / sample
+        print(f"predict_single_day per job: {1 / per_job:.0f}/s")
+        
+        outputs = {}
+        for size in (10_000, 50_000):
+            jobs_path = os.path.join(workdir, f"jobs_{size}.csv")
+            with open(jobs_path, "w") as f:
+                f.write("city,state,country,date\n")
+                for i in range(size):
+                    # Every 1000th job has an out-of-range date and is reported as an error line
+                    date = "2000-01-01" if i % 1000 == 999 else dates[i % len(dates)]
+                    f.write(f"{cities[i % len(cities)].title()},State,India,{date}\n")
+            
+            outputs[size] = os.path.join(workdir, f"forecasts_{size}.jsonl")
+            summary, parent, workers = _bulk_in_subprocess(jobs_path, outputs[size], workdir)
+            print(f"{size:>6} jobs: {summary}")
+            print(f"{'':>12}peak RSS {parent:.0f} MB in the reader, {workers:.0f} MB per worker")
+        
+        # Interrupt the large run part-way, leaving a torn last line, then resume it
+        with open(outputs[50_000]) as f:
+            complete = f.read()
+        lines = complete.splitlines(keepends=True)
+        resumed = os.path.join(workdir, "resumed.jsonl")
+        with open(resumed, "w") as f:
+            f.writelines(lines[:20_000])
+            f.write(lines[20_000][:40])
+        _bulk_in_subprocess(jobs_path, resumed, workdir)
+        with open(resumed) as f:
+            assert f.read() == complete
+        os.environ.pop('DEM_TILE_DIR')
+        print("✅ Resumed after 20000 jobs and a torn line; output identical to the uninterrupted run")
+
+
+def bench_stream():
+    """iter_forecasts over 10k sites x 180 days: first-record latency, throughput and memory"""
+    import bulk
+    predictor = backend.WeatherPredictor(train=False)
+    predictor.load_models(bulk.prepare_models())
+    predictor.elevation_provider = SyntheticTerrain()
+    
+    cities = list(backend.CITY_COORDINATES)
+    sites = [(cities[i % len(cities)].title(), "State", "India") for i in range(10_000)]
+    start_date = predictor.today.strftime("%Y-%m-%d")
+    end_date = (predictor.today + backend.timedelta(days=179)).strftime("%Y-%m-%d")
+    
+    # Streaming yields exactly what predict_range returns, site after site
+    expected = [record for city, state, country in sites[:3]
+                for record in predictor.predict_range(city, state, country, start_date, end_date)]
+    assert list(itertools.islice(predictor.iter_forecasts(sites[:3], start_date, end_date), len(expected))) == expected
+    batches = list(predictor.iter_forecasts(sites[:3], start_date, end_date, batch_size=128))
+    assert [len(batch) for batch in batches] == [128] * 4 + [28] and sum(batches, []) == expected
+    
+    rss_before = _peak_rss_mb()
+    start = time.perf_counter()
+    records = predictor.iter_forecasts(sites, start_date, end_date)
+    next(records)
+    first = time.perf_counter() - start
+    count = 1 + sum(1 for _ in records)
+    streamed = time.perf_counter() - start
+    stream_rss = _peak_rss_mb() - rss_before
+    
+    # The old way: every site's predict_range list kept in memory
+    sample = sites[:500]
+    rss_before = _peak_rss_mb()
+    start = time.perf_counter()
+    materialized = [predictor.predict_range(city, state, country, start_date, end_date) for city, state, country in sample]
+    gathered = time.perf_counter() - start
+    list_rss = _peak_rss_mb() - rss_before
+    rows = sum(len(records) for records in materialized)
+    
+    print(f"{'':<30}{'records':>10}{'records/s':>12}{'first record':>14}{'peak RSS growth':>17}")
+    print(f"{'iter_forecasts':<30}{count:>10}{count / streamed:>12.0f}{first * 1000:>12.1f}ms{stream_rss:>14.0f} MB")
+    print(f"{'predict_range lists':<30}{rows:>10}{rows / gathered:>12.0f}{'':>14}{list_rss:>14.0f} MB")
+
+
+def bench_compact():
+    """Bytes per row and build time of dict records, ForecastResult objects and structured arrays"""
+    import bulk
+    import tracemalloc
+    np = backend.np
+    predictor = backend.WeatherPredictor(train=False)
+    predictor.load_models(bulk.prepare_models())
+    predictor.elevation_provider = SyntheticTerrain()
+    
+    cities = list(backend.CITY_COORDINATES)
+    sites = [(cities[i % len(cities)].title(), "State", "India") for i in range(1000)]
+    start_date = predictor.today.strftime("%Y-%m-%d")
+    end_date = (predictor.today + backend.timedelta(days=179)).strftime("%Y-%m-%d")
+    
+    shapes = {
+        'dict records': lambda sites: list(predictor.iter_forecasts(sites, start_date, end_date)),
+        'ForecastResult': lambda sites: list(predictor.iter_forecasts(sites, start_date, end_date, compact=True)),
+        'structured array': lambda sites: np.concatenate(list(predictor.iter_forecast_arrays(sites, start_date, end_date))),
+    }
+    results = {}
+    print(f"{'':<20}{'rows/s':>10}{'bytes/row':>12}")
+    for name, build in shapes.items():
+        start = time.perf_counter()
+        results[name] = build(sites)
+        elapsed = time.perf_counter() - start
+        
+        # Retained size of 100 sites' worth of output, excluding the model's transient buffers
+        tracemalloc.start()
+        kept = build(sites[:100])
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{name:<20}{len(results[name]) / elapsed:>10.0f}{size / len(kept):>12.0f}")
+    
+    # Every shape carries the same forecast
+    records, compact, array = results['dict records'], results['ForecastResult'], results['structured array']
+    assert [result.to_dict() for result in compact[:1000]] == records[:1000]
+    assert [backend.WEATHER_CONDITIONS[code] for code in array['condition'][:1000]] == [r['condition'] for r in records[:1000]]
+    assert [backend.FORECAST_DAY_TYPES[code] for code in array['day_type'][:1000]] == [r['day_type'] for r in records[:1000]]
+    assert np.allclose(array['temperature'][:1000], [r['temperature'] for r in records[:1000]], atol=0.051)
+    assert (array['site'][::180] == np.arange(len(sites))).all()
+    print("✅ Dicts, ForecastResult objects and structured arrays agree")
+
+
+def bench_matrix():
+    """Precomputed city x day forecast matrix: build cost, size and read latency"""
+    import bulk
+    from forecast_matrix import ForecastMatrix
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        # Offline elevations that always resolve; the build refuses fallback elevations
+        predictor = backend.WeatherPredictor(train=False)
+        predictor.load_models(bulk.prepare_models())
+        predictor.elevation_provider = SyntheticTerrain()
+        predictor.result_cache = None
+        
+        start = time.perf_counter()
+        matrix = ForecastMatrix.build(predictor)
+        built = time.perf_counter() - start
+        path = os.path.join(workdir, "matrix")
+        matrix.save(path)
+        matrix = predictor.load_forecast_matrix(path)
+        
+        cities = [city.title() for city in backend.CITY_COORDINATES]
+        dates = [(predictor.today + backend.timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range(0, 181, 7)]
+        queries = [(city, "State", "India", date) for city in cities for date in dates]
+        
+        def timed(queries):
+            start = time.perf_counter()
+            answers = [predictor.predict_single_day(*query) for query in queries]
+            return answers, (time.perf_counter() - start) / len(queries)
+        
+        _, read_time = timed(queries)
+        predictor.forecast_matrix = None
+        _, live_time = timed(queries)
+    
+    status = matrix.status()
+    print(f"matrix: {status['cities']} cities x {status['days']} days = {status['rows']} forecasts, "
+          f"{status['bytes'] / 1024:.0f} KB, built in {built:.1f}s")
+    print(f"predict_single_day from the matrix: {read_time * 1e6:8.0f} µs")
+    print(f"predict_single_day live:            {live_time * 1e6:8.0f} µs")
+    print(f"✅ Matrix reads are {live_time / read_time:.0f}x faster than live inference")
+
+
+def _cache_worker(model_path, url, queries):
+    """Answer queries with a new predictor in this process; return the answers and seconds per query"""
+    from elevation import BulkElevationResolver
+    predictor = backend.WeatherPredictor(train=False)
+    predictor.load_models(model_path)
+    predictor.elevation_provider = BulkElevationResolver(url)
+    start = time.perf_counter()
+    answers = [predictor.predict_single_day(*query) for query in queries]
+    return answers, (time.perf_counter() - start) / len(queries)
+
+
+def bench_cache(readers=4):
+    """Shared result cache: one process's forecasts and elevations reused by others, and LRU bounds"""
+    import bulk
+    from result_cache import SharedResultCache
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        # Spawned workers inherit the environment, so they all share this cache file
+        os.environ['RESULT_CACHE_PATH'] = os.path.join(workdir, "results.sqlite")
+        server, url = mock_elevation_server(latency=0.02)
+        model_path = bulk.prepare_models()
+        
+        cities = [city.title() for city in backend.CITY_COORDINATES]
+        today = backend.datetime.now().date()
+        dates = [(today + backend.timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range(0, 181, 14)]
+        queries = [(city, "State", "India", date) for city in cities for date in dates]
+        
+        cold, cold_time = _in_fresh_process(_cache_worker, model_path, url, queries)
+        cold_requests = server.RequestHandlerClass.requests_seen
+        warm, warm_time = _in_fresh_process(_cache_worker, model_path, url, queries)
+        assert warm == cold
+        assert server.RequestHandlerClass.requests_seen == cold_requests
+        
+        # Concurrent readers in separate processes all hit, without blocking one another
+        start = time.perf_counter()
+        with multiprocessing.get_context('spawn').Pool(readers) as pool:
+            results = pool.starmap(_cache_worker, [(model_path, url, queries)] * readers)
+        concurrent_wall = time.perf_counter() - start
+        assert all(answers == cold for answers, _ in results)
+        assert server.RequestHandlerClass.requests_seen == cold_requests
+        status = SharedResultCache(os.environ['RESULT_CACHE_PATH']).status()
+        server.shutdown()
+        os.environ.pop('RESULT_CACHE_PATH')
+        
+        # The least recently used entries are evicted once a table outgrows max_entries
+        small = SharedResultCache(os.path.join(workdir, "small.sqlite"), max_entries=100, evict_every=10)
+        for day in range(300):
+            small.put_forecast("v1", "source", 19.07, 72.87, f"day-{day}", [day])
+        assert small.status()['forecasts'] <= 100
+        assert small.get_forecast("v1", "source", 19.07, 72.87, "day-299") == [299]
+        assert small.get_forecast("v1", "source", 19.07, 72.87, "day-0") is None
+    
+    print(f"cache: {status['forecasts']} forecasts, {status['elevations']} elevations, {status['bytes'] / 1024:.0f} KB")
+    print(f"{'first process (live)':<34}{cold_time * 1e6:>10.0f} µs/query  {cold_requests} elevation requests")
+    print(f"{'second process (shared cache)':<34}{warm_time * 1e6:>10.0f} µs/query  0 elevation requests")
+    print(f"{f'{readers} concurrent reader processes':<34}"
+          f"{max(seconds for _, seconds in results) * 1e6:>10.0f} µs/query  {concurrent_wall:.1f}s wall incl. startup")
+    print("✅ Other processes get identical answers from the cache without model or elevation work; "
+          "LRU keeps the table bounded")
+
+
+def bench_calendar(width=800, frames=60):
+    """GUI calendar strip: one batch for the whole window, and only visible cells painted while scrolling"""
+    import bulk
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+    import main
+    
+    app = QApplication.instance() or QApplication([])
+    predictor = backend.WeatherPredictor(train=False)
+    predictor.load_models(bulk.prepare_models())
+    predictor.elevation_provider = SyntheticTerrain()
+    predictor.forecast_matrix = None
+    location = ("Pune", "Maharashtra", "India")
+    
+    # The strip's batch, run the way the GUI's worker thread runs it
+    worker = main.CalendarForecastWorker(predictor, location)
+    received = []
+    worker.forecasts_ready.connect(lambda location, forecasts: received.append(forecasts))
+    start = time.perf_counter()
+    worker.start()
+    while not received:
+        app.processEvents()
+        worker.wait(5)
+    batch_time = time.perf_counter() - start
+    forecasts = received[0]
+    
+    # Clicking through days one by one, as the GUI did before
+    sample = forecasts[::30]
+    start = time.perf_counter()
+    clicked = [predictor.predict_single_day(*location, forecast.date) for forecast in sample]
+    click_time = (time.perf_counter() - start) / len(sample)
+    assert clicked == [forecast.to_dict() for forecast in sample]
+    
+    class CountingDelegate(main.ForecastCalendarDelegate):
+        painted = 0
+        
+        def paint(self, painter, option, index):
+            CountingDelegate.painted += 1
+            super().paint(painter, option, index)
+    
+    strip = main.ForecastCalendarStrip()
+    strip.setItemDelegate(CountingDelegate(strip))
+    strip.resize(width, strip.height())
+    strip.show()
+    start = time.perf_counter()
+    strip.calendar.set_forecasts(location, forecasts)
+    app.processEvents()
+    fill_time = time.perf_counter() - start
+    
+    # Scroll the whole strip, forcing a synchronous repaint per frame
+    scrollbar = strip.horizontalScrollBar()
+    CountingDelegate.painted = 0
+    start = time.perf_counter()
+    for frame in range(frames):
+        scrollbar.setValue(scrollbar.maximum() * (frame + 1) // frames)
+        strip.viewport().repaint()
+    frame_time = (time.perf_counter() - start) / frames
+    cells_per_frame = CountingDelegate.painted / frames
+    visible = width // main.ForecastCalendarDelegate.CELL_SIZE.width() + 2
+    assert len(forecasts) == (predictor.max_future_date - predictor.today).days + 1
+    assert cells_per_frame <= visible
+    strip.close()
+    
+    print(f"{len(forecasts)}-day window in one background batch: {batch_time * 1000:8.0f} ms")
+    print(f"the same days clicked one by one (est.):    {click_time * len(forecasts) * 1000:8.0f} ms "
+          f"({click_time * 1000:.0f} ms per click)")
+    print(f"model fill and first paint:                 {fill_time * 1000:8.1f} ms")
+    print(f"scroll frame:                               {frame_time * 1000:8.2f} ms, "
+          f"{cells_per_frame:.1f} of {len(forecasts)} cells painted")
+    print("✅ Calendar cells match predict_single_day; only visible cells are painted")
+
+
+def bench_live(debounce_ms=300, keystroke_ms=80):
+    """Live GUI predictions: debounced typing, stale results dropped, cache hits within a frame, loop lag"""
+    import bulk
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtCore import QObject, QTimer
+    from PyQt5.QtWidgets import QApplication
+    import main
+    
+    app = QApplication.instance() or QApplication([])
+    predictor = backend.WeatherPredictor(train=False)
+    predictor.load_models(bulk.prepare_models())
+    predictor.elevation_provider = SyntheticTerrain()
+    host = QObject()
+    host.weather_predictor = predictor
+    
+    class CountingLivePrediction(main.LivePrediction):
+        model_runs = 0
+        
+        def start_prediction(self):
+            idle = self.worker is None
+            super().start_prediction()
+            if idle and self.worker is not None:
+                CountingLivePrediction.model_runs += 1
+    
+    live = CountingLivePrediction(host, main.ForecastCalendarModel(), debounce_ms=debounce_ms)
+    delivered = []
+    live.prediction_ready.connect(lambda request, prediction: delivered.append((request, prediction)))
+    
+    # A 5 ms ticker measures how long the event loop is ever kept from running
+    ticks = [time.perf_counter()]
+    ticker = QTimer()
+    ticker.timeout.connect(lambda: ticks.append(time.perf_counter()))
+    ticker.start(5)
+    
+    def pump(seconds=None, until=None):
+        deadline = time.perf_counter() + (seconds if seconds is not None else 30)
+        while time.perf_counter() < deadline and not (until and until()):
+            app.processEvents()
+            time.sleep(0.001)
+    
+    dates = [(predictor.today + backend.timedelta(days=offset)).strftime("%Y-%m-%d") for offset in (20, 45)]
+    
+    # Typing a city name a key at a time reaches the model once, after the pause
+    city = "Nagpur"
+    for length in range(1, len(city) + 1):
+        live.request_prediction(city[:length], "Maharashtra", "India", dates[0])
+        pump(keystroke_ms / 1000)
+    pump(until=lambda: delivered)
+    typed = (city, "Maharashtra", "India", dates[0])
+    assert CountingLivePrediction.model_runs == 1 and [request for request, _ in delivered] == [typed]
+    
+    # A date edited while that prediction is in flight makes it stale; only the new date is shown
+    live.request_prediction("Nagpur", "Maharashtra", "Goa", dates[0])
+    pump(until=lambda: live.worker is not None)
+    live.request_prediction("Nagpur", "Maharashtra", "Goa", dates[1])
+    pump(until=lambda: len(delivered) == 2)
+    pump(0.1)
+    assert [request for request, _ in delivered[1:]] == [("Nagpur", "Maharashtra", "Goa", dates[1])]
+    
+    # Going back to an earlier input is answered inside the edit handler itself
+    live.request_prediction(*typed)
+    assert delivered[-1][0] == typed
+    ticker.stop()
+    
+    for request, prediction in delivered:
+        assert prediction == predictor.predict_single_day(*request)
+    assert main.LIVE_UPDATE_SECONDS.count('cache') + main.LIVE_UPDATE_SECONDS.count('model') == len(delivered)
+    summary = live.latency_summary()
+    lag = max(later - earlier for earlier, later in zip(ticks, ticks[1:])) - 0.005
+    
+    edits = len(city) + 3
+    print(f"{edits} edits -> {CountingLivePrediction.model_runs} model runs, {len(delivered)} updates shown, "
+          f"1 stale result dropped")
+    print(f"edit handler:        p50 {summary['edit'][0]:7.2f} ms   p95 {summary['edit'][1]:7.2f} ms")
+    print(f"update from cache:   p50 {summary['cache'][0]:7.2f} ms   p95 {summary['cache'][1]:7.2f} ms")
+    print(f"update from model:   p50 {summary['model'][0]:7.0f} ms   p95 {summary['model'][1]:7.0f} ms "
+          f"(includes the {debounce_ms} ms debounce)")
+    print(f"longest event loop stall: {lag * 1000:.1f} ms")
+    print("✅ Typing is debounced, stale predictions never reach the display, and repeats come from cache")
+
+
+def bench_features():
+    """Precomputed window rows against computing them per call; test_weather.py checks their parity with training"""
+    np = backend.np
+    predictor = bare_predictor()
+    predictor.create_daily_dataset()
+    predictor.prepare_features()
+    store = predictor.features()
+    today = store.start.astype(object)
+    annual = backend.FEATURE_COLUMNS.index('ANNUAL_TEMP')
+    
+    # The old serving proxy for ANNUAL_TEMP against what training used for the same years
+    window = store.features_for([today + backend.timedelta(days=offset) for offset in range(181)])
+    skew = np.abs(25 + 0.02 * (window[:, 0] - 2000) - window[:, annual]).max()
+    
+    runs = 200
+    window_dates = np.arange(store.start, store.start + 181)
+    start = time.perf_counter()
+    for _ in range(runs):
+        store.features_for(window_dates)
+    precomputed = (time.perf_counter() - start) / runs
+    start = time.perf_counter()
+    for _ in range(runs // 10):
+        store.compute(window_dates)
+    computed = (time.perf_counter() - start) / (runs // 10)
+    
+    print(f"old serving ANNUAL_TEMP proxy was off by up to {skew:.2f}°C from the training values")
+    print(f"181-day window features: precomputed {precomputed * 1e6:8.1f} µs, computed {computed * 1e6:8.1f} µs")
+
+
+# Compression settings compared by bench_compression
+COMPRESSION_PRESETS = [
+    ("float32", {'precision': 'float32'}),
+    ("float16", {'precision': 'float16'}),
+    ("float16, depth 12", {'max_depth': 12}),
+    ("float16, depth 10, 40 trees", {'max_depth': 10, 'trees': 40}),
+    ("float16, 256 leaves, 30 trees", {'max_leaves': 256, 'trees': 30}),
+]
+
+
+def bench_compression():
+    """Memory, latency and accuracy of compressed forests, and their round trip through save/load_models"""
+    import bulk
+    import compression
+    np = backend.np
+    
+    predictor = backend.WeatherPredictor(train=False)
+    predictor.load_models(bulk.prepare_models())
+    originals = {name: getattr(predictor, name) for name in backend.MODEL_NAMES}
+    version = predictor.model_version
+    _, (X_report, y_report) = compression.holdout(predictor)
+    dates = [predictor.today + backend.timedelta(days=offset) for offset in range(181)]
+    reference = predictor.predict_batch(dates)
+    
+    rows = [("original", compression.evaluate(predictor, X_report, y_report))]
+    drift = {}
+    for name, settings in COMPRESSION_PRESETS:
+        for model_name, model in originals.items():
+            setattr(predictor, model_name, model)
+        predictor.model_version = version
+        compression.compress_models(predictor, **settings)
+        rows.append((name, compression.evaluate(predictor, X_report, y_report)))
+        drift[name] = np.abs(predictor.predict_batch(dates)['temperature'] - reference['temperature']).max()
+    
+    # The last preset goes through the normal persistence path into a fresh predictor
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "compact.pkl")
+        predictor.save_models(path)
+        disk_mb = os.path.getsize(path) / 1e6
+        loaded = backend.WeatherPredictor(train=False)
+        assert loaded.load_models(path)
+    assert loaded.model_version == predictor.model_version != version
+    for key, values in predictor.predict_batch(dates).items():
+        assert np.array_equal(values, loaded.predict_batch(dates)[key])
+    assert drift["float32"] < 1e-3
+    
+    compression.print_report(rows)
+    print()
+    for name, _ in COMPRESSION_PRESETS:
+        print(f"{name:<32} max |Δ temperature| over 181 days: {drift[name]:.3f}°C")
+    print(f"✅ float32 storage matches the forests; '{COMPRESSION_PRESETS[-1][0]}' saved as {disk_mb:.1f} MB "
+          f"and reloaded through load_models with identical forecasts")
+
+
+def _profiled_predictions(count):
+    """Live single-day predictions for bench_profiling; prints their wall time in seconds"""
+    import bulk
+    predictor = backend.WeatherPredictor(train=False)
+    predictor.load_models(bulk.prepare_models())
+    predictor.elevation_provider = SyntheticTerrain()
+    predictor.forecast_matrix = None
+    predictor.result_cache = None
+    
+    cities = list(backend.CITY_COORDINATES)
+    start = time.perf_counter()
+    for i in range(count):
+        predictor.predict_single_day(cities[i % len(cities)].title(), "State", "India",
+                                     (predictor.today + backend.timedelta(days=i % 180)).strftime("%Y-%m-%d"))
+    print(time.perf_counter() - start)
+
+
+def bench_profiling(count=40):
+    """Cost of the profiling hooks disabled and enabled, and the validity of the files they write"""
+    import pstats
+    import metrics
+    import profiling
+    from collections import Counter
+    
+    # Disabled, a stage with no histogram is the function itself, and one with a histogram has a single
+    # wrapper for the metrics, not a profiling one stacked on a metrics one
+    assert not profiling.ENABLED, "run this benchmark without WEATHER_PROFILE set"
+    for name in ('create_daily_dataset', 'prepare_features', 'predict_range'):
+        assert not hasattr(getattr(backend.WeatherPredictor, name), '__wrapped__')
+    for name in ('train_models', 'get_elevations', 'build_features', 'predict_batch', 'predict_single_day'):
+        assert not hasattr(getattr(backend.WeatherPredictor, name).__wrapped__, '__wrapped__')
+    
+    def noop():
+        pass
+    histogram = metrics.Histogram('bench_stage_seconds', "Benchmark stage.", ['stage'])
+    timed = profiling.stage(noop, histogram=histogram, labels=('noop',))
+    calls = 200_000
+    costs = {}
+    for name, func, enabled in (("plain call", noop, False), ("@stage, metrics only", timed, False),
+                                ("@stage, profiling on", timed, True)):
+        profiling.ENABLED = enabled
+        try:
+            start = time.perf_counter()
+            for _ in range(calls):
+                func()
+            costs[name] = (time.perf_counter() - start) / calls
+        finally:
+            profiling.ENABLED = False
+    assert histogram.count('noop') == 2 * calls and profiling.STAGE_TIMES['bench_profiling.<locals>.noop'][0] == calls
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        runs = {}
+        for mode in ('', 'sample', 'all'):
+            env = dict(os.environ, WEATHER_PROFILE=mode, WEATHER_PROFILE_DIR=os.path.join(workdir, mode or "off"),
+                       PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+            result = subprocess.run([sys.executable, "-c", f"import benchmarks; benchmarks._profiled_predictions({count})"],
+                                    capture_output=True, text=True, env=env, check=True)
+            lines = result.stdout.strip().splitlines()
+            runs[mode] = float(next(line for line in lines if line.replace('.', '', 1).isdigit()))
+        stage_table = lines[lines.index(next(line for line in lines if line.startswith("stage"))):]
+        assert not os.path.exists(os.path.join(workdir, "off"))
+    
+        output = os.path.join(workdir, "all")
+        prof = next(os.path.join(output, name) for name in os.listdir(output) if name.endswith(".prof"))
+        stats = pstats.Stats(prof).stats
+        profiled_functions = {function for _, _, function in stats}
+        assert {'predict_single_day', 'predict_batch', 'build_features'} <= profiled_functions
+    
+        path = next(os.path.join(output, name) for name in os.listdir(output) if name.endswith(".speedscope.json"))
+        with open(path) as f:
+            speedscope = json.load(f)
+    frames = speedscope['shared']['frames']
+    main = next(profile for profile in speedscope['profiles'] if profile['name'] == "MainThread")
+    assert len(main['samples']) == len(main['weights']) and all(weight >= 0 for weight in main['weights'])
+    assert all(0 <= index < len(frames) for stack in main['samples'] for index in stack)
+    
+    # Time in each stage, and where the leaf frames under predict_batch spent it
+    inclusive = Counter()
+    leaves = Counter()
+    for stack, weight in zip(main['samples'], main['weights']):
+        names = [frames[index]['name'] for index in stack]
+        for name in set(names):
+            inclusive[name] += weight
+        if 'predict_batch' in names:
+            leaves[names[-1]] += weight
+    
+    for name, cost in costs.items():
+        print(f"{name:<28}{cost * 1e9:>8.0f} ns")
+    print(f"{count} live predictions: off {runs[''] * 1000:.0f} ms, sampled {runs['sample'] * 1000:.0f} ms, "
+          f"sampled + cProfile {runs['all'] * 1000:.0f} ms")
+    print()
+    print("\n".join(stage_table))
+    print()
+    print(f"sampled {len(main['samples'])} main-thread stacks; inclusive time of the predictor stages:")
+    for name in ('predict_single_day', 'get_elevations', 'predict_batch', 'build_features'):
+        print(f"  {name:<24}{inclusive[name] * 1000:>8.0f} ms")
+    print("hottest leaf frames under predict_batch:")
+    for name, seconds in leaves.most_common(5):
+        print(f"  {name:<24}{seconds * 1000:>8.0f} ms")
+    print(f"✅ Disabled profiling adds no wrapper beyond the metrics one; {os.path.basename(prof)} loads in pstats and "
+          f"{os.path.basename(path)} is a valid speedscope file")
+
+
+def _parse_exposition(text):
+    """Sample values of a text exposition, by the sample's name and labels as written"""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def bench_metrics(threads=4, increments=200_000):
+    """Cost of recording metrics, their totals under concurrent writers, and the exported predictor metrics"""
+    import bulk
+    import metrics
+    from urllib.request import urlopen
+    from elevation import BulkElevationResolver
+    from result_cache import SharedResultCache
+    
+    # Recording cost against a counter behind a lock, from one thread and from several at once
+    counter = metrics.Counter('bench_total', "Benchmark counter.")
+    histogram = metrics.Histogram('bench_seconds', "Benchmark histogram.")
+    lock = threading.Lock()
+    locked = [0]
+    
+    def locked_inc():
+        with lock:
+            locked[0] += 1
+    
+    recorders = {
+        'Counter.inc': counter.inc,
+        'Histogram.observe': lambda: histogram.observe(0.003),
+        'counter behind a Lock': locked_inc,
+    }
+    costs = {}
+    for name, record in recorders.items():
+        start = time.perf_counter()
+        for _ in range(increments):
+            record()
+        single = (time.perf_counter() - start) / increments
+    
+        def work():
+            for _ in range(increments):
+                record()
+        workers = [threading.Thread(target=work) for _ in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        costs[name] = (single, (time.perf_counter() - start) / (threads * increments))
+    assert counter.value() == locked[0] == increments * (threads + 1)
+    assert histogram.count() == increments * (threads + 1)
+    assert abs(histogram.sum() - 0.003 * increments * (threads + 1)) < 1e-3
+    
+    # A predictor run with shared cache hits, an elevation outage and a refused date
+    server, url = mock_elevation_server(latency=0)
+    outage, outage_url = mock_elevation_server(latency=0, fail_first=10 ** 9)
+    before = _parse_exposition(metrics.REGISTRY.exposition())
+    with tempfile.TemporaryDirectory() as workdir:
+        predictor = backend.WeatherPredictor(train=False)
+        predictor.load_models(bulk.prepare_models())
+        predictor.forecast_matrix = None
+        predictor.result_cache = SharedResultCache(os.path.join(workdir, "results.sqlite"))
+        predictor.elevation_provider = BulkElevationResolver(url)
+    
+        cities = list(backend.CITY_COORDINATES)[:5]
+        requests_ = [(city.title(), "State", "India", (predictor.today + backend.timedelta(days=day)).strftime("%Y-%m-%d"))
+                     for city in cities for day in (1, 2)]
+        for args in requests_ + requests_:
+            predictor.predict_single_day(*args)
+        predictor.predict_single_day("Delhi", "Delhi", "India", "2001-01-01")
+    
+        predictor.elevation_provider = BulkElevationResolver(outage_url, backoff=0.01)
+        unresolved = [(10 + i * 0.5, 80.0) for i in range(6)]
+        predictor.get_elevations(unresolved[:3])
+        predictor.get_elevations(unresolved[3:])
+    
+        scrape_server = metrics.serve(0)
+        with urlopen(f"http://127.0.0.1:{scrape_server.server_port}/metrics") as response:
+            content_type = response.headers['Content-Type']
+            scraped = response.read().decode()
+        scrape_server.shutdown()
+        path = os.path.join(workdir, "weather.prom")
+        metrics.dump(path)
+        with open(path) as f:
+            dumped = f.read()
+    server.shutdown()
+    outage.shutdown()
+    
+    after = _parse_exposition(scraped)
+    
+    def delta(name):
+        return after.get(name, 0) - before.get(name, 0)
+    assert content_type.startswith("text/plain; version=0.0.4")
+    assert delta('weather_predictions_total{source="live"}') == len(requests_)
+    assert delta('weather_predictions_total{source="cache"}') == len(requests_)
+    assert delta('weather_cache_lookups_total{cache="forecast",result="hit"}') == len(requests_)
+    assert delta('weather_cache_lookups_total{cache="forecast",result="miss"}') == len(requests_)
+    assert delta('weather_prediction_errors_total{reason="past_date"}') == 1
+    assert delta('weather_elevation_fallbacks_total') == len(unresolved)
+    assert delta('weather_elevation_requests_total{outcome="ok"}') == len(cities)
+    assert delta('weather_elevation_requests_total{outcome="failed"}') > 0
+    assert delta('weather_elevation_requests_total{outcome="short_circuited"}') > 0
+    assert delta('weather_stage_seconds_count{stage="predict_single_day"}') == 2 * len(requests_) + 1
+    assert delta('weather_model_seconds_count{operation="load"}') == 1
+    
+    # Buckets are cumulative and end at the count; the dump holds the same counters as the scrape
+    for name, value in after.items():
+        if name.startswith("weather_stage_seconds_count"):
+            labels = name[len("weather_stage_seconds_count{"):-1]
+            buckets = [after[f'weather_stage_seconds_bucket{{{labels},le="{bound}"}}']
+                       for bound in metrics.DEFAULT_BUCKETS + ('+Inf',)]
+            assert buckets == sorted(buckets) and buckets[-1] == value
+    dumped = _parse_exposition(dumped)
+    assert all(dumped[name] == value for name, value in after.items() if name.startswith("weather_"))
+    
+    print(f"{'':<24}{'1 thread':>12}{f'{threads} threads':>12}")
+    for name, (single, concurrent) in costs.items():
+        print(f"{name:<24}{single * 1e9:>10.0f}ns{concurrent * 1e9:>10.0f}ns")
+    print()
+    for name, value in after.items():
+        if name.startswith("weather_") and "_bucket" not in name and delta(name):
+            print(f"{name:<80}{delta(name):>10.4g}")
+    print(f"process_resident_memory_bytes {after['process_resident_memory_bytes'] / 2 ** 20:.0f} MB")
+    print(f"✅ {increments * (threads + 1):,} concurrent increments counted exactly; the scrape and the "
+          f"file dump agree and match the {2 * len(requests_) + 1} requests made")
+
+
+def _traced_peak_mb(func, *args):
+    """Peak traced allocation of func in MB above what was allocated before it, and its result"""
+    import tracemalloc
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    result = func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return (peak - baseline) / 2 ** 20, result
+
+
+def _startup_peak_rss(model_params):
+    """Peak RSS in MB at the start and after each startup stage of a fresh predictor"""
+    predictor = bare_predictor()
+    predictor.fingerprint = predictor.history_fingerprint()
+    peaks = [("start", _peak_rss_mb())]
+    predictor.create_daily_dataset()
+    peaks.append(("create_daily_dataset", _peak_rss_mb()))
+    predictor.prepare_features()
+    peaks.append(("prepare_features", _peak_rss_mb()))
+    predictor.train_models(model_params)
+    peaks.append(("train_models", _peak_rss_mb()))
+    return peaks
+
+
+def bench_memory(model_params=None):
+    """Allocation peaks of building the history and the training matrices, against the copies they replaced"""
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    from feature_store import to_dates, calendar_columns, lag_columns
+    np = backend.np
+    model_params = model_params or {'n_estimators': 20, 'max_depth': 15, 'random_state': 42}
+    predictor = bare_predictor()
+    
+    # The synthesis as columnar arrays, against the old list of one dict per day holding the same values
+    columnar, _ = _traced_peak_mb(predictor.create_daily_dataset)
+    base = predictor.daily_df.drop(columns='DAY_TYPE')
+    dict_rows, _ = _traced_peak_mb(lambda: pd.DataFrame(base.to_dict('records')))
+    
+    def chained_features(df):
+        dates = to_dates(df['YEAR'], df['MONTH'], df['DAY'])
+        df = df.assign(**calendar_columns(dates))
+        df = df.assign(**lag_columns(df))
+        return df.bfill().ffill()
+    raw = predictor.daily_df
+    chained, expected = _traced_peak_mb(chained_features, raw.copy())
+    single, _ = _traced_peak_mb(predictor.prepare_features)
+    pd.testing.assert_frame_equal(predictor.daily_df, expected)
+    
+    # The old DataFrame slice and five independent splits, plus the float32 copy the forests made of X_train
+    def five_splits(df):
+        X = df[backend.FEATURE_COLUMNS].to_numpy()
+        splits = [train_test_split(X, df[column], test_size=0.2, random_state=42)
+                  for column in ('TEMPERATURE', 'RAINFALL', 'HAS_RAIN', 'WIND_SPEED')]
+        splits.append(train_test_split(X, df['DAY_TYPE'].cat.codes, test_size=0.2, random_state=42))
+        return splits, np.asarray(splits[0][0], dtype=np.float32)
+    split_peak, (splits, converted) = _traced_peak_mb(five_splits, predictor.daily_df)
+    shared_peak, (X_train, X_test, y_train, y_test) = _traced_peak_mb(predictor.training_data, np.float32)
+    
+    # Same rows and targets as the old splits, so the forests train on exactly what they did
+    assert np.array_equal(X_train, converted) and X_train.flags['C_CONTIGUOUS']
+    assert np.array_equal(X_test, splits[0][1].astype(np.float32))
+    for (name, column), (_, _, y_fit, y_held) in zip(backend.MODEL_TARGETS.items(), splits):
+        assert np.array_equal(y_train[name], np.asarray(y_fit)) and np.array_equal(y_test[name], np.asarray(y_held))
+    
+    peaks = _in_fresh_process(_startup_peak_rss, model_params)
+    
+    print(f"{'allocation peak':<44}{'before':>10}{'after':>10}")
+    print(f"{'daily history synthesis':<44}{dict_rows:>8.1f}MB{columnar:>8.1f}MB")
+    print(f"{'prepare_features':<44}{chained:>8.1f}MB{single:>8.1f}MB")
+    print(f"{'training matrices and target splits':<44}{split_peak:>8.1f}MB{shared_peak:>8.1f}MB")
+    print()
+    print(f"fresh process peak RSS ({model_params['n_estimators']} trees):")
+    for (_, before), (stage, after) in zip(peaks, peaks[1:]):
+        print(f"  {stage:<24}{before:>8.0f} MB -> {after:>5.0f} MB")
+    print("✅ Same history, features, training rows and targets as the copies they replace")
+
+
+# Cold-import budgets for the CLI (backend) and GUI (main) entry modules, in milliseconds
+IMPORT_BUDGET_MS = {'backend': 250, 'main': 300}
+HEAVY_MODULES = ['pandas', 'sklearn', 'requests', 'dotenv', 'scipy']
+
+
+def _import_time(module, runs=5):
+    """Median cumulative `-X importtime` of module in fresh interpreters, and the heavy modules it pulled in"""
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    times = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                                capture_output=True, text=True, env=env, check=True)
+        line = next(line for line in result.stderr.splitlines() if line.split("|")[-1].strip() == module)
+        times.append(int(line.split("|")[1]) / 1000)
+    return sorted(times)[len(times) // 2], result.stdout.strip()
+
+
+def bench_startup():
+    """Cold import time of the CLI and GUI entry modules against their budgets"""
+    print(f"{'module':<10}{'import':>10}{'budget':>10}  heavy modules loaded")
+    for module, budget in IMPORT_BUDGET_MS.items():
+        elapsed, heavy = _import_time(module)
+        status = "✅" if elapsed <= budget else "❌"
+        print(f"{module:<10}{elapsed:>8.0f}ms{budget:>8}ms  {heavy or 'none'} {status}")
+
+
+BENCHMARKS = {
+    'history': bench_history_store,
+    'day_type': bench_day_type,
+    'rules': bench_rules,
+    'distribution': bench_distribution,
+    'backends': bench_model_backends,
+    'cities': bench_cities,
+    'elevation': bench_elevation,
+    'dem': bench_dem,
+    'async': bench_async,
+    'bulk': bench_bulk,
+    'stream': bench_stream,
+    'compact': bench_compact,
+    'startup': bench_startup,
+    'matrix': bench_matrix,
+    'cache': bench_cache,
+    'calendar': bench_calendar,
+    'live': bench_live,
+    'compression': bench_compression,
+    'features': bench_features,
+    'profiling': bench_profiling,
+    'metrics': bench_metrics,
+    'memory': bench_memory,
+}
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print("Available benchmarks: " + ", ".join(BENCHMARKS))
+        sys.exit(1)
+    BENCHMARKS[sys.argv[1]]()
@@ -0,0 +1,155 @@
+"""Non-interactive bulk forecasting.
+
+Streams a CSV or JSONL file of (city, state, country, date) jobs through a
+process pool and appends one JSON line per job to the output as chunks finish.
+Each worker loads the persisted models once, only a bounded window of chunks is
+in flight, and a rerun with the same output file skips the jobs already written.
+Run it from the project root with `python bulk.py jobs.csv forecasts.jsonl`.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import metrics
+from backend import WeatherPredictor
+
+JOB_FIELDS = ['city', 'state', 'country', 'date']
+
+BULK_FORECASTS = metrics.REGISTRY.counter(
+    'weather_bulk_forecasts_total', "Forecasts a bulk run wrote; its workers' own metrics are not exported.")
+
+# The predictor of this worker process, set up once by init_worker
+_predictor = None
+
+
+def read_jobs(path):
+    """Lazily yield (job_id, city, state, country, date); job_id is the 'id' field or the job's position"""
+    with open(path, newline='') as f:
+        if path.endswith(('.jsonl', '.ndjson')):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        for number, row in enumerate(rows, 1):
+            yield (str(row.get('id') or number), *(str(row[field]).strip() for field in JOB_FIELDS))
+
+
+def completed_ids(path):
+    """Ids already written to the output, dropping a partial last line left by an interrupted run"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+
+    complete = 0
+    with open(path, 'r+b') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                done.add(json.loads(line)['id'])
+            except (ValueError, KeyError):
+                break
+            complete += len(line)
+        f.truncate(complete)
+    return done
+
+
+def init_worker(model_path):
+    global _predictor
+    _predictor = WeatherPredictor(train=False)
+    _predictor.load_models(model_path)
+
+
+def forecast_chunk(jobs):
+    """Forecast one chunk of jobs with a single predict_batch call, one result dict per job in job order"""
+    results, valid = [], []
+    for job_id, city, state, country, date in jobs:
+        is_valid, result = _predictor.validate_date(date)
+        results.append({'id': job_id} if is_valid else {'id': job_id, 'error': result})
+        if is_valid:
+            valid.append((len(results) - 1, city, state, country, date, result))
+    if not valid:
+        return results
+
+    coordinates = [_predictor.get_coordinates(city, state, country) for _, city, state, country, _, _ in valid]
+    elevations = _predictor.get_elevations(coordinates)
+    forecast = _predictor.predict_batch([job[5] for job in valid], elevations)
+    for i, ((position, city, state, country, date, _), (lat, lng)) in enumerate(zip(valid, coordinates)):
+        results[position].update(
+            _predictor.forecast_record(forecast, i, city, state, country, date, lat, lng, float(elevations[i])))
+    return results
+
+
+def prepare_models(model_path=None):
+    """Path of persisted models for the current settings, training and saving them first if needed"""
+    predictor = WeatherPredictor(train=False)
+    model_path = model_path or predictor.model_path()
+    if not os.path.exists(model_path):
+        predictor.train_models()
+        predictor.save_models(model_path)
+    return model_path
+
+
+def run(jobs_path, output_path, model_path=None, workers=None, chunk_size=256):
+    """Forecast every job not yet in output_path, appending results as chunks complete"""
+    workers = workers or os.cpu_count()
+    model_path = prepare_models(model_path)
+    done = completed_ids(output_path)
+
+    # Only this parent exports metrics; the workers would all try to take the same port
+    metrics.start_exporters()
+    if done:
+        print(f"↩️  Resuming: {len(done)} jobs already in {output_path}")
+
+    pending = (job for job in read_jobs(jobs_path) if job[0] not in done)
+    chunks = iter(lambda: list(itertools.islice(pending, chunk_size)), [])
+
+    written = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(model_path,)) as pool, \
+            open(output_path, 'a') as out:
+        # A bounded window of chunks in flight keeps memory flat and the output in input order
+        window = deque()
+
+        def drain(limit):
+            nonlocal written
+            while len(window) > limit:
+                results = window.popleft().result()
+                out.writelines(json.dumps(result) + "\n" for result in results)
+                out.flush()
+                written += len(results)
+                BULK_FORECASTS.inc(amount=len(results))
+                rate = written / (time.perf_counter() - start)
+                print(f"\r⏳ {written} forecasts written ({rate:.0f}/s)", end="", file=sys.stderr, flush=True)
+
+        for chunk in chunks:
+            window.append(pool.submit(forecast_chunk, chunk))
+            drain(2 * workers - 1)
+        drain(0)
+
+    elapsed = time.perf_counter() - start
+    print(file=sys.stderr)
+    print(f"✅ {written} forecasts written to {output_path} in {elapsed:.1f}s "
+          f"({written / max(elapsed, 1e-9):.0f}/s), {len(done)} skipped as already done")
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Forecast a CSV or JSONL file of (city, state, country, date) jobs")
+    parser.add_argument("jobs", help="CSV with a header, or JSONL; an optional 'id' field names each job")
+    parser.add_argument("output", help="JSONL results, appended to and resumed from if it exists")
+    parser.add_argument("--model", help="persisted models to use (default: trained once and cached)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="jobs per model call")
+    args = parser.parse_args(argv)
+
+    run(args.jobs, args.output, args.model, args.workers, args.chunk_size)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
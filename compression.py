@@ -0,0 +1,266 @@
+"""Post-training compression of the random forest models for low-memory hosts.
+
+Each fitted forest is flattened into a few small arrays: trees are pruned to a
+depth and/or leaf budget, the trees that add least to the ensemble are dropped,
+and thresholds and leaf values are stored at reduced precision. The resulting
+CompactForest models replace the sklearn ones on a WeatherPredictor, so they are
+saved and loaded with save_models / load_models like any other model, e.g.
+`python compression.py --max-depth 12 --trees 40` then
+`python bulk.py jobs.csv out.jsonl --model <printed path>`.
+"""
+import os
+import sys
+import time
+import heapq
+import argparse
+
+import numpy as np
+
+import backend
+
+PRECISIONS = {'float32': np.float32, 'float16': np.float16}
+
+
+class CompactForest:
+    """A fitted random forest as flat arrays; nodes are laid out breadth-first with siblings adjacent.
+
+    child[n] >= 0 is the left child of node n (the right one is child[n] + 1); child[n] < 0 marks a
+    leaf whose values are row -child[n] - 1 of `values`.
+    """
+
+    def __init__(self, feature, threshold, child, roots, values, depth, classes=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.child = child
+        self.roots = roots
+        self.values = values
+        self.depth = depth
+        if classes is not None:
+            self.classes_ = classes
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in (self.feature, self.threshold, self.child, self.roots, self.values))
+
+    def leaves(self, X):
+        """Leaf row reached in every tree, shape (rows, trees)"""
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.depth):
+            child = self.child[node]
+            inner = child >= 0
+            if not inner.any():
+                break
+            go_right = X[rows, self.feature[node]] > self.threshold[node]
+            node = np.where(inner, child + go_right, node)
+        return -self.child[node] - 1
+
+    def members(self, X):
+        """Every tree's prediction, shape (rows, trees), as RandomForestBackend.members gives it"""
+        return self.values[self.leaves(X), 0].astype(np.float64)
+
+    def predict_proba(self, X):
+        return self.values[self.leaves(X)].astype(np.float64).mean(axis=1)
+
+    def predict(self, X):
+        if hasattr(self, 'classes_'):
+            return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+        return self.members(X).mean(axis=1)
+
+
+def floor_to(values, dtype):
+    """Cast to dtype rounding toward -inf, so `x <= threshold` splits float32 inputs as before"""
+    cast = values.astype(dtype)
+    too_high = cast.astype(np.float64) > values
+    cast[too_high] = np.nextafter(cast[too_high], dtype(-np.inf))
+    return cast
+
+
+def leaf_budget(tree, max_leaves, max_depth):
+    """Nodes to keep splitting so the tree has at most max_leaves leaves, largest impurity decrease first"""
+    left, right = tree.children_left, tree.children_right
+    weighted = tree.weighted_n_node_samples * tree.impurity
+    expand = np.zeros(tree.node_count, dtype=bool)
+    heap = [(0.0, 0, 0)]
+    leaves = 1
+    while heap and leaves < max_leaves:
+        _, node, depth = heapq.heappop(heap)
+        if left[node] == -1 or depth >= max_depth:
+            continue
+        expand[node] = True
+        leaves += 1
+        for child in (left[node], right[node]):
+            if left[child] != -1:
+                gain = weighted[child] - weighted[left[child]] - weighted[right[child]]
+                heapq.heappush(heap, (-gain, child, depth + 1))
+    return expand
+
+
+def flatten_tree(tree, max_depth, max_leaves, classifier):
+    """(feature, threshold, child, leaf values) of one pruned tree in breadth-first order"""
+    left, right = tree.children_left, tree.children_right
+    expand = left != -1
+    if max_leaves is not None:
+        expand &= leaf_budget(tree, max_leaves, max_depth)
+
+    order, split, level, depth = [], [], np.array([0]), 0
+    while len(level):
+        inner = expand[level] & (depth < max_depth)
+        order.append(level)
+        split.append(inner)
+        level = np.stack([left[level[inner]], right[level[inner]]], axis=1).ravel()
+        depth += 1
+    order, inner = np.concatenate(order), np.concatenate(split)
+    position = np.empty(tree.node_count, dtype=np.int64)
+    position[order] = np.arange(len(order))
+
+    values = tree.value[order[~inner], 0, :]
+    if classifier:
+        values = values / values.sum(axis=1, keepdims=True)
+    child = np.where(inner, position[left[order]], 0)
+    feature = np.where(inner, tree.feature[order], 0)
+    return feature, tree.threshold[order], child, inner, values, depth - 1
+
+
+def compact_forest(forest, trees=None, max_depth=None, max_leaves=None, precision='float16'):
+    """A CompactForest of forest's estimators (all, or the given indices) pruned to the budgets"""
+    dtype = PRECISIONS[precision]
+    classifier = hasattr(forest, 'classes_')
+    estimators = [forest.estimators_[i] for i in (range(len(forest.estimators_)) if trees is None else trees)]
+    parts = [flatten_tree(estimator.tree_, max_depth or np.inf, max_leaves, classifier) for estimator in estimators]
+
+    roots = np.cumsum([0] + [len(feature) for feature, *_ in parts[:-1]]).astype(np.int32)
+    leaf_offsets = np.cumsum([0] + [len(values) for *_, values, _ in parts[:-1]])
+    child = np.concatenate([
+        np.where(inner, child + root, -(np.cumsum(~inner) - 1 + leaf_offset) - 1)
+        for (_, _, child, inner, _, _), root, leaf_offset in zip(parts, roots, leaf_offsets)
+    ]).astype(np.int32)
+    return CompactForest(
+        feature=np.concatenate([feature for feature, *_ in parts]).astype(np.int8),
+        threshold=floor_to(np.concatenate([threshold for _, threshold, *_ in parts]), dtype),
+        child=child,
+        roots=roots,
+        values=np.concatenate([values for *_, values, _ in parts]).astype(dtype),
+        depth=max(depth for *_, depth in parts),
+        classes=forest.classes_ if classifier else None,
+    )
+
+
+def select_trees(members, target, trees):
+    """Indices of the trees to keep: the tree whose removal raises the ensemble's squared error
+    least is dropped until `trees` remain. members is (rows, trees, outputs)."""
+    keep = list(range(members.shape[1]))
+    total = members.sum(axis=1)
+    while len(keep) > trees:
+        without = (total[:, None, :] - members[:, keep, :]) / (len(keep) - 1)
+        errors = ((without - target[:, None, :]) ** 2).mean(axis=(0, 2))
+        total -= members[:, keep.pop(int(np.argmin(errors))), :]
+    return keep
+
+
+def holdout(predictor):
+    """Features and targets of the rows train_models held out, split into a selection and a report half"""
+    _, X, _, targets = predictor.training_data()
+    half = len(X) // 2
+    return ((X[:half], {name: y[:half] for name, y in targets.items()}),
+            (X[half:], {name: y[half:] for name, y in targets.items()}))
+
+
+def compress_models(predictor, max_depth=None, max_leaves=None, trees=None, precision='float16'):
+    """Replace the predictor's forests with CompactForests in place and give them their own model_version"""
+    if predictor.model_backend.name != 'random_forest':
+        raise ValueError(f"Only random_forest models can be compressed, not {predictor.model_backend.name}")
+    (X_select, y_select), _ = holdout(predictor)
+
+    for name in backend.MODEL_NAMES:
+        forest = getattr(predictor, name)
+        selected = None
+        if trees is not None and trees < len(forest.estimators_):
+            # Rank the pruned trees, so the ones kept are the best after pruning, not before
+            pruned = compact_forest(forest, None, max_depth, max_leaves, precision)
+            if hasattr(forest, 'classes_'):
+                members = pruned.values[pruned.leaves(X_select)].astype(np.float64)
+                target = (y_select[name][:, None] == forest.classes_[None, :]).astype(np.float64)
+            else:
+                members = pruned.members(X_select)[:, :, None]
+                target = y_select[name][:, None].astype(np.float64)
+            selected = select_trees(members, target, trees)
+        setattr(predictor, name, compact_forest(forest, selected, max_depth, max_leaves, precision))
+
+    settings = {'max_depth': max_depth, 'max_leaves': max_leaves, 'trees': trees, 'precision': precision}
+    predictor.model_version = f"{predictor.model_version}-compact-{predictor.history_key(settings)}"
+    return predictor
+
+
+def model_bytes(model):
+    """In-memory size of a fitted forest's node and value arrays"""
+    if isinstance(model, CompactForest):
+        return model.nbytes
+    return sum(estimator.tree_.__getstate__()['nodes'].nbytes + estimator.tree_.value.nbytes
+               for estimator in model.estimators_)
+
+
+def evaluate(predictor, X, targets):
+    """Holdout errors and accuracies of the five models, with their total size and the latency of
+    predict_batch over the whole forecast window"""
+    dates = [predictor.today + backend.timedelta(days=offset) for offset in range(181)]
+    predictor.predict_batch(dates[:1])
+    start = time.perf_counter()
+    predictor.predict_batch(dates)
+    latency = time.perf_counter() - start
+    return {
+        'megabytes': sum(model_bytes(getattr(predictor, name)) for name in backend.MODEL_NAMES) / 1e6,
+        'latency_ms': latency * 1000,
+        'temp_mae': np.abs(predictor.temp_model.predict(X) - targets['temp_model']).mean(),
+        'rain_mae': np.abs(predictor.rain_model.predict(X) - targets['rain_model']).mean(),
+        'wind_mae': np.abs(predictor.wind_model.predict(X) - targets['wind_model']).mean(),
+        'rain_accuracy': (predictor.rain_class_model.predict(X) == targets['rain_class_model']).mean(),
+        'day_type_accuracy': (predictor.day_type_model.predict(X) == targets['day_type_model']).mean(),
+    }
+
+
+def print_report(rows):
+    print(f"{'models':<28}{'MB':>8}{'181 days':>10}{'temp MAE':>10}{'rain MAE':>10}{'wind MAE':>10}"
+          f"{'rain acc':>10}{'day acc':>10}")
+    for name, report in rows:
+        print(f"{name:<28}{report['megabytes']:>8.1f}{report['latency_ms']:>8.0f}ms{report['temp_mae']:>10.3f}"
+              f"{report['rain_mae']:>10.3f}{report['wind_mae']:>10.3f}{report['rain_accuracy']:>10.2%}"
+              f"{report['day_type_accuracy']:>10.2%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compress the persisted random forest models")
+    parser.add_argument("--model", help="persisted models to compress (default: the ones for the current settings)")
+    parser.add_argument("--max-depth", type=int, default=None, help="prune every tree to this depth")
+    parser.add_argument("--max-leaves", type=int, default=None, help="prune every tree to this many leaves")
+    parser.add_argument("--trees", type=int, default=None, help="keep this many trees per forest")
+    parser.add_argument("--precision", choices=list(PRECISIONS), default='float16',
+                        help="storage type of thresholds and leaf values")
+    parser.add_argument("--output", help="where to save the compressed models (default: next to the originals)")
+    args = parser.parse_args(argv)
+
+    predictor = backend.WeatherPredictor(train=False)
+    model_path = args.model or predictor.model_path()
+    if not predictor.load_models(model_path):
+        predictor.train_models()
+        predictor.save_models(model_path)
+    _, (X_report, y_report) = holdout(predictor)
+    original = evaluate(predictor, X_report, y_report)
+
+    compress_models(predictor, args.max_depth, args.max_leaves, args.trees, args.precision)
+    compressed = evaluate(predictor, X_report, y_report)
+    output = args.output or os.path.join(backend.modeldir, f"{predictor.model_version}.pkl")
+    predictor.save_models(output)
+
+    print_report([("original", original), ("compressed", compressed)])
+    print(f"✅ Compressed models saved to {output} ({os.path.getsize(output) / 1e6:.1f} MB on disk, "
+          f"was {os.path.getsize(model_path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
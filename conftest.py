@@ -0,0 +1,175 @@
+"""Fixtures and stand-ins shared by test_weather.py and benchmarks.py.
+
+The builders here are plain functions, so the benchmarks can use them outside
+pytest: a predictor with its CSV sources but nothing built, boundary-biased
+inputs for the rule tables, synthetic SRTM tiles and a local mock of the
+elevation service.
+"""
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+import pytest
+
+import backend
+
+
+class SyntheticTerrain:
+    """Offline stand-in for the elevation service"""
+
+    def lookup(self, lats, lngs):
+        return np.abs(np.asarray(lats) * 131 + np.asarray(lngs) * 17) % 2500
+
+
+def plane(lats, lngs):
+    """Elevation of the terrain write_plane_tile samples"""
+    return 3600 * (np.asarray(lats) - 19) + 1200 * (np.asarray(lngs) - 72)
+
+
+def write_plane_tile(tile_dir, lat, lng, samples=1201):
+    """SRTM tile of plane(), which bilinear interpolation reproduces exactly"""
+    from elevation import DEMElevationProvider
+    step = 1 / (samples - 1)
+    lat_grid = lat + 1 - np.arange(samples) * step
+    lng_grid = lng + np.arange(samples) * step
+    np.round(plane(lat_grid[:, None], lng_grid[None, :])).astype('>i2').tofile(
+        os.path.join(tile_dir, DEMElevationProvider.tile_name(lat, lng)))
+
+
+def bare_predictor():
+    """WeatherPredictor with its sources loaded but no history or models built"""
+    import pandas as pd
+    predictor = backend.WeatherPredictor.__new__(backend.WeatherPredictor)
+    predictor.rainfall_df = pd.read_csv(backend.raindata)
+    predictor.temperature_df = pd.read_csv(backend.tempdata)
+    predictor.current_year = 2025
+    predictor.seed = 42
+    predictor.gap_fill = 'recent_mean'
+    return predictor
+
+
+def rule_inputs(rng, rows, rules):
+    """Random inputs concentrated on and around every threshold in a rule table"""
+    inputs = {}
+    for name in {name for thresholds, *_ in rules for name in thresholds}:
+        thresholds = np.array([t[name] for t, *_ in rules if name in t], dtype=float)
+        edges = np.concatenate([thresholds, np.nextafter(thresholds, -np.inf),
+                                np.nextafter(thresholds, np.inf), [np.nan, -1.0]])
+        uniform = rng.uniform(-5, thresholds.max() * 1.5, rows)
+        inputs[name] = np.where(rng.random(rows) < 0.5, rng.choice(edges, rows), uniform)
+    return inputs
+
+
+class MockElevationHandler(BaseHTTPRequestHandler):
+    """Local open-elevation stand-in with configurable latency and failures"""
+    latency = 0.02
+    fail_first = 0
+    requests_seen = 0
+
+    def elevation(self, lat, lng):
+        return round(abs(lat * 131 + lng * 17) % 2500, 1)
+
+    def reply(self, locations):
+        type(self).requests_seen += 1
+        time.sleep(self.latency)
+        if self.requests_seen <= self.fail_first:
+            self.send_response(503)
+            self.end_headers()
+            return
+        body = json.dumps({'results': [{'latitude': lat, 'longitude': lng, 'elevation': self.elevation(lat, lng)}
+                                       for lat, lng in locations]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        self.reply([tuple(map(float, pair.split(','))) for pair in query['locations'][0].split('|')])
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.reply([(location['latitude'], location['longitude']) for location in payload['locations']])
+
+    def log_message(self, *args):
+        pass
+
+
+def mock_elevation_server(**behaviour):
+    """Start a mock elevation service on a free local port, returning (server, url)"""
+    handler = type('Handler', (MockElevationHandler,), dict(behaviour, requests_seen=0))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/api/v1/lookup"
+
+
+@pytest.fixture(scope="module")
+def rule_predictor():
+    """A WeatherPredictor with no data, for the rule functions that do not need any"""
+    return backend.WeatherPredictor.__new__(backend.WeatherPredictor)
+
+
+@pytest.fixture(scope="module")
+def history_predictor():
+    """A WeatherPredictor with its daily history built from the CSV sources, but no models"""
+    if not os.path.exists(backend.raindata):
+        pytest.skip(f"{backend.raindata} not found; run from the project root")
+    predictor = bare_predictor()
+    predictor.create_daily_dataset()
+    predictor.prepare_features()
+    return predictor
+
+
+@pytest.fixture(scope="module")
+def history_store(history_predictor, tmp_path_factory):
+    """The shared history saved as a columnar store, under the predictor's fingerprint"""
+    path = str(tmp_path_factory.mktemp("history"))
+    backend.save_history(history_predictor.daily_df, path, fingerprint=history_predictor.history_fingerprint())
+    return path
+
+
+@pytest.fixture
+def elevation_service():
+    """Starts mock elevation services, e.g. `server, url = elevation_service(fail_first=2)`, and stops them after"""
+    servers = []
+
+    def start(**behaviour):
+        server, url = mock_elevation_server(**dict({'latency': 0}, **behaviour))
+        servers.append(server)
+        return server, url
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+@pytest.fixture
+def plane_tiles(tmp_path):
+    """Directory holding the two adjacent plane tiles N19E072 and N19E073"""
+    write_plane_tile(str(tmp_path), 19, 72)
+    write_plane_tile(str(tmp_path), 19, 73)
+    return str(tmp_path)
+
+
+@pytest.fixture
+def locations():
+    rng = np.random.default_rng(0)
+    return rng.uniform(8, 32, 250).round(4), rng.uniform(68, 96, 250).round(4)
+
+
+@pytest.fixture(scope="module")
+def trained_predictor(history_predictor):
+    """Small forests trained on the shared history, serving from SyntheticTerrain with no shared cache"""
+    predictor = bare_predictor()
+    predictor.daily_df = history_predictor.daily_df
+    predictor.train_models(model_params={'n_estimators': 5, 'max_depth': 8, 'random_state': 42},
+                           model_backend='random_forest')
+    predictor.today = backend.datetime.now().date()
+    predictor.max_future_date = predictor.today + backend.timedelta(days=180)
+    predictor.elevation_provider = SyntheticTerrain()
+    predictor.result_cache = None
+    return predictor
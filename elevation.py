@@ -0,0 +1,235 @@
+"""Elevation providers used by WeatherPredictor.
+
+A provider exposes `lookup(lats, lngs)`, returning one elevation in metres per
+location and NaN where it could not resolve one. BulkElevationResolver asks the
+open-elevation service; DEMElevationProvider reads local SRTM tiles offline.
+"""
+import os
+import time
+import asyncio
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+ELEVATION_REQUESTS = metrics.REGISTRY.counter(
+    'weather_elevation_requests_total', "Elevation service requests by outcome; short_circuited ones never left "
+    "the process because the circuit breaker was open.", ['outcome'])
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures and fails fast until `reset_after` seconds pass"""
+
+    def __init__(self, threshold=3, reset_after=60):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        with self.lock:
+            if self.opened_at is None:
+                return False
+            if time.monotonic() - self.opened_at >= self.reset_after:
+                # Half-open: let the next request probe the service
+                self.opened_at = None
+                self.failures = self.threshold - 1
+                return False
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class BulkElevationResolver:
+    """Resolves many locations per request against the open-elevation POST endpoint"""
+
+    def __init__(self, url, chunk_size=100, max_workers=4, retries=3, backoff=0.5, timeout=10, breaker=None):
+        self.url = url
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        # Identifies where elevations come from, so precomputed forecasts can tell if they still apply
+        self.source = url
+        # Network lookups are worth keeping in the shared result cache
+        self.remote = True
+
+        # One pooled session keeps TCP+TLS connections alive across requests
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def chunk(self, lats, lngs):
+        """The requested locations and their de-duplicated request chunks"""
+        locations = list(zip(np.asarray(lats, dtype=float).tolist(), np.asarray(lngs, dtype=float).tolist()))
+        unique = list(dict.fromkeys(locations))
+        return locations, [unique[i:i + self.chunk_size] for i in range(0, len(unique), self.chunk_size)]
+
+    @staticmethod
+    def assemble(locations, chunks, results):
+        """Map each chunk's elevations back onto the requested locations"""
+        resolved = {}
+        for chunk, elevations in zip(chunks, results):
+            resolved.update(zip(chunk, elevations))
+        return np.array([resolved[location] for location in locations], dtype=float)
+
+    @staticmethod
+    def payload(chunk):
+        return {'locations': [{'latitude': lat, 'longitude': lng} for lat, lng in chunk]}
+
+    def retry_delay(self, attempt):
+        """Exponential backoff with jitter, or None when the chunk should give up"""
+        if attempt >= self.retries or self.breaker.is_open:
+            return None
+        return self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    def lookup(self, lats, lngs):
+        """Elevation per location, NaN where the service could not resolve it"""
+        locations, chunks = self.chunk(lats, lngs)
+        if len(chunks) <= 1:
+            results = [self.post_chunk(chunk) for chunk in chunks]
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                results = list(executor.map(self.post_chunk, chunks))
+        return self.assemble(locations, chunks, results)
+
+    def post_chunk(self, chunk):
+        """POST one chunk of locations, retrying with exponential backoff while the breaker is closed"""
+        for attempt in range(self.retries + 1):
+            if self.breaker.is_open:
+                ELEVATION_REQUESTS.inc('short_circuited')
+                break
+            try:
+                response = self.session.post(self.url, json=self.payload(chunk), timeout=self.timeout)
+                if response.status_code == 200:
+                    results = response.json()['results']
+                    self.breaker.record_success()
+                    ELEVATION_REQUESTS.inc('ok')
+                    return [result['elevation'] for result in results]
+            except (requests.RequestException, ValueError, KeyError):
+                pass
+            ELEVATION_REQUESTS.inc('failed')
+            self.breaker.record_failure()
+            delay = self.retry_delay(attempt)
+            if delay is None:
+                break
+            time.sleep(delay)
+        return [np.nan] * len(chunk)
+
+    async def lookup_async(self, lats, lngs, session):
+        """lookup() over an aiohttp session, awaiting every chunk concurrently on the event loop"""
+        locations, chunks = self.chunk(lats, lngs)
+        results = await asyncio.gather(*(self.post_chunk_async(chunk, session) for chunk in chunks))
+        return self.assemble(locations, chunks, results)
+
+    async def post_chunk_async(self, chunk, session):
+        """post_chunk() without blocking the event loop; shares the retry policy and breaker"""
+        import aiohttp
+
+        for attempt in range(self.retries + 1):
+            if self.breaker.is_open:
+                ELEVATION_REQUESTS.inc('short_circuited')
+                break
+            try:
+                async with session.post(self.url, json=self.payload(chunk),
+                                        timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                    if response.status == 200:
+                        results = (await response.json())['results']
+                        self.breaker.record_success()
+                        ELEVATION_REQUESTS.inc('ok')
+                        return [result['elevation'] for result in results]
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, KeyError):
+                pass
+            ELEVATION_REQUESTS.inc('failed')
+            self.breaker.record_failure()
+            delay = self.retry_delay(attempt)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+        return [np.nan] * len(chunk)
+
+
+class DEMElevationProvider:
+    """Offline elevations bilinearly interpolated from SRTM .hgt tiles in `tile_dir`"""
+    # SRTM marks missing samples with this value
+    VOID = -32768
+
+    def __init__(self, tile_dir):
+        self.tile_dir = tile_dir
+        self.tiles = {}
+        self.source = f"dem:{os.path.abspath(tile_dir)}"
+        # Reading a tile is cheaper than a shared cache lookup
+        self.remote = False
+
+    @staticmethod
+    def tile_name(lat, lng):
+        """SRTM file name of the 1x1 degree tile whose south-west corner is (lat, lng)"""
+        return f"{'N' if lat >= 0 else 'S'}{abs(lat):02d}{'E' if lng >= 0 else 'W'}{abs(lng):03d}.hgt"
+
+    def tile(self, lat, lng):
+        """Memory-mapped samples of one tile (north row first), or None if it is not on disk"""
+        key = (lat, lng)
+        if key not in self.tiles:
+            path = os.path.join(self.tile_dir, self.tile_name(lat, lng))
+            if os.path.exists(path):
+                # 1201x1201 for 3 arc-second tiles, 3601x3601 for 1 arc-second
+                samples = int(round((os.path.getsize(path) // 2) ** 0.5))
+                # Plain ndarray view of the mapping: same pages, without memmap's per-index overhead
+                self.tiles[key] = np.memmap(path, dtype='>i2', mode='r', shape=(samples, samples)).view(np.ndarray)
+            else:
+                self.tiles[key] = None
+        return self.tiles[key]
+
+    def lookup(self, lats, lngs):
+        """Elevation per location, NaN outside the available tiles or next to void samples"""
+        lats = np.asarray(lats, dtype=float)
+        lngs = np.asarray(lngs, dtype=float)
+        elevations = np.full(lats.shape, np.nan)
+        if lats.size == 0:
+            return elevations
+
+        # One integer key per 1x1 degree tile, so locations group with a 1-D unique
+        lat0s, lng0s = np.floor(lats).astype(int), np.floor(lngs).astype(int)
+        keys, groups = np.unique(lat0s * 1000 + lng0s, return_inverse=True)
+        for group, key in enumerate(keys):
+            idx = np.flatnonzero(groups == group) if len(keys) > 1 else np.arange(lats.size)
+            lat0, lng0 = int(lat0s[idx[0]]), int(lng0s[idx[0]])
+            data = self.tile(lat0, lng0)
+            if data is None:
+                continue
+            last = data.shape[0] - 1
+
+            # Fractional sample position, rows counted south from the tile's northern edge
+            row = (lat0 + 1 - lats[idx]) * last
+            col = (lngs[idx] - lng0) * last
+            r0 = np.minimum(row.astype(int), last - 1)
+            c0 = np.minimum(col.astype(int), last - 1)
+            dr, dc = row - r0, col - c0
+
+            # Gather the four surrounding samples in one flat take
+            top_left = r0 * (last + 1) + c0
+            corners = data.take(top_left + np.array([[0], [1], [last + 1], [last + 2]])).astype(float)
+            corners[corners == self.VOID] = np.nan
+            v00, v01, v10, v11 = corners
+            elevations[idx] = (v00 * (1 - dr) * (1 - dc) + v01 * (1 - dr) * dc
+                               + v10 * dr * (1 - dc) + v11 * dr * dc)
+        return elevations
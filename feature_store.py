@@ -0,0 +1,112 @@
+"""Model features, defined once for training and for serving.
+
+prepare_features adds the training columns to the daily history from
+calendar_columns() and lag_columns(). At prediction time a FeatureStore builds
+the same FEATURE_COLUMNS for any date: the calendar terms from the same
+calendar_columns(), the lag inputs as the training lag columns of the same day
+one year earlier, and ANNUAL_TEMP as the seasonal table's annual mean for the
+year, which is what create_daily_dataset stores. Rows for every date of the
+forecast window are computed once, so serving a date is a table read.
+"""
+import numpy as np
+
+from backend import FEATURE_COLUMNS
+
+CALENDAR_COLUMNS = FEATURE_COLUMNS[:9]
+LAG_COLUMNS = ['TEMP_LAG1', 'RAIN_LAG1', 'WIND_LAG1', 'TEMP_ROLL7', 'RAIN_ROLL7']
+
+# Lag inputs for dates with no history to take them from
+DEFAULT_LAGS = (25, 0, 10, 25, 0)
+
+
+def to_dates(years, months, days):
+    """datetime64[D] array from year, month and day arrays"""
+    months = (np.asarray(years) - 1970).astype('datetime64[Y]').astype('datetime64[M]') + (np.asarray(months) - 1)
+    return months.astype('datetime64[D]') + (np.asarray(days) - 1)
+
+
+def calendar_columns(dates):
+    """The calendar features of datetime64[D] dates, by column name"""
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    years = dates.astype('datetime64[Y]').astype(np.int64) + 1970
+    months = dates.astype('datetime64[M]').astype(np.int64) % 12 + 1
+    days = (dates - dates.astype('datetime64[M]')).astype(np.int64) + 1
+    day_of_year = (dates - dates.astype('datetime64[Y]')).astype(np.int64) + 1
+    return {
+        'YEAR': years,
+        'MONTH': months,
+        'DAY': days,
+        'DAY_OF_YEAR': day_of_year,
+        'YEAR_TREND': years - 1900,
+        'DAY_SIN': np.sin(2 * np.pi * day_of_year / 365),
+        'DAY_COS': np.cos(2 * np.pi * day_of_year / 365),
+        'MONTH_SIN': np.sin(2 * np.pi * months / 12),
+        'MONTH_COS': np.cos(2 * np.pi * months / 12),
+    }
+
+
+def lag_columns(history):
+    """Previous-day and trailing 7-day weather of each row of a chronological daily history"""
+    return {
+        'TEMP_LAG1': history['TEMPERATURE'].shift(1),
+        'RAIN_LAG1': history['RAINFALL'].shift(1),
+        'WIND_LAG1': history['WIND_SPEED'].shift(1),
+        'TEMP_ROLL7': history['TEMPERATURE'].rolling(7, min_periods=1).mean(),
+        'RAIN_ROLL7': history['RAINFALL'].rolling(7, min_periods=1).mean(),
+    }
+
+
+class FeatureStore:
+    """Serving-side FEATURE_COLUMNS rows, precomputed for every date from start to end"""
+
+    def __init__(self, history, annual_temperature, start, end):
+        self.lag_table = history.set_index(['YEAR', 'MONTH', 'DAY'])[LAG_COLUMNS]
+        self.annual_temperature = annual_temperature
+        self.start = np.datetime64(start, 'D')
+        self.window = self.compute(np.arange(self.start, np.datetime64(end, 'D') + 1))
+
+    def compute(self, dates):
+        """Feature rows for datetime64[D] dates, in FEATURE_COLUMNS order"""
+        calendar = calendar_columns(dates)
+        years = calendar['YEAR']
+        annual = self.annual_temperature.reindex(years, method='nearest').to_numpy()
+        return np.column_stack([*(calendar[column] for column in CALENDAR_COLUMNS),
+                                self.lags(years, calendar['MONTH'], calendar['DAY']), annual])
+
+    def lags(self, years, months, days):
+        """The training lag columns of the same day one year earlier"""
+        import pandas as pd
+        lags = self.lag_table.reindex(pd.MultiIndex.from_arrays([years - 1, months, days])).to_numpy()
+
+        missing = np.flatnonzero(np.isnan(lags).any(axis=1))
+        if len(missing):
+            history = self.lag_table.index
+            history_years = history.get_level_values('YEAR').to_numpy()
+            history_months = history.get_level_values('MONTH').to_numpy()
+            history_days = history.get_level_values('DAY').to_numpy()
+            history_values = self.lag_table.to_numpy()
+            for i in missing:
+                # Use average of similar dates
+                similar = ((history_months == months[i]) & (history_days == days[i]) &
+                           (history_years >= years[i] - 5))
+                lags[i] = history_values[similar].mean(axis=0) if similar.any() else DEFAULT_LAGS
+        return lags
+
+    def features_for(self, dates, locations=None):
+        """FEATURE_COLUMNS rows for dates, read from the precomputed window where they fall inside it.
+
+        No feature depends on the location yet (elevation adjusts the predictions instead), so with
+        locations the rows are only repeated per location, location-major as predict_chunks lays out.
+        """
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        offsets = (dates - self.start).astype(np.int64)
+        inside = (offsets >= 0) & (offsets < len(self.window))
+        if inside.all():
+            rows = self.window[offsets]
+        else:
+            rows = np.empty((len(dates), len(FEATURE_COLUMNS)))
+            rows[inside] = self.window[offsets[inside]]
+            rows[~inside] = self.compute(dates[~inside])
+        if locations is not None:
+            rows = np.tile(rows, (len(locations), 1))
+        return rows
@@ -0,0 +1,152 @@
+"""Precomputed forecasts for every known city and forecastable day.
+
+The forecastable window (today to today + 180 days) and the CITY_COORDINATES
+set are both small, so after each model build every (city, day) answer is
+materialized into one MATRIX_DTYPE array, city-major, that WeatherPredictor
+reads a row of in O(1) while it is fresh. Schedule the build nightly from the
+project root, e.g. with cron: `0 2 * * * python forecast_matrix.py`.
+"""
+import os
+import sys
+import json
+import time
+from datetime import date, datetime
+
+import numpy as np
+
+import backend
+
+# A matrix older than this is treated as stale and predictions fall back to live inference
+MAX_AGE_HOURS = float(os.getenv('FORECAST_MATRIX_MAX_AGE_HOURS', 24))
+
+
+class ForecastMatrix:
+    """City x day forecast table; row city_index * days + day_offset holds one forecast"""
+
+    def __init__(self, rows, meta):
+        self.rows = rows
+        self.meta = meta
+        self.start = date.fromisoformat(meta['start'])
+        self.days = meta['days']
+        self.city_index = {city: i for i, city in enumerate(meta['cities'])}
+
+    @classmethod
+    def build(cls, predictor, cities=None):
+        """Forecast every city for every day of the predictor's window in chunked batches.
+
+        Raises RuntimeError rather than build from a fallback elevation, which would otherwise be
+        served as a precomputed answer until the next build.
+        """
+        cities = list(cities or backend.CITY_COORDINATES)
+        sites = [(city, "", "") for city in cities]
+        elevations, resolved = predictor.get_elevations(
+            [predictor.get_coordinates(*site) for site in sites], return_resolved=True)
+        if not resolved.all():
+            raise RuntimeError(f"Elevation unresolved for {', '.join(np.array(cities)[~resolved])}")
+
+        start = predictor.today
+        end = predictor.max_future_date
+        rows = np.concatenate(list(predictor.iter_forecast_arrays(
+            sites, start.isoformat(), end.isoformat(), dtype=backend.MATRIX_DTYPE)))
+
+        # The batches look elevations up again; one that failed in between shows as a changed elevation
+        changed = (rows['elevation'].reshape(len(cities), -1) != elevations[:, None]).any(axis=1)
+        if changed.any():
+            raise RuntimeError(f"Elevation lookup failed during the build for {', '.join(np.array(cities)[changed])}")
+
+        meta = {
+            'cities': cities,
+            'start': start.isoformat(),
+            'days': (end - start).days + 1,
+            'built_at': time.time(),
+            'model_version': predictor.model_version,
+            'elevation_source': getattr(predictor.elevation_provider, 'source', None),
+        }
+        return cls(rows, meta)
+
+    def save(self, path):
+        """Publish the matrix; readers holding the previous table keep a consistent copy of it"""
+        os.makedirs(path, exist_ok=True)
+        rows_file = f"rows-{time.time_ns()}.npy"
+        with open(os.path.join(path, rows_file + ".tmp"), "wb") as f:
+            np.save(f, self.rows)
+        os.replace(os.path.join(path, rows_file + ".tmp"), os.path.join(path, rows_file))
+
+        # Switching the metadata publishes the new table in one atomic step
+        self.meta['rows_file'] = rows_file
+        with open(os.path.join(path, "meta.json.tmp"), "w") as f:
+            json.dump(self.meta, f)
+        os.replace(os.path.join(path, "meta.json.tmp"), os.path.join(path, "meta.json"))
+
+        # Tables already mapped by other processes stay readable after they are unlinked
+        for name in os.listdir(path):
+            if name.startswith("rows-") and name != rows_file:
+                try:
+                    os.remove(os.path.join(path, name))
+                except OSError:
+                    pass
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map a saved matrix, or None if there is none at path"""
+        meta_path = os.path.join(path, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        return cls(np.load(os.path.join(path, meta['rows_file']), mmap_mode='r'), meta)
+
+    @property
+    def age_hours(self):
+        return (time.time() - self.meta['built_at']) / 3600
+
+    def is_fresh(self, model_version, elevation_source):
+        """Built recently, by the models and elevation source the caller is using now"""
+        return (model_version is not None and self.meta['model_version'] == model_version
+                and self.meta['elevation_source'] == elevation_source
+                and self.age_hours <= MAX_AGE_HOURS)
+
+    def lookup(self, city, day):
+        """The stored row for a known city and date, or None outside the table"""
+        index = self.city_index.get(city.lower())
+        offset = (day - self.start).days
+        if index is None or not 0 <= offset < self.days:
+            return None
+        return self.rows[index * self.days + offset]
+
+    def status(self):
+        return {
+            'rows': len(self.rows),
+            'bytes': self.rows.nbytes,
+            'cities': len(self.city_index),
+            'start': self.meta['start'],
+            'days': self.days,
+            'built_at': datetime.fromtimestamp(self.meta['built_at']).isoformat(timespec='seconds'),
+            'age_hours': self.age_hours,
+            'model_version': self.meta['model_version'],
+        }
+
+
+def main(path=None):
+    """Build the models if needed, then materialize and publish the forecast matrix"""
+    path = path or os.path.join(backend.matrixdir, "latest")
+    predictor = backend.WeatherPredictor(train=False)
+    model_path = predictor.model_path()
+    if not predictor.load_models(model_path):
+        predictor.train_models()
+        predictor.save_models(model_path)
+
+    start = time.perf_counter()
+    try:
+        matrix = ForecastMatrix.build(predictor)
+    except RuntimeError as e:
+        print(f"❌ Forecast matrix not published, the previous one stays in place: {e}")
+        return 1
+    matrix.save(path)
+    status = matrix.status()
+    print(f"✅ Forecast matrix written to {path} in {time.perf_counter() - start:.1f}s: "
+          f"{status['cities']} cities x {status['days']} days, {status['bytes'] / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,25 @@
 import sys
 import os
-import json
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
+from collections import OrderedDict, deque
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QLabel, QScrollArea, QFrame, 
-                             QPushButton, QLineEdit, QStackedWidget, QSizePolicy,
-                             QGraphicsDropShadowEffect, QMessageBox, QFileDialog,
-                             QDateEdit, QComboBox, QGroupBox, QTextEdit, QGridLayout,
-                             QScrollBar)
-from PyQt5.QtCore import Qt, QTimer, QPropertyAnimation, QEasingCurve, QRect, pyqtProperty, QPoint, QDate
-from PyQt5.QtGui import QFont, QPixmap, QPainter, QColor, QLinearGradient, QPalette, QFontDatabase
+                             QPushButton, QLineEdit, QSizePolicy,
+                             QGraphicsDropShadowEffect, QMessageBox,
+                             QDateEdit, QGridLayout, QListView, QAbstractItemView,
+                             QStyledItemDelegate, QStyle, QCheckBox)
+from PyQt5.QtCore import (Qt, QTimer, QPoint, QDate, QSize, QThread, pyqtSignal,
+                          QAbstractListModel, QModelIndex, QObject)
+from PyQt5.QtGui import QFont, QPixmap, QPainter, QColor, QLinearGradient
 
-# Import your backend
-from backend import WeatherPredictor
+import metrics
+import profiling
+
+LIVE_UPDATE_SECONDS = metrics.REGISTRY.histogram(
+    'weather_live_update_seconds', "Edit-to-display latency of live predictions.", ['source'])
+
+# The backend (pandas, scikit-learn, trained models) is imported once the window is on screen
 
 class CustomTitleBar(QWidget):
     def __init__(self, parent):
@@ -306,6 +313,35 @@ class ModernWeatherInputPanel(QFrame):
         
         layout.addLayout(input_grid)
         
+        # Live mode predicts as the inputs change, without pressing the button
+        live_layout = QHBoxLayout()
+        self.live_checkbox = QCheckBox("⚡ Live update as I type")
+        self.live_checkbox.setStyleSheet("""
+            QCheckBox {
+                color: #BBDEFB;
+                font-size: 13px;
+                font-family: 'Segoe UI';
+            }
+        """)
+        self.live_checkbox.toggled.connect(self.on_input_edited)
+        live_layout.addWidget(self.live_checkbox)
+        live_layout.addStretch()
+        
+        self.live_status = QLabel("")
+        self.live_status.setStyleSheet("""
+            QLabel {
+                color: #81D4FA;
+                font-size: 12px;
+                font-family: 'Segoe UI';
+            }
+        """)
+        live_layout.addWidget(self.live_status)
+        layout.addLayout(live_layout)
+        
+        for line_edit in (self.city_input, self.state_input, self.country_input):
+            line_edit.textEdited.connect(self.on_input_edited)
+        self.date_input.dateChanged.connect(self.on_input_edited)
+        
         # Add spacing before button
         layout.addSpacing(15)
         
@@ -350,6 +386,18 @@ class ModernWeatherInputPanel(QFrame):
             return
         
         self.parent.predict_weather(city, state, country, date)
+    
+    def on_input_edited(self, *args):
+        if not self.live_checkbox.isChecked():
+            return
+        city = self.city_input.text().strip()
+        state = self.state_input.text().strip()
+        country = self.country_input.text().strip()
+        if not city or not state or not country:
+            self.live_status.setText("Fill in all location fields")
+            return
+        self.parent.live_prediction.request_prediction(city, state, country,
+                                                       self.date_input.date().toString("yyyy-MM-dd"))
 
 class ModernLineEdit(QLineEdit):
     def __init__(self, parent=None):
@@ -675,6 +723,361 @@ class WeatherConditionDisplay(QFrame):
         self.metrics['rainfall_card'].layout().itemAt(1).widget().setText(f"{prediction_data.get('expected_rainfall', '--')}")
         self.metrics['wind_card'].layout().itemAt(1).widget().setText(f"{prediction_data.get('wind_speed', '--')}")
 
+# Calendar cell backgrounds by forecast day type
+DAY_TYPE_COLORS = {
+    'thunderstorm': QColor(94, 53, 177, 170),
+    'heavy_rain': QColor(21, 101, 192, 170),
+    'rainy': QColor(30, 136, 229, 160),
+    'moderate_rain': QColor(41, 121, 255, 140),
+    'light_rain': QColor(79, 195, 247, 130),
+    'cloudy_rainy': QColor(96, 125, 139, 160),
+    'cloudy': QColor(120, 144, 156, 150),
+    'sunny_hot': QColor(230, 81, 0, 170),
+    'sunny_warm': QColor(245, 124, 0, 160),
+    'sunny_pleasant': QColor(251, 192, 45, 150),
+    'sunny_cool': QColor(38, 166, 154, 150),
+    'sunny_cold': QColor(0, 151, 167, 150)
+}
+DEFAULT_DAY_COLOR = QColor(30, 35, 45, 230)
+
+class ForecastCalendarModel(QAbstractListModel):
+    """One row per forecast day; cell labels are prepared once per batch, not on every paint"""
+    CellRole = Qt.UserRole + 1
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.location = None
+        self.forecasts = []
+        self.cells = []
+        self.rows_by_date = {}
+    
+    def set_forecasts(self, location, forecasts):
+        self.beginResetModel()
+        self.location = location
+        self.forecasts = forecasts
+        self.cells = [self.make_cell(forecast) for forecast in forecasts]
+        self.rows_by_date = {forecast.date: row for row, forecast in enumerate(forecasts)}
+        self.endResetModel()
+    
+    @staticmethod
+    def make_cell(forecast):
+        """(weekday, day, icon, temperature, rain chance, background) drawn by the delegate"""
+        day = datetime.strptime(forecast.date, "%Y-%m-%d")
+        return (day.strftime("%a"), day.strftime("%d %b"), forecast.day_type_description.split()[0],
+                f"{forecast.temperature:.0f}°", f"{forecast.rain_probability:.0f}% rain",
+                DAY_TYPE_COLORS.get(forecast.day_type, DEFAULT_DAY_COLOR))
+    
+    def forecast_for(self, location, date):
+        """The loaded ForecastResult for a location and date, or None"""
+        row = self.rows_by_date.get(date)
+        if location != self.location or row is None:
+            return None
+        return self.forecasts[row]
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.forecasts)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == self.CellRole:
+            return self.cells[index.row()]
+        if role == Qt.UserRole:
+            return self.forecasts[index.row()]
+        if role == Qt.ToolTipRole:
+            forecast = self.forecasts[index.row()]
+            return f"{forecast.date}: {forecast.day_type_description}, {forecast.condition}"
+        return None
+
+class ForecastCalendarDelegate(QStyledItemDelegate):
+    """Paints a calendar cell straight from its prepared labels; the view only asks for visible cells"""
+    CELL_SIZE = QSize(92, 124)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.label_font = QFont("Segoe UI", 9)
+        self.icon_font = QFont("Segoe UI Emoji", 20)
+        self.temp_font = QFont("Segoe UI", 14, QFont.DemiBold)
+        self.border_pen = QColor(79, 195, 247)
+    
+    def sizeHint(self, option, index):
+        return self.CELL_SIZE
+    
+    def paint(self, painter, option, index):
+        weekday, day, icon, temperature, rain, background = index.data(ForecastCalendarModel.CellRole)
+        rect = option.rect.adjusted(4, 4, -4, -4)
+        
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setBrush(background)
+        if option.state & QStyle.State_Selected:
+            painter.setPen(self.border_pen)
+        else:
+            painter.setPen(Qt.NoPen)
+        painter.drawRoundedRect(rect, 10, 10)
+        
+        painter.setPen(QColor(227, 242, 253))
+        painter.setFont(self.label_font)
+        painter.drawText(rect.adjusted(0, 6, 0, 0), Qt.AlignHCenter | Qt.AlignTop, f"{weekday}\n{day}")
+        painter.setFont(self.icon_font)
+        painter.drawText(rect.adjusted(0, 40, 0, 0), Qt.AlignHCenter | Qt.AlignTop, icon)
+        painter.setFont(self.temp_font)
+        painter.drawText(rect.adjusted(0, 0, 0, -22), Qt.AlignHCenter | Qt.AlignBottom, temperature)
+        painter.setFont(self.label_font)
+        painter.drawText(rect.adjusted(0, 0, 0, -6), Qt.AlignHCenter | Qt.AlignBottom, rain)
+        painter.restore()
+
+class ForecastCalendarStrip(QListView):
+    """Horizontally scrolling strip of the whole forecast window"""
+    day_selected = pyqtSignal(object)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.calendar = ForecastCalendarModel(self)
+        self.setModel(self.calendar)
+        self.setItemDelegate(ForecastCalendarDelegate(self))
+        
+        # Uniform cells let the view place and paint only what is in the viewport
+        self.setFlow(QListView.LeftToRight)
+        self.setWrapping(False)
+        self.setUniformItemSizes(True)
+        self.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setFixedHeight(ForecastCalendarDelegate.CELL_SIZE.height() + 22)
+        self.setStyleSheet("""
+            QListView {
+                background: transparent;
+                border: none;
+                outline: none;
+            }
+            QScrollBar:horizontal {
+                background: rgba(30, 35, 45, 0.8);
+                height: 10px;
+                border-radius: 5px;
+            }
+            QScrollBar::handle:horizontal {
+                background: rgba(66, 165, 245, 0.6);
+                border-radius: 5px;
+                min-width: 20px;
+            }
+            QScrollBar::add-line:horizontal, QScrollBar::sub-line:horizontal {
+                border: none;
+                background: none;
+            }
+        """)
+        self.clicked.connect(lambda index: self.day_selected.emit(index.data(Qt.UserRole)))
+    
+    def select_date(self, date):
+        row = self.calendar.rows_by_date.get(date)
+        if row is not None:
+            index = self.calendar.index(row)
+            self.setCurrentIndex(index)
+            self.scrollTo(index, QAbstractItemView.PositionAtCenter)
+
+class BackendWorker(QThread):
+    """Builds the WeatherPredictor, training included, off the GUI thread"""
+    predictor_ready = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    
+    def run(self):
+        try:
+            from backend import WeatherPredictor
+            predictor = WeatherPredictor()
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.predictor_ready.emit(predictor)
+
+class CalendarForecastWorker(QThread):
+    """Predicts the whole forecast window for one location in a single batch, off the GUI thread"""
+    forecasts_ready = pyqtSignal(object, object)
+    failed = pyqtSignal(str)
+    
+    def __init__(self, predictor, location, parent=None):
+        super().__init__(parent)
+        self.predictor = predictor
+        self.location = location
+    
+    def run(self):
+        try:
+            start = self.predictor.today.strftime("%Y-%m-%d")
+            end = self.predictor.max_future_date.strftime("%Y-%m-%d")
+            forecasts = list(self.predictor.iter_forecasts([self.location], start, end, compact=True))
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.forecasts_ready.emit(self.location, forecasts)
+
+class PredictionWorker(QThread):
+    """Runs one predict_single_day off the GUI thread"""
+    prediction_ready = pyqtSignal(int, object)
+    
+    def __init__(self, predictor, generation, request, parent=None):
+        super().__init__(parent)
+        self.predictor = predictor
+        self.generation = generation
+        self.request = request
+    
+    def run(self):
+        try:
+            prediction = self.predictor.predict_single_day(*self.request)
+        except Exception as e:
+            prediction = f"An error occurred: {str(e)}"
+        self.prediction_ready.emit(self.generation, prediction)
+
+class LivePrediction(QObject):
+    """Predictions for inputs as they are edited: debounced, stale results dropped, repeats served from cache"""
+    prediction_ready = pyqtSignal(object, object)
+    status_changed = pyqtSignal(str)
+    
+    def __init__(self, app, calendar, debounce_ms=300, cache_size=512):
+        super().__init__(app)
+        self.app = app
+        self.calendar = calendar
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        
+        # Every edit restarts the timer, so only a pause in typing reaches the model
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(debounce_ms)
+        self.timer.timeout.connect(self.start_prediction)
+        
+        # Each edit bumps the generation; results of older generations are stale
+        self.generation = 0
+        self.delivered = 0
+        self.request = None
+        self.edited_at = 0.0
+        self.worker = None
+        
+        # Edit-to-display latency per source, and the time each edit handler takes on the event loop
+        self.latencies = {'cache': deque(maxlen=200), 'model': deque(maxlen=200)}
+        self.edit_costs = deque(maxlen=200)
+    
+    def request_prediction(self, city, state, country, date):
+        """Called on every edit: answer at once from cache, otherwise wait for typing to pause"""
+        started = time.perf_counter()
+        self.generation += 1
+        self.request = (city, state, country, date)
+        self.edited_at = started
+        
+        known = self.cached(self.request)
+        if known is not None:
+            self.timer.stop()
+            self.deliver(self.request, known, 'cache')
+        else:
+            self.timer.start()
+            self.status_changed.emit("⌨️ Waiting for typing to pause...")
+        self.edit_costs.append(time.perf_counter() - started)
+    
+    def cached(self, request):
+        """A prediction dict for request that needs no model work, or None"""
+        if request in self.cache:
+            self.cache.move_to_end(request)
+            return self.cache[request]
+        known = self.calendar.forecast_for(request[:3], request[3])
+        if known is None and self.app.weather_predictor is not None:
+            # Memory only: this runs on the GUI thread, and the worker checks the shared cache itself
+            known = self.app.weather_predictor.known_forecast(*request, shared=False)
+        return None if known is None else known.to_dict()
+    
+    def remember(self, request, prediction):
+        self.cache[request] = prediction
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+    
+    def start_prediction(self):
+        # One prediction in flight at a time; the latest request starts when it finishes
+        if self.worker is not None:
+            return
+        predictor = self.app.weather_predictor
+        if predictor is None:
+            self.status_changed.emit("⏳ Waiting for the backend...")
+            self.timer.start()
+            return
+        self.worker = PredictionWorker(predictor, self.generation, self.request, self)
+        self.worker.prediction_ready.connect(self.on_worker_ready)
+        self.worker.finished.connect(self.worker.deleteLater)
+        self.worker.start()
+        self.status_changed.emit("⏳ Predicting...")
+    
+    def on_worker_ready(self, generation, prediction):
+        request = self.worker.request
+        self.worker = None
+        if not isinstance(prediction, str):
+            self.remember(request, prediction)
+        if generation == self.generation:
+            self.deliver(request, prediction, 'model')
+        elif self.delivered != self.generation and not self.timer.isActive():
+            # The inputs changed while predicting and have already settled
+            self.start_prediction()
+    
+    def deliver(self, request, prediction, source):
+        self.delivered = self.generation
+        latency = time.perf_counter() - self.edited_at
+        self.prediction_ready.emit(request, prediction)
+        if isinstance(prediction, str):
+            self.status_changed.emit(f"⚠️ {prediction}")
+            return
+        self.latencies[source].append(latency)
+        LIVE_UPDATE_SECONDS.observe(latency, source)
+        self.status_changed.emit(f"⚡ Updated in {latency * 1000:.0f} ms ({source})")
+    
+    def latency_summary(self):
+        """Median and 95th percentile latencies in ms, per source and for the edit handler itself"""
+        def percentiles(samples):
+            ordered = sorted(samples)
+            if not ordered:
+                return None
+            return (ordered[len(ordered) // 2] * 1000, ordered[min(len(ordered) - 1, len(ordered) * 95 // 100)] * 1000)
+        summary = {source: percentiles(samples) for source, samples in self.latencies.items()}
+        summary['edit'] = percentiles(self.edit_costs)
+        return summary
+
+class ForecastCalendarPanel(QFrame):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setup_ui()
+    
+    def setup_ui(self):
+        self.setStyleSheet("""
+            ForecastCalendarPanel {
+                background: rgba(25, 30, 40, 0.95);
+                border-radius: 20px;
+                border: 2px solid rgba(66, 165, 245, 0.3);
+            }
+        """)
+        
+        layout = QVBoxLayout()
+        layout.setContentsMargins(25, 20, 25, 15)
+        layout.setSpacing(12)
+        
+        self.title_label = QLabel("📅 6-Month Outlook")
+        self.title_label.setStyleSheet("""
+            QLabel {
+                color: #E3F2FD;
+                font-size: 18px;
+                font-weight: 600;
+                font-family: 'Segoe UI';
+            }
+        """)
+        layout.addWidget(self.title_label)
+        
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("""
+            QLabel {
+                color: #81D4FA;
+                font-size: 13px;
+                font-family: 'Segoe UI';
+            }
+        """)
+        layout.addWidget(self.status_label)
+        
+        self.strip = ForecastCalendarStrip()
+        layout.addWidget(self.strip)
+        self.setLayout(layout)
+
 class ProfessionalImageBackground(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -792,6 +1195,7 @@ class ProfessionalImageBackground(QWidget):
                 self.current_opacity = min(1.0, self.current_opacity + 0.05)
             self.update()
         
+    @profiling.stage
     def paintEvent(self, event):
         painter = QPainter(self)
         painter.setRenderHint(QPainter.Antialiasing)
@@ -887,6 +1291,11 @@ class ScrollableContentWidget(QWidget):
         self.prediction_panel.setVisible(False)
         layout.addWidget(self.prediction_panel)
         
+        # Whole-window outlook for the predicted location
+        self.calendar_panel = ForecastCalendarPanel()
+        self.calendar_panel.setVisible(False)
+        layout.addWidget(self.calendar_panel)
+        
         # Add stretchable space at the bottom
         layout.addStretch()
 
@@ -901,21 +1310,42 @@ class ProfessionalWeatherApp(QMainWindow):
         self.setWindowFlags(Qt.FramelessWindowHint)
         self.setAttribute(Qt.WA_TranslucentBackground)
         
-        # Initialize backend
+        # Initialize backend on a worker thread, so the window stays responsive while it trains
         self.weather_predictor = None
+        self.calendar_worker = None
         self.setup_backend()
         
         self.setup_ui()
         self.setup_animations()
         
     def setup_backend(self):
-        try:
-            self.weather_predictor = WeatherPredictor()
-            print("✅ Backend initialized successfully!")
-        except Exception as e:
-            print(f"❌ Error initializing backend: {e}")
-            QMessageBox.critical(self, "Backend Error", 
-                               f"Failed to initialize weather predictor: {str(e)}")
+        self.backend_worker = BackendWorker(self)
+        self.backend_worker.predictor_ready.connect(self.on_backend_ready)
+        self.backend_worker.failed.connect(self.on_backend_failed)
+        self.backend_worker.finished.connect(self.backend_worker.deleteLater)
+        self.backend_worker.start()
+        
+        # Training cannot be interrupted, and Qt aborts if a running thread is destroyed at exit
+        QApplication.instance().aboutToQuit.connect(self.wait_for_workers)
+    
+    def wait_for_workers(self):
+        for worker in (self.backend_worker, self.calendar_worker):
+            if worker is not None:
+                worker.wait()
+    
+    def on_backend_ready(self, predictor):
+        self.backend_worker = None
+        self.weather_predictor = predictor
+        print("✅ Backend initialized successfully!")
+        
+        # Metrics endpoint and file dump, when METRICS_PORT / METRICS_FILE ask for them
+        metrics.start_exporters()
+    
+    def on_backend_failed(self, message):
+        self.backend_worker = None
+        print(f"❌ Error initializing backend: {message}")
+        QMessageBox.critical(self, "Backend Error", 
+                           f"Failed to initialize weather predictor: {message}")
     
     def setup_ui(self):
         central_widget = QWidget()
@@ -974,6 +1404,12 @@ class ProfessionalWeatherApp(QMainWindow):
         # Create scrollable content widget
         self.scroll_content = ScrollableContentWidget(self)
         self.scroll_area.setWidget(self.scroll_content)
+        self.scroll_content.calendar_panel.strip.day_selected.connect(self.show_calendar_day)
+        
+        # Optional predict-as-you-type mode of the input panel
+        self.live_prediction = LivePrediction(self, self.scroll_content.calendar_panel.strip.calendar)
+        self.live_prediction.prediction_ready.connect(self.on_live_prediction)
+        self.live_prediction.status_changed.connect(self.scroll_content.input_panel.live_status.setText)
         
         main_layout.addWidget(self.scroll_area)
         
@@ -987,9 +1423,10 @@ class ProfessionalWeatherApp(QMainWindow):
         self.time_timer.start(1000)
         self.update_time()
         
+    @profiling.stage
     def predict_weather(self, city, state, country, date):
         if not self.weather_predictor:
-            QMessageBox.critical(self, "Error", "Weather predictor not initialized!")
+            QMessageBox.critical(self, "Error", "Weather predictor not initialized yet, it is still loading!")
             return
         
         try:
@@ -1000,8 +1437,13 @@ class ProfessionalWeatherApp(QMainWindow):
             # Show prediction panel
             self.scroll_content.prediction_panel.setVisible(True)
             
-            # Make prediction using backend
-            prediction = self.weather_predictor.predict_single_day(city, state, country, date)
+            # Days already in the calendar strip need no backend call
+            location = (city, state, country)
+            known = self.scroll_content.calendar_panel.strip.calendar.forecast_for(location, date)
+            if known is not None:
+                prediction = known.to_dict()
+            else:
+                prediction = self.weather_predictor.predict_single_day(city, state, country, date)
             
             if isinstance(prediction, str):
                 # Error case
@@ -1011,12 +1453,63 @@ class ProfessionalWeatherApp(QMainWindow):
             else:
                 # Success case - update UI
                 self.update_ui_with_prediction(prediction)
+                self.load_calendar(location, date)
                 
         except Exception as e:
             QMessageBox.critical(self, "Prediction Error", f"An error occurred: {str(e)}")
             self.scroll_content.prediction_panel.condition_label.setText("Prediction error")
             self.scroll_content.prediction_panel.temp_label.setText("--°")
     
+    def on_live_prediction(self, request, prediction):
+        panel = self.scroll_content.prediction_panel
+        if isinstance(prediction, str):
+            # No dialogs while typing; the input panel's status line shows the message
+            return
+        panel.setVisible(True)
+        self.update_ui_with_prediction(prediction)
+        self.load_calendar(request[:3], request[3])
+    
+    def load_calendar(self, location, date):
+        """Fill the calendar strip for location with one background batch, unless it already shows it"""
+        panel = self.scroll_content.calendar_panel
+        panel.setVisible(True)
+        self.calendar_date = date
+        if panel.strip.calendar.location == location:
+            panel.strip.select_date(date)
+            return
+        if self.calendar_worker is not None and self.calendar_worker.location == location:
+            return
+        
+        panel.status_label.setText(f"Predicting the next 6 months for {location[0]}...")
+        self.calendar_worker = CalendarForecastWorker(self.weather_predictor, location, self)
+        self.calendar_worker.forecasts_ready.connect(self.on_calendar_ready)
+        self.calendar_worker.failed.connect(self.on_calendar_failed)
+        self.calendar_worker.finished.connect(self.calendar_worker.deleteLater)
+        self.calendar_worker.start()
+    
+    def on_calendar_ready(self, location, forecasts):
+        # A batch for a location the user has since moved away from is dropped
+        if self.sender() is not self.calendar_worker:
+            return
+        self.calendar_worker = None
+        panel = self.scroll_content.calendar_panel
+        panel.strip.calendar.set_forecasts(location, forecasts)
+        panel.status_label.setText(f"{location[0]}, {location[1]} • {len(forecasts)} days • click a day for details")
+        panel.strip.select_date(self.calendar_date)
+    
+    def on_calendar_failed(self, message):
+        if self.sender() is not self.calendar_worker:
+            return
+        self.calendar_worker = None
+        self.scroll_content.calendar_panel.status_label.setText(f"Outlook unavailable: {message}")
+    
+    def show_calendar_day(self, forecast):
+        """Show a calendar day in the detail panel from the loaded batch"""
+        self.scroll_content.input_panel.date_input.setDate(QDate.fromString(forecast.date, "yyyy-MM-dd"))
+        self.scroll_content.prediction_panel.setVisible(True)
+        self.update_ui_with_prediction(forecast.to_dict())
+    
+    @profiling.stage
     def update_ui_with_prediction(self, prediction):
         # Update prediction display
         self.scroll_content.prediction_panel.update_display(prediction)
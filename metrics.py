@@ -0,0 +1,299 @@
+"""Prometheus-style counters and histograms for the predictor processes.
+
+Each metric keeps one shard of values per thread. A thread only ever writes
+its own shard, so recording takes no lock and threads never contend; a scrape
+sums the shards. REGISTRY.exposition() renders the text exposition format
+(version 0.0.4), serve() publishes it on a local HTTP endpoint and dump()
+writes it to a file, e.g. for node_exporter's textfile collector. The entry
+points (the backend CLI, the GUI and the parent of a bulk run) turn those on
+from METRICS_PORT and METRICS_FILE with start_exporters(); library code never
+does, so worker processes and a second predictor do not fight over the port.
+"""
+import os
+import time
+import atexit
+import bisect
+import resource
+import threading
+
+# Latency buckets in seconds, from a matrix read to a cold batch
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Metric:
+    """A named family of values, one per combination of label values, sharded by thread"""
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.shards = []
+        self.retired = {}
+
+    def shard(self):
+        """This thread's values; registered under the lock once per thread, then written lock-free"""
+        values = {}
+        with self.lock:
+            self.shards.append((threading.current_thread(), values))
+        self.local.values = values
+        return values
+
+    def collect(self):
+        """Values summed over every thread's shard, by label values"""
+        with self.lock:
+            live = []
+            for thread, values in self.shards:
+                if thread.is_alive():
+                    live.append((thread, values))
+                else:
+                    # A finished thread writes no more, so fold its shard in for good
+                    self.merge(self.retired, values)
+            self.shards = live
+            totals = self.copy(self.retired)
+            for _, values in live:
+                self.merge(totals, values)
+        return totals
+
+    def labels(self, labels, extra=None):
+        """`{name="value",...}` for label values, with an extra trailing label name if given"""
+        if not labels:
+            return ""
+        names = self.labelnames + ((extra,) if extra else ())
+        return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, labels)) + "}"
+
+    def exposition(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in sorted(self.collect().items()):
+            lines.extend(self.samples(labels, value))
+        return lines
+
+
+class Counter(Metric):
+    """A monotonically increasing count"""
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        try:
+            values = self.local.values
+        except AttributeError:
+            values = self.shard()
+        values[labels] = values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self.collect().get(labels, 0)
+
+    @staticmethod
+    def copy(values):
+        return dict(values)
+
+    @staticmethod
+    def merge(totals, values):
+        for labels, value in list(values.items()):
+            totals[labels] = totals.get(labels, 0) + value
+
+    def samples(self, labels, value):
+        return [f"{self.name}{self.labels(labels)} {value}"]
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative `le` buckets, with their sum and count"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        try:
+            values = self.local.values
+        except AttributeError:
+            values = self.shard()
+        counts = values.get(labels)
+        if counts is None:
+            # One count per bucket and +Inf, then the sum of the observations
+            counts = values[labels] = [0] * (len(self.buckets) + 2)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def time(self, *labels):
+        """Context manager observing the wall time of its block"""
+        return _Timer(self, labels)
+
+    def count(self, *labels):
+        counts = self.collect().get(labels)
+        return 0 if counts is None else sum(counts[:-1])
+
+    def sum(self, *labels):
+        counts = self.collect().get(labels)
+        return 0 if counts is None else counts[-1]
+
+    @staticmethod
+    def copy(values):
+        return {labels: list(counts) for labels, counts in values.items()}
+
+    @staticmethod
+    def merge(totals, values):
+        for labels, counts in list(values.items()):
+            if labels in totals:
+                totals[labels] = [a + b for a, b in zip(totals[labels], counts)]
+            else:
+                totals[labels] = list(counts)
+
+    def samples(self, labels, counts):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{self.labels(labels + (bound,), 'le')} {cumulative}")
+        lines.append(f"{self.name}_sum{self.labels(labels)} {counts[-1]}")
+        lines.append(f"{self.name}_count{self.labels(labels)} {cumulative}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Gauge:
+    """A value read from `function` at scrape time"""
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, function):
+        self.name = name
+        self.documentation = documentation
+        self.function = function
+
+    def exposition(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge",
+                f"{self.name} {self.function()}"]
+
+
+class Registry:
+    """The metrics of this process, by name"""
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def register(self, metric):
+        with self.lock:
+            # Re-importing a module hands back the existing metric rather than resetting it
+            return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, function):
+        return self.register(Gauge(name, documentation, function))
+
+    def exposition(self):
+        """Every metric in the Prometheus text exposition format"""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.exposition()) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def resident_memory_bytes():
+    """Current resident set size of this process"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return peak_resident_memory_bytes()
+
+
+def peak_resident_memory_bytes():
+    """Peak resident set size of this process"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+REGISTRY.gauge('process_resident_memory_bytes', "Resident memory size in bytes.", resident_memory_bytes)
+REGISTRY.gauge('process_peak_resident_memory_bytes', "Peak resident memory size in bytes.",
+               peak_resident_memory_bytes)
+
+
+def serve(port, host="127.0.0.1", registry=REGISTRY):
+    """Serve the exposition at http://host:port/metrics from a daemon thread; returns the server"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = registry.exposition().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+def dump(path, registry=REGISTRY):
+    """Write the exposition to path, replacing it atomically so collectors never read a partial file"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        f.write(registry.exposition())
+    os.replace(path + ".tmp", path)
+
+
+_exporters = {}
+
+
+def start_exporters(port=None, path=None, interval=15):
+    """Start the endpoint on METRICS_PORT and the periodic dump to METRICS_FILE, once per process.
+
+    Only entry points call this. A port another process already holds is reported, not raised, so
+    the program runs on without its endpoint.
+    """
+    port = port if port is not None else os.getenv('METRICS_PORT')
+    path = path if path is not None else os.getenv('METRICS_FILE')
+    if port and 'server' not in _exporters:
+        try:
+            _exporters['server'] = serve(int(port))
+        except OSError as error:
+            print(f"⚠️  Metrics endpoint not started on port {port}: {error}")
+        else:
+            print(f"📈 Metrics served on http://127.0.0.1:{_exporters['server'].server_port}/metrics")
+    if path and 'file' not in _exporters:
+        _exporters['file'] = path
+
+        def write_periodically():
+            while True:
+                time.sleep(interval)
+                dump(path)
+        threading.Thread(target=write_periodically, name="metrics-dump", daemon=True).start()
+        atexit.register(dump, path)
+    return _exporters
@@ -0,0 +1,198 @@
+"""Model backends WeatherPredictor can train its five targets with.
+
+A backend builds the regressors and classifiers for train_models and knows how
+to break a fitted model into ensemble members for the forecast quantiles.
+Forests use their trees; backends with a single point estimate spread it by
+their held-out residuals, or for climatology by the history of that day of the
+year. The backend is picked with the MODEL_BACKEND setting (see .env_exmple).
+"""
+from abc import ABC, abstractmethod
+
+import numpy as np
+from sklearn.base import BaseEstimator, RegressorMixin, ClassifierMixin
+from sklearn.ensemble import (RandomForestRegressor, RandomForestClassifier,
+                              HistGradientBoostingRegressor, HistGradientBoostingClassifier)
+from sklearn.linear_model import Ridge, LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+# Position of DAY_OF_YEAR in backend.FEATURE_COLUMNS
+DAY_OF_YEAR_COLUMN = 3
+
+# Quantile levels of the members a point-estimate model is spread into, as many as a default forest has trees
+MEMBER_LEVELS = (np.arange(100) + 0.5) / 100
+
+
+def centred_quantiles(values, axis=None):
+    """values at MEMBER_LEVELS, shifted to average 0 so adding them to a point estimate keeps its mean"""
+    quantiles = np.quantile(values, MEMBER_LEVELS, axis=axis)
+    return quantiles - quantiles.mean(axis=0)
+
+
+class ModelBackend(ABC):
+    """Factory for the models behind WeatherPredictor; subclasses provide regressor() and classifier()"""
+    name = None
+    default_params = {}
+    # Feature matrix dtype train_models builds for this backend's estimators
+    training_dtype = np.float64
+
+    def __init__(self, params=None):
+        self.params = {**self.default_params, **(params or {})}
+
+    @abstractmethod
+    def regressor(self):
+        """A new, unfitted regressor for one continuous target"""
+
+    @abstractmethod
+    def classifier(self):
+        """A new, unfitted classifier for the rain and day type targets"""
+
+    def calibrate(self, model, features, target):
+        """Fit the spread members() puts around a regressor's point estimate, from held-out rows"""
+        model.residual_offsets_ = centred_quantiles(np.asarray(target, dtype=float) - model.predict(features))
+
+    def members(self, model, features):
+        """Per-member predictions of a fitted regressor, shape (rows, members)"""
+        point = model.predict(features)[:, None]
+        offsets = getattr(model, 'residual_offsets_', None)
+        # An uncalibrated model has no distribution, only its point estimate
+        return point if offsets is None else point + offsets
+
+
+class RandomForestBackend(ModelBackend):
+    """The original 100-tree forests"""
+    name = 'random_forest'
+    default_params = {'n_estimators': 100, 'max_depth': 15, 'random_state': 42}
+    # Trees split on float32 features anyway; handing them float32 saves sklearn's own converted copy
+    training_dtype = np.float32
+
+    def regressor(self):
+        return RandomForestRegressor(**self.params)
+
+    def classifier(self):
+        return RandomForestClassifier(**self.params)
+
+    def calibrate(self, model, features, target):
+        # The trees already disagree with each other; that is the spread
+        pass
+
+    def members(self, model, features):
+        """Every tree's prediction from one apply() pass over the forest"""
+        # Forests flattened by compression.py traverse their own arrays
+        if hasattr(model, 'members'):
+            return model.members(features)
+        if getattr(model, 'leaf_table_', None) is None:
+            # Flatten every tree's node values once so leaf ids index them directly
+            trees = [estimator.tree_ for estimator in model.estimators_]
+            offsets = np.cumsum([0] + [tree.node_count for tree in trees[:-1]])
+            values = np.concatenate([tree.value[:, 0, 0] for tree in trees])
+            model.leaf_table_ = (offsets, values)
+
+        offsets, values = model.leaf_table_
+        return values[model.apply(features) + offsets]
+
+
+class HistGradientBoostingBackend(ModelBackend):
+    """Histogram-based gradient boosting: binned features, shallow trees, small models"""
+    name = 'hist_gradient_boosting'
+    default_params = {'max_iter': 200, 'learning_rate': 0.1, 'max_leaf_nodes': 31, 'random_state': 42}
+
+    def regressor(self):
+        return HistGradientBoostingRegressor(**self.params)
+
+    def classifier(self):
+        return HistGradientBoostingClassifier(**self.params)
+
+
+class LinearBackend(ModelBackend):
+    """Standardized ridge and logistic regression baseline"""
+    name = 'linear'
+    default_params = {'alpha': 1.0, 'max_iter': 1000}
+
+    def regressor(self):
+        return make_pipeline(StandardScaler(), Ridge(alpha=self.params['alpha']))
+
+    def classifier(self):
+        return make_pipeline(StandardScaler(), LogisticRegression(max_iter=self.params['max_iter']))
+
+
+class ClimatologyRegressor(RegressorMixin, BaseEstimator):
+    """Predicts the historical mean of the target for the same day of the year"""
+
+    def __init__(self, day_of_year_column=DAY_OF_YEAR_COLUMN):
+        self.day_of_year_column = day_of_year_column
+
+    def fit(self, X, y):
+        day_of_year = np.asarray(X)[:, self.day_of_year_column].astype(int)
+        y = np.asarray(y, dtype=float)
+        sums = np.bincount(day_of_year, weights=y, minlength=367)
+        counts = np.bincount(day_of_year, minlength=367)
+        self.means_ = np.where(counts > 0, sums / np.maximum(counts, 1), y.mean())
+
+        # Each day's spread is the spread of its history; days never seen take the overall one
+        self.offsets_ = np.tile(centred_quantiles(y), (367, 1))
+        for day in np.unique(day_of_year):
+            self.offsets_[day] = centred_quantiles(y[day_of_year == day])
+        return self
+
+    def members(self, X):
+        """The day's mean spread into the quantiles of its history, shape (rows, members)"""
+        day_of_year = np.asarray(X)[:, self.day_of_year_column].astype(int)
+        return self.means_[day_of_year][:, None] + self.offsets_[day_of_year]
+
+    def predict(self, X):
+        return self.means_[np.asarray(X)[:, self.day_of_year_column].astype(int)]
+
+
+class ClimatologyClassifier(ClassifierMixin, BaseEstimator):
+    """Predicts the historical class frequencies for the same day of the year"""
+
+    def __init__(self, day_of_year_column=DAY_OF_YEAR_COLUMN):
+        self.day_of_year_column = day_of_year_column
+
+    def fit(self, X, y):
+        day_of_year = np.asarray(X)[:, self.day_of_year_column].astype(int)
+        self.classes_, encoded = np.unique(np.asarray(y), return_inverse=True)
+        counts = np.zeros((367, len(self.classes_)))
+        np.add.at(counts, (day_of_year, encoded), 1)
+        overall = np.bincount(encoded, minlength=len(self.classes_)) / len(encoded)
+        totals = counts.sum(axis=1, keepdims=True)
+        self.proba_ = np.where(totals > 0, counts / np.maximum(totals, 1), overall)
+        return self
+
+    def predict_proba(self, X):
+        return self.proba_[np.asarray(X)[:, self.day_of_year_column].astype(int)]
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+class ClimatologyBackend(ModelBackend):
+    """Day-of-year climatology: the floor any trained model has to beat"""
+    name = 'climatology'
+
+    def regressor(self):
+        return ClimatologyRegressor()
+
+    def classifier(self):
+        return ClimatologyClassifier()
+
+    def calibrate(self, model, features, target):
+        # The history of each day of the year is its distribution
+        pass
+
+    def members(self, model, features):
+        return model.members(features)
+
+
+MODEL_BACKENDS = {
+    backend.name: backend
+    for backend in (RandomForestBackend, HistGradientBoostingBackend, LinearBackend, ClimatologyBackend)
+}
+
+
+def make_model_backend(name, params=None):
+    """Instantiate the backend registered under name"""
+    if name not in MODEL_BACKENDS:
+        raise ValueError(f"Unknown model backend '{name}'. Choose from: {', '.join(MODEL_BACKENDS)}")
+    return MODEL_BACKENDS[name](params)
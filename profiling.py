@@ -0,0 +1,187 @@
+"""Opt-in profiling of the prediction, training and GUI hot paths.
+
+Set WEATHER_PROFILE in the environment to profile a whole run, e.g.
+`WEATHER_PROFILE=1 python main.py`. It is read when this module is imported,
+before .env is loaded, and takes one of these values:
+
+    1 / all     cProfile of the main thread plus sampled stacks of every thread
+    sample      sampled stacks only; much lower overhead than cProfile
+    cprofile    cProfile only
+
+At exit the run is written to WEATHER_PROFILE_DIR (default
+weather_prediction/profiles) as a `.prof` file for pstats or snakeviz and a
+`.speedscope.json` flame graph for https://www.speedscope.app, and the wall
+time of every @stage function is printed. A stage can also feed a metrics
+histogram, which it does whether or not profiling is on; without
+WEATHER_PROFILE that is all its one wrapper does, and a stage with no
+histogram is returned unchanged, so disabled profiling costs nothing. For a
+single block of code, use `with profile("name"):` instead.
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+import functools
+from collections import defaultdict
+
+MODE = os.getenv('WEATHER_PROFILE', '').lower()
+ENABLED = MODE not in ('', '0', 'false', 'off')
+OUTPUT_DIR = os.getenv('WEATHER_PROFILE_DIR', "weather_prediction/profiles")
+
+# Calls and total seconds of each @stage function, while profiling is enabled
+STAGE_TIMES = defaultdict(lambda: [0, 0.0])
+
+
+def stage(func=None, *, histogram=None, labels=()):
+    """Mark a function as a profiled stage, also observing its wall time in histogram (a metrics.Histogram).
+
+    Profiling and metrics share one wrapper; with neither WEATHER_PROFILE nor a histogram, the
+    function is returned unchanged.
+    """
+    if func is None:
+        return functools.partial(stage, histogram=histogram, labels=labels)
+    if not ENABLED and histogram is None:
+        return func
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            if histogram is not None:
+                histogram.observe(elapsed, *labels)
+            if ENABLED:
+                totals = STAGE_TIMES[name]
+                totals[0] += 1
+                totals[1] += elapsed
+    return timed
+
+
+class StackSampler:
+    """Samples the Python call stack of every other thread at a fixed interval"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.frames = {}
+        self.samples = defaultdict(list)
+        self.thread = None
+        self.running = False
+
+    def frame_id(self, code):
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        if key not in self.frames:
+            self.frames[key] = len(self.frames)
+        return self.frames[key]
+
+    def sample(self):
+        now = time.perf_counter()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == threading.get_ident():
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self.frame_id(frame.f_code))
+                frame = frame.f_back
+            self.samples[names.get(ident, str(ident))].append((now, stack[::-1]))
+
+    def run(self):
+        while self.running:
+            self.sample()
+            time.sleep(self.interval)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="stack-sampler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+        self.stopped = time.perf_counter()
+
+    def speedscope(self, name):
+        """The samples as a speedscope file, one sampled profile per thread"""
+        frames = [{'name': code_name, 'file': filename, 'line': line}
+                  for (code_name, filename, line), _ in sorted(self.frames.items(), key=lambda item: item[1])]
+        profiles = []
+        for thread_name, samples in self.samples.items():
+            times = [timestamp for timestamp, _ in samples] + [self.stopped]
+            profiles.append({
+                'type': 'sampled',
+                'name': thread_name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': self.stopped - self.started,
+                'samples': [stack for _, stack in samples],
+                'weights': [later - earlier for earlier, later in zip(times, times[1:])],
+            })
+        return {
+            '$schema': "https://www.speedscope.app/file-format-schema.json",
+            'name': name,
+            'exporter': "weather profiling",
+            'shared': {'frames': frames},
+            'profiles': profiles,
+        }
+
+
+class profile:
+    """Profile a block of code: `with profile("predict"):` writes its .prof and .speedscope.json"""
+
+    def __init__(self, name="weather", mode='all', output_dir=None):
+        self.name = name
+        self.mode = mode
+        self.output_dir = output_dir or OUTPUT_DIR
+        self.profiler = None
+        self.sampler = None
+        self.paths = []
+
+    def __enter__(self):
+        if self.mode in ('1', 'all', 'true', 'on', 'sample'):
+            self.sampler = StackSampler()
+            self.sampler.start()
+        if self.mode in ('1', 'all', 'true', 'on', 'cprofile'):
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = os.path.join(self.output_dir, f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}")
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(prefix + ".prof")
+            self.paths.append(prefix + ".prof")
+        if self.sampler is not None:
+            self.sampler.stop()
+            with open(prefix + ".speedscope.json", "w") as f:
+                json.dump(self.sampler.speedscope(self.name), f)
+            self.paths.append(prefix + ".speedscope.json")
+        print(f"🔥 Profile written to {', '.join(self.paths)}")
+
+
+def print_stage_times():
+    if not STAGE_TIMES:
+        return
+    print(f"{'stage':<48}{'calls':>8}{'total':>12}{'mean':>12}")
+    for name, (calls, seconds) in sorted(STAGE_TIMES.items(), key=lambda item: -item[1][1]):
+        print(f"{name:<48}{calls:>8}{seconds * 1000:>10.1f}ms{seconds / calls * 1000:>10.2f}ms")
+
+
+if ENABLED:
+    # Profile the whole run from the first import of this module to interpreter exit
+    _script = os.path.splitext(os.path.basename(sys.argv[0]))[0]
+    _session = profile(_script if _script and not _script.startswith('-') else "python", MODE)
+    _session.__enter__()
+
+    @atexit.register
+    def _finish():
+        _session.__exit__(None, None, None)
+        print_stage_times()
@@ -0,0 +1,134 @@
+"""Forecast and elevation cache shared by every WeatherPredictor process on the host.
+
+The GUI, the CLI, bulk workers and the async facade each hold their own
+predictor; this SQLite database in WAL mode lets any of them reuse what another
+already computed. Readers never block each other or the writer, and each table
+is bounded to `max_entries` rows, evicting the least recently used.
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+
+# Reads refresh an entry's recency at most this often, so hot keys do not turn every read into a write
+TOUCH_INTERVAL = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS forecasts (
+    model_version TEXT NOT NULL, elevation_source TEXT NOT NULL,
+    lat REAL NOT NULL, lng REAL NOT NULL, date TEXT NOT NULL,
+    forecast TEXT NOT NULL, last_used REAL NOT NULL,
+    PRIMARY KEY (model_version, elevation_source, lat, lng, date)
+);
+CREATE INDEX IF NOT EXISTS forecasts_last_used ON forecasts (last_used);
+CREATE TABLE IF NOT EXISTS elevations (
+    source TEXT NOT NULL, lat REAL NOT NULL, lng REAL NOT NULL,
+    elevation REAL NOT NULL, last_used REAL NOT NULL,
+    PRIMARY KEY (source, lat, lng)
+);
+CREATE INDEX IF NOT EXISTS elevations_last_used ON elevations (last_used);
+"""
+
+
+class SharedResultCache:
+    """SQLite-backed LRU cache of forecasts and elevations, safe across threads and processes"""
+
+    def __init__(self, path, max_entries=100_000, evict_every=256):
+        self.path = path
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self.local = threading.local()
+        self.writes = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+
+    @property
+    def connection(self):
+        """This thread's connection, reopened after a fork since SQLite handles must not cross processes"""
+        if getattr(self.local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self.local.connection = connection
+            self.local.pid = os.getpid()
+        return self.local.connection
+
+    def get_forecast(self, model_version, elevation_source, lat, lng, date):
+        """The cached forecast values for a location and date, or None"""
+        key = (model_version, elevation_source, lat, lng, date)
+        row = self.connection.execute(
+            "SELECT forecast, last_used FROM forecasts WHERE model_version=? AND elevation_source=? "
+            "AND lat=? AND lng=? AND date=?", key).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[1] > TOUCH_INTERVAL:
+            self.connection.execute(
+                "UPDATE forecasts SET last_used=? WHERE model_version=? AND elevation_source=? "
+                "AND lat=? AND lng=? AND date=?", (now, *key))
+        return json.loads(row[0])
+
+    def put_forecast(self, model_version, elevation_source, lat, lng, date, forecast):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO forecasts VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (model_version, elevation_source, lat, lng, date, json.dumps(forecast), time.time()))
+        self.wrote(1)
+
+    def put_forecasts(self, rows):
+        """Store many (model_version, elevation_source, lat, lng, date, forecast) rows in one transaction"""
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO forecasts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(*key, json.dumps(forecast), now) for *key, forecast in rows])
+        self.wrote(len(rows))
+
+    def get_elevations(self, source, coordinates):
+        """Cached elevations for the (lat, lng) pairs that have one"""
+        found = {}
+        now = time.time()
+        for lat, lng in set(coordinates):
+            row = self.connection.execute(
+                "SELECT elevation, last_used FROM elevations WHERE source=? AND lat=? AND lng=?",
+                (source, lat, lng)).fetchone()
+            if row is not None:
+                found[(lat, lng)] = row[0]
+                if now - row[1] > TOUCH_INTERVAL:
+                    self.connection.execute("UPDATE elevations SET last_used=? WHERE source=? AND lat=? AND lng=?",
+                                            (now, source, lat, lng))
+        return found
+
+    def put_elevations(self, source, elevations):
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO elevations VALUES (?, ?, ?, ?, ?)",
+                [(source, lat, lng, elevation, now) for (lat, lng), elevation in elevations.items()])
+        self.wrote(len(elevations))
+
+    def wrote(self, count):
+        """Count writes and trim both tables back to max_entries every evict_every of them"""
+        self.writes += count
+        if self.writes >= self.evict_every:
+            self.writes = 0
+            self.evict()
+
+    def evict(self):
+        """Drop the least recently used rows beyond max_entries in each table.
+
+        Exactly the excess goes, oldest first and in insertion order among rows written together, so
+        a batch sharing one last_used is trimmed rather than wiped along with its neighbours.
+        """
+        with self.connection:
+            for table in ('forecasts', 'elevations'):
+                self.connection.execute(
+                    f"DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} ORDER BY last_used, rowid "
+                    f"LIMIT max(0, (SELECT COUNT(*) FROM {table}) - ?))",
+                    (self.max_entries,))
+
+    def status(self):
+        counts = {table: self.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table in ('forecasts', 'elevations')}
+        return {**counts, 'bytes': os.path.getsize(self.path), 'max_entries': self.max_entries}
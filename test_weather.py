@@ -0,0 +1,447 @@
+"""Correctness checks for the backend, run with `python -m pytest` from the project root.
+
+Timings live in benchmarks.py; these tests only check results. The fixtures in
+conftest.py share one generated history between them, so nothing is trained
+on the full data.
+"""
+import time
+
+import numpy as np
+import pytest
+
+import backend
+from conftest import SyntheticTerrain, bare_predictor, plane, rule_inputs, MockElevationHandler
+
+
+@pytest.mark.parametrize("trial", range(20))
+def test_day_type_rules_match_scalar(rule_predictor, trial):
+    inputs = rule_inputs(np.random.default_rng(trial), 2000, backend.DAY_TYPE_RULES)
+    args = [inputs[k] for k in ('rainfall', 'temperature', 'wind_speed', 'rain_probability')]
+    assert list(zip(*rule_predictor.classify_day_types(*args))) == [
+        rule_predictor.classify_day_type(*row) for row in zip(*args)]
+
+
+@pytest.mark.parametrize("trial", range(20))
+def test_condition_rules_match_scalar(rule_predictor, trial):
+    inputs = rule_inputs(np.random.default_rng(trial), 2000, backend.WEATHER_CONDITION_RULES)
+    args = [inputs[k] for k in ('temp', 'rain_prob', 'wind_speed')]
+    assert list(rule_predictor.get_weather_conditions(*args)) == [
+        rule_predictor.get_weather_condition(*row) for row in zip(*args)]
+
+
+@pytest.mark.parametrize("trial", range(20))
+def test_training_day_type_codes_match_scalar_labels(rule_predictor, trial):
+    inputs = rule_inputs(np.random.default_rng(trial), 2000, backend.TRAINING_DAY_TYPE_RULES)
+    args = [inputs[k] for k in ('rainfall', 'temperature', 'wind_speed')]
+    assert [backend.DAY_TYPES[c] for c in rule_predictor.determine_day_types(*args)] == [
+        rule_predictor.determine_day_type(*row) for row in zip(*args)]
+
+
+def test_history_day_types_follow_the_rules(history_predictor):
+    history = history_predictor.daily_df
+    expected = history_predictor.determine_day_types(history['RAINFALL'], history['TEMPERATURE'], history['WIND_SPEED'])
+    assert list(history['DAY_TYPE'].cat.categories) == backend.DAY_TYPES
+    assert np.array_equal(history['DAY_TYPE'].cat.codes, expected)
+
+
+def test_day_type_single_pass_matches_predict(history_predictor):
+    from sklearn.ensemble import RandomForestClassifier
+    history = history_predictor.daily_df
+    features = history[backend.FEATURE_COLUMNS].to_numpy()
+    predictor = bare_predictor()
+    predictor.day_type_model = RandomForestClassifier(n_estimators=5, max_depth=6, random_state=0).fit(
+        features[::10], history['DAY_TYPE'].cat.codes[::10])
+
+    # Labels and confidence of the single predict_proba pass, against predict + predict_proba
+    sample = features[5::50]
+    labels, confidence = predictor.predict_day_type(sample)
+    assert labels == [backend.DAY_TYPES[code] for code in predictor.day_type_model.predict(sample)]
+    assert np.array_equal(confidence, np.max(predictor.day_type_model.predict_proba(sample), axis=1))
+
+
+def test_serving_features_match_training(history_predictor):
+    import feature_store
+    history = history_predictor.daily_df
+    dates = feature_store.to_dates(history['YEAR'], history['MONTH'], history['DAY'])
+    served = history_predictor.features().features_for(dates)
+    trained = history[backend.FEATURE_COLUMNS].to_numpy(dtype=float)
+
+    # Calendar terms and ANNUAL_TEMP as training has them
+    same = [backend.FEATURE_COLUMNS.index(column) for column in [*feature_store.CALENDAR_COLUMNS, 'ANNUAL_TEMP']]
+    assert np.array_equal(served[:, same], trained[:, same])
+
+    # Lag inputs as the training lag columns of the same day one year earlier
+    lags = [backend.FEATURE_COLUMNS.index(column) for column in feature_store.LAG_COLUMNS]
+    previous_year = history.set_index(['YEAR', 'MONTH', 'DAY'])[feature_store.LAG_COLUMNS]
+    expected = previous_year.reindex(list(zip(history['YEAR'] - 1, history['MONTH'], history['DAY']))).to_numpy()
+    has_previous_year = (history['YEAR'] > history['YEAR'].min()).to_numpy() & ~(
+        (history['MONTH'] == 2) & (history['DAY'] == 29)).to_numpy()
+    assert np.array_equal(served[has_previous_year][:, lags], expected[has_previous_year])
+
+
+def test_served_day_of_year_matches_calendar(history_predictor):
+    store = history_predictor.features()
+    today = store.start.astype(object)
+    sample = [today + backend.timedelta(days=offset) for offset in range(0, 400, 7)]
+    day_of_year = backend.FEATURE_COLUMNS.index('DAY_OF_YEAR')
+    assert [row[day_of_year] for row in store.features_for(sample)] == [day.timetuple().tm_yday for day in sample]
+
+
+def test_history_store_round_trip(history_predictor, history_store):
+    import pandas as pd
+    loaded = backend.load_history(history_store, fingerprint=history_predictor.history_fingerprint())
+    # Categorical DAY_TYPE included: its int8 codes come back under the same label table
+    pd.testing.assert_frame_equal(loaded, history_predictor.daily_df.reset_index(drop=True))
+
+
+def test_history_store_projection(history_predictor, history_store):
+    import pandas as pd
+    loaded = backend.load_history(history_store, columns=backend.INFERENCE_COLUMNS)
+    assert list(loaded.columns) == backend.INFERENCE_COLUMNS
+    pd.testing.assert_frame_equal(
+        loaded, history_predictor.daily_df[backend.INFERENCE_COLUMNS].reset_index(drop=True))
+
+
+def test_history_store_missing(tmp_path):
+    assert backend.load_history(str(tmp_path)) is None
+
+
+def test_bulk_elevations_match_service(elevation_service, locations):
+    from elevation import BulkElevationResolver
+    server, url = elevation_service()
+    lats, lngs = np.concatenate([locations[0], locations[0][:10]]), np.concatenate([locations[1], locations[1][:10]])
+    elevations = BulkElevationResolver(url, chunk_size=100).lookup(lats, lngs)
+    assert np.allclose(elevations, [MockElevationHandler.elevation(None, lat, lng) for lat, lng in zip(lats, lngs)])
+    # Repeated locations are asked for once: 250 unique in chunks of 100
+    assert server.RequestHandlerClass.requests_seen == 3
+
+
+def test_elevation_retries_recover(elevation_service, locations):
+    from elevation import BulkElevationResolver
+    server, url = elevation_service(fail_first=2)
+    resolver = BulkElevationResolver(url, chunk_size=1000, backoff=0.001)
+    assert not np.isnan(resolver.lookup(*locations)).any()
+    assert server.RequestHandlerClass.requests_seen == 3
+    assert not resolver.breaker.is_open
+
+
+def test_elevation_outage_opens_breaker(elevation_service, locations):
+    from elevation import BulkElevationResolver
+    server, url = elevation_service(fail_first=10 ** 9)
+    resolver = BulkElevationResolver(url, chunk_size=1000, retries=5, backoff=0.001)
+    assert np.isnan(resolver.lookup(*locations)).all()
+    # The breaker opened after its threshold of failures, before the retries ran out
+    assert server.RequestHandlerClass.requests_seen == resolver.breaker.threshold
+    assert resolver.breaker.is_open
+
+    # While it is open, lookups fail fast without reaching the service
+    assert np.isnan(resolver.lookup(*locations)).all()
+    assert server.RequestHandlerClass.requests_seen == resolver.breaker.threshold
+
+
+def test_dem_bilinear_is_exact_on_a_plane(plane_tiles):
+    from elevation import DEMElevationProvider
+    rng = np.random.default_rng(0)
+    lats, lngs = rng.uniform(19, 20, 10_000), rng.uniform(72, 74, 10_000)
+    assert np.allclose(DEMElevationProvider(plane_tiles).lookup(lats, lngs), plane(lats, lngs), atol=1e-6)
+
+
+def test_get_elevation_reads_the_dem(plane_tiles):
+    from elevation import DEMElevationProvider
+    predictor = backend.WeatherPredictor.__new__(backend.WeatherPredictor)
+    predictor.elevation_provider = DEMElevationProvider(plane_tiles)
+    assert abs(predictor.get_elevation(19.25, 73.25) - plane(19.25, 73.25)) < 1e-6
+
+
+def test_dem_tiles_agree_on_their_seam(plane_tiles):
+    from elevation import DEMElevationProvider
+    seam = DEMElevationProvider(plane_tiles).lookup([19.5, 19.5], [73 - 1e-12, 73])
+    assert abs(seam[0] - seam[1]) < 1e-6
+
+
+def test_dem_missing_tile_is_unresolved(plane_tiles):
+    from elevation import DEMElevationProvider
+    assert np.isnan(DEMElevationProvider(plane_tiles).lookup([25.0], [80.0])).all()
+
+
+def test_dem_void_is_unresolved(plane_tiles):
+    import os
+    from elevation import DEMElevationProvider
+    void = np.memmap(os.path.join(plane_tiles, DEMElevationProvider.tile_name(19, 72)), dtype='>i2', mode='r+',
+                     shape=(1201, 1201))
+    void[600, 600] = DEMElevationProvider.VOID
+    void.flush()
+    # Samples next to the void are unresolved rather than pulled towards -32768; the rest still answer
+    elevations = DEMElevationProvider(plane_tiles).lookup([19.5, 19.25], [72.5, 72.25])
+    assert np.isnan(elevations[0])
+    assert abs(elevations[1] - plane(19.25, 72.25)) < 1e-6
+
+
+def test_breaker_half_opens_after_reset():
+    from elevation import CircuitBreaker
+    breaker = CircuitBreaker(threshold=2, reset_after=0.01)
+    breaker.record_failure()
+    assert not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open
+    time.sleep(0.02)
+
+    # One probe is let through; a failure reopens at once, a success closes it
+    assert not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open
+    time.sleep(0.02)
+    assert not breaker.is_open
+    breaker.record_success()
+    breaker.record_failure()
+    assert not breaker.is_open
+
+
+def test_same_seed_builds_identical_history(history_predictor):
+    import pandas as pd
+    again = bare_predictor()
+    again.create_daily_dataset()
+    again.prepare_features()
+    pd.testing.assert_frame_equal(again.daily_df, history_predictor.daily_df, check_exact=True)
+
+
+def test_other_seed_builds_other_history(history_predictor):
+    other = bare_predictor()
+    other.seed = history_predictor.seed + 1
+    other.create_daily_dataset()
+    assert not np.array_equal(other.daily_df['RAINFALL'], history_predictor.daily_df['RAINFALL'])
+
+
+def test_other_fingerprint_misses_the_store(history_predictor, history_store):
+    fingerprint = history_predictor.history_fingerprint()
+    reseeded = bare_predictor()
+    reseeded.seed = history_predictor.seed + 1
+    other = reseeded.history_fingerprint()
+    assert history_predictor.history_key(other) != history_predictor.history_key(fingerprint)
+    assert backend.load_history(history_store, fingerprint=other) is None
+    assert backend.load_history(history_store, fingerprint=fingerprint) is not None
+
+
+@pytest.fixture
+def recovering_service(trained_predictor, elevation_service, tmp_path, monkeypatch):
+    """trained_predictor with a shared cache and an elevation service whose first lookup fails all 3 tries"""
+    from elevation import BulkElevationResolver, CircuitBreaker
+    from result_cache import SharedResultCache
+    _, url = elevation_service(fail_first=3)
+    cache = SharedResultCache(str(tmp_path / "results.sqlite"))
+    # reset_after=0 lets the request after the outage through at once
+    resolver = BulkElevationResolver(url, retries=2, backoff=0.001, breaker=CircuitBreaker(reset_after=0))
+    monkeypatch.setattr(trained_predictor, 'result_cache', cache)
+    monkeypatch.setattr(trained_predictor, 'elevation_provider', resolver)
+    return trained_predictor, cache
+
+
+def test_fallback_elevation_forecasts_are_not_shared(recovering_service):
+    predictor, cache = recovering_service
+    date = (predictor.today + backend.timedelta(days=3)).strftime("%Y-%m-%d")
+    outage = predictor.predict_single_day("Shimla", "HP", "India", date)
+    assert outage['elevation'] == 0
+    assert cache.status()['forecasts'] == 0
+
+    # With the service back the forecast is predicted again, from the real elevation, and shared
+    recovered = predictor.predict_single_day("Shimla", "HP", "India", date)
+    lat, lng = predictor.get_coordinates("Shimla", "HP", "India")
+    assert recovered['elevation'] == MockElevationHandler.elevation(None, lat, lng)
+    assert cache.status()['forecasts'] == 1
+
+
+def test_async_fallback_elevation_forecasts_are_not_shared(recovering_service):
+    import asyncio
+    from async_predictor import AsyncWeatherPredictor
+    predictor, cache = recovering_service
+    date = (predictor.today + backend.timedelta(days=3)).strftime("%Y-%m-%d")
+
+    async def predict():
+        async with AsyncWeatherPredictor(predictor) as facade:
+            return await facade.predict_single_day("Shimla", "HP", "India", date)
+    assert asyncio.run(predict())['elevation'] == 0
+    assert cache.status()['forecasts'] == 0
+    assert asyncio.run(predict())['elevation'] > 0
+    assert cache.status()['forecasts'] == 1
+
+
+def test_predictor_starts_no_exporters(history_predictor, monkeypatch):
+    import metrics
+    monkeypatch.setattr(metrics, '_exporters', {})
+    monkeypatch.setenv('METRICS_PORT', '0')
+    # Only the entry points export; a library predictor would take the port from every process
+    backend.WeatherPredictor(train=False)
+    assert metrics._exporters == {}
+
+
+def test_taken_metrics_port_is_reported_not_raised(monkeypatch, capsys):
+    import socket
+    import metrics
+    monkeypatch.setattr(metrics, '_exporters', {})
+    with socket.socket() as taken:
+        taken.bind(("127.0.0.1", 0))
+        taken.listen()
+        exporters = metrics.start_exporters(port=taken.getsockname()[1], path="")
+    assert 'server' not in exporters
+    assert "Metrics endpoint not started" in capsys.readouterr().out
+
+
+@pytest.fixture
+def matrix_predictor(trained_predictor, tmp_path, monkeypatch):
+    """trained_predictor serving a matrix for three cities, restored afterwards"""
+    from forecast_matrix import ForecastMatrix
+    monkeypatch.setattr(trained_predictor, 'forecast_matrix', None, raising=False)
+    monkeypatch.setattr(trained_predictor, 'model_version', trained_predictor.model_version)
+    ForecastMatrix.build(trained_predictor, ['mumbai', 'pune', 'shimla']).save(str(tmp_path))
+    trained_predictor.load_forecast_matrix(str(tmp_path))
+    return trained_predictor
+
+
+def test_matrix_answers_equal_live_inference(matrix_predictor):
+    predictor = matrix_predictor
+    dates = [(predictor.today + backend.timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range(0, 181, 15)]
+    queries = [(city, "State", "India", date) for city in ("Mumbai", "Pune", "Shimla") for date in dates]
+    day = predictor.today + backend.timedelta(days=15)
+    assert predictor.precomputed_forecast("Pune", "", "", day, dates[1], 0, 0) is not None
+
+    stored = [predictor.predict_single_day(*query) for query in queries]
+    predictor.forecast_matrix = None
+    assert stored == [predictor.predict_single_day(*query) for query in queries]
+
+
+def test_matrix_falls_back_to_live_inference(matrix_predictor):
+    predictor, matrix = matrix_predictor, matrix_predictor.forecast_matrix
+    date = predictor.today.strftime("%Y-%m-%d")
+    assert predictor.precomputed_forecast("Mumbai", "", "", predictor.today, date, 0, 0) is not None
+    # Unknown places, stale tables and other models all fall back
+    assert predictor.precomputed_forecast("Delhi", "", "", predictor.today, date, 0, 0) is None
+    matrix.meta['built_at'] -= 25 * 3600
+    assert predictor.precomputed_forecast("Mumbai", "", "", predictor.today, date, 0, 0) is None
+    matrix.meta['built_at'] += 25 * 3600
+    predictor.model_version = "retrained"
+    assert predictor.precomputed_forecast("Mumbai", "", "", predictor.today, date, 0, 0) is None
+
+
+class FailingTerrain(SyntheticTerrain):
+    """SyntheticTerrain that stops resolving Shimla after its first `good_lookups` lookups"""
+
+    def __init__(self, good_lookups):
+        self.good_lookups = good_lookups
+
+    def lookup(self, lats, lngs):
+        elevations = super().lookup(lats, lngs).astype(float)
+        self.good_lookups -= 1
+        if self.good_lookups < 0:
+            elevations[np.isclose(lats, backend.CITY_COORDINATES['shimla'][0])] = np.nan
+        return elevations
+
+
+@pytest.mark.parametrize("good_lookups", [0, 1])
+def test_matrix_refuses_fallback_elevations(trained_predictor, monkeypatch, good_lookups):
+    from forecast_matrix import ForecastMatrix
+    # 0: unresolved from the start; 1: resolved up front, then lost while the batches run
+    monkeypatch.setattr(trained_predictor, 'elevation_provider', FailingTerrain(good_lookups))
+    with pytest.raises(RuntimeError, match="shimla"):
+        ForecastMatrix.build(trained_predictor, ['mumbai', 'shimla'])
+
+
+def forecast_rows(prefix, count):
+    return [("v1", "source", 19.07, 72.87, f"{prefix}-{day}", [day]) for day in range(count)]
+
+
+def test_eviction_keeps_max_entries_across_batches(tmp_path):
+    from result_cache import SharedResultCache
+    cache = SharedResultCache(str(tmp_path / "results.sqlite"), max_entries=100, evict_every=10 ** 6)
+    cache.put_forecasts(forecast_rows("old", 60))
+    cache.put_forecasts(forecast_rows("new", 60))
+    cache.evict()
+    # Only the 20 oldest rows go: the whole newer batch and the end of the older one stay
+    assert cache.status()['forecasts'] == 100
+    assert all(cache.get_forecast("v1", "source", 19.07, 72.87, f"new-{day}") == [day] for day in range(60))
+    assert cache.get_forecast("v1", "source", 19.07, 72.87, "old-19") is None
+    assert cache.get_forecast("v1", "source", 19.07, 72.87, "old-20") == [20]
+
+
+def test_eviction_trims_an_oversized_batch(tmp_path):
+    from result_cache import SharedResultCache
+    cache = SharedResultCache(str(tmp_path / "results.sqlite"), max_entries=100, evict_every=10 ** 6)
+    cache.put_forecasts(forecast_rows("day", 150))
+    cache.evict()
+    assert cache.status()['forecasts'] == 100
+    cache.evict()
+    assert cache.status()['forecasts'] == 100
+
+
+def test_predict_cities_without_cities(trained_predictor):
+    date = (trained_predictor.today + backend.timedelta(days=3)).strftime("%Y-%m-%d")
+    empty = trained_predictor.predict_cities([], date)
+    table = trained_predictor.predict_cities([("Pune", "MH", "India"), ("Shimla", "HP", "India")], date)
+    assert empty.empty
+    assert list(empty.columns) == list(table.columns)
+    assert list(table['rank']) == [1, 2]
+
+
+# float32 leaf values and thresholds keep compact forests this close to sklearn's; thresholds are
+# floored so float32 inputs split exactly as before, leaving only the rounding of leaf values
+COMPACT_FLOAT32_TOLERANCE = 5e-7
+
+
+@pytest.fixture(scope="module")
+def compact_predictor(trained_predictor):
+    """A copy of trained_predictor with its forests compressed to float32, unpruned"""
+    import copy
+    import compression
+    return compression.compress_models(copy.copy(trained_predictor), precision='float32')
+
+
+def history_features(predictor):
+    return predictor.daily_df[backend.FEATURE_COLUMNS].to_numpy(dtype=np.float32)[::7]
+
+
+def test_float32_compact_forest_matches_sklearn(trained_predictor, compact_predictor):
+    X = history_features(trained_predictor)
+    for name in backend.MODEL_NAMES:
+        forest, compact = getattr(trained_predictor, name), getattr(compact_predictor, name)
+        if hasattr(forest, 'classes_'):
+            np.testing.assert_allclose(compact.predict_proba(X), forest.predict_proba(X),
+                                       rtol=0, atol=COMPACT_FLOAT32_TOLERANCE)
+            assert np.array_equal(compact.classes_, forest.classes_)
+        else:
+            np.testing.assert_allclose(compact.predict(X), forest.predict(X), rtol=COMPACT_FLOAT32_TOLERANCE)
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_models_round_trip_through_save_and_load(trained_predictor, compact_predictor, tmp_path, compressed):
+    predictor = compact_predictor if compressed else trained_predictor
+    path = str(tmp_path / "models.pkl")
+    predictor.save_models(path)
+    loaded = bare_predictor()
+    loaded.elevation_provider = SyntheticTerrain()
+    assert loaded.load_models(path)
+    assert loaded.model_version == predictor.model_version
+    assert loaded.model_backend.name == predictor.model_backend.name
+
+    X = history_features(predictor)
+    for name in backend.MODEL_NAMES:
+        model, restored = getattr(predictor, name), getattr(loaded, name)
+        assert type(restored) is type(model)
+        assert np.array_equal(restored.predict(X), model.predict(X))
+        if hasattr(model, 'classes_'):
+            assert np.array_equal(restored.predict_proba(X), model.predict_proba(X))
+        else:
+            assert np.array_equal(loaded.member_predictions(name, X), predictor.member_predictions(name, X))
+
+
+def test_compact_models_have_their_own_version(trained_predictor, compact_predictor):
+    assert compact_predictor.model_version.startswith(f"{trained_predictor.model_version}-compact-")
+    assert getattr(trained_predictor, 'temp_model') is not getattr(compact_predictor, 'temp_model')
+
+
+def test_model_backends_implement_the_interface():
+    import model_backends
+    with pytest.raises(TypeError):
+        model_backends.ModelBackend()
+    for name in model_backends.MODEL_BACKENDS:
+        model_backend = model_backends.make_model_backend(name)
+        assert model_backend.regressor() is not None
+        assert model_backend.classifier() is not None
@@ -0,0 +1,181 @@
+"""Hyperparameter search for the WeatherPredictor forests.
+
+Scores every candidate in SEARCH_SPACE with year-blocked cross-validation, so the
+lag and rolling features of neighbouring days never straddle the train/test
+boundary, and reports the accuracy / latency / memory Pareto front per target.
+Run it from the project root with `python tuning.py`.
+"""
+import os
+import sys
+import time
+import pickle
+import argparse
+import itertools
+import tempfile
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
+from sklearn.metrics import mean_absolute_error, accuracy_score
+
+import backend
+from model_backends import RandomForestBackend
+
+# Target column and model kind for each of the five WeatherPredictor models
+TARGETS = {
+    'temperature': ('TEMPERATURE', 'regressor'),
+    'rainfall': ('RAINFALL', 'regressor'),
+    'rain_chance': ('HAS_RAIN', 'classifier'),
+    'wind_speed': ('WIND_SPEED', 'regressor'),
+    'day_type': ('DAY_TYPE', 'classifier'),
+}
+
+SEARCH_SPACE = {
+    'n_estimators': [25, 50, 100],
+    'max_depth': [8, 12, 15],
+    'min_samples_leaf': [1, 5, 20],
+}
+
+# Feature matrices already opened by this worker process, keyed by cache directory
+_matrices = {}
+
+
+def cache_feature_matrix(daily_df, path):
+    """Write the feature matrix, targets and years once as .npy files for every worker to map"""
+    np.save(os.path.join(path, "X.npy"), daily_df[backend.FEATURE_COLUMNS].to_numpy(np.float32))
+    np.save(os.path.join(path, "YEAR.npy"), daily_df['YEAR'].to_numpy())
+    for column, _ in TARGETS.values():
+        values = daily_df[column]
+        if column == 'DAY_TYPE':
+            values = values.cat.codes
+        np.save(os.path.join(path, f"{column}.npy"), values.to_numpy())
+
+
+def load_feature_matrix(path):
+    """Memory-map the cached matrix; workers on the same host share its pages"""
+    if path not in _matrices:
+        arrays = {}
+        for name in os.listdir(path):
+            arrays[name[:-4]] = np.load(os.path.join(path, name), mmap_mode='r')
+        _matrices[path] = arrays
+    return _matrices[path]
+
+
+def year_blocked_folds(years, n_splits=5, gap=1):
+    """Contiguous blocks of years as test sets, with `gap` years purged on either side from training"""
+    unique_years = np.unique(years)
+    for block in np.array_split(unique_years, n_splits):
+        test = (years >= block[0]) & (years <= block[-1])
+        purged = (years >= block[0] - gap) & (years <= block[-1] + gap)
+        yield np.flatnonzero(~purged), np.flatnonzero(test)
+
+
+def candidates(space=SEARCH_SPACE):
+    """Every combination of the search space as a params dict"""
+    names = list(space)
+    for values in itertools.product(*(space[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+def evaluate(matrix_path, target, params, train_idx, test_idx):
+    """Fit one candidate on one fold and measure its error, single-row latency and size"""
+    arrays = load_feature_matrix(matrix_path)
+    column, kind = TARGETS[target]
+    X, y = arrays['X'], arrays[column]
+
+    model_class = RandomForestRegressor if kind == 'regressor' else RandomForestClassifier
+    model = model_class(random_state=42, n_jobs=1, **params)
+    model.fit(X[train_idx], y[train_idx])
+
+    predictions = model.predict(X[test_idx])
+    if kind == 'regressor':
+        error = mean_absolute_error(y[test_idx], predictions)
+    else:
+        error = 1 - accuracy_score(y[test_idx], predictions)
+
+    row = X[test_idx[:1]]
+    runs = 20
+    start = time.perf_counter()
+    for _ in range(runs):
+        model.predict(row)
+    latency = (time.perf_counter() - start) / runs
+
+    return error, latency, len(pickle.dumps(model))
+
+
+def pareto_front(rows):
+    """Rows not dominated on (error, latency, size) by any other row"""
+    front = []
+    for row in rows:
+        dominated = any(
+            other['error'] <= row['error'] and other['latency'] <= row['latency'] and other['size'] <= row['size']
+            and (other['error'], other['latency'], other['size']) != (row['error'], row['latency'], row['size'])
+            for other in rows
+        )
+        if not dominated:
+            front.append(row)
+    return sorted(front, key=lambda row: row['error'])
+
+
+def search(daily_df, targets=TARGETS, space=SEARCH_SPACE, n_splits=5, n_jobs=-1):
+    """Cross-validate every candidate for every target in parallel, returning one summary row each"""
+    years = daily_df['YEAR'].to_numpy()
+    folds = list(year_blocked_folds(years, n_splits))
+    grid = list(candidates(space))
+
+    with tempfile.TemporaryDirectory() as matrix_path:
+        cache_feature_matrix(daily_df, matrix_path)
+        tasks = [(target, params, train_idx, test_idx)
+                 for target in targets for params in grid for train_idx, test_idx in folds]
+        print(f"🔍 Evaluating {len(grid)} candidates x {len(targets)} targets x {len(folds)} folds")
+        scores = Parallel(n_jobs=n_jobs)(
+            delayed(evaluate)(matrix_path, target, params, train_idx, test_idx)
+            for target, params, train_idx, test_idx in tasks
+        )
+
+    summary = {}
+    for (target, params, _, _), (error, latency, size) in zip(tasks, scores):
+        key = (target, tuple(sorted(params.items())))
+        summary.setdefault(key, []).append((error, latency, size))
+    return [
+        {'target': target, 'params': dict(params),
+         'error': float(np.mean([s[0] for s in runs])),
+         'latency': float(np.median([s[1] for s in runs])),
+         'size': int(np.mean([s[2] for s in runs]))}
+        for (target, params), runs in summary.items()
+    ]
+
+
+def report(results):
+    """Print the Pareto front per target, marking the current forest settings"""
+    defaults = RandomForestRegressor().get_params()
+    baseline = {name: RandomForestBackend.default_params.get(name, defaults[name]) for name in SEARCH_SPACE}
+    for target in TARGETS:
+        rows = [row for row in results if row['target'] == target]
+        if not rows:
+            continue
+        metric = 'MAE' if TARGETS[target][1] == 'regressor' else 'error rate'
+        print(f"\n📊 {target} ({metric}), Pareto front:")
+        print(f"   {'params':<52}{'error':>10}{'latency':>12}{'size':>12}")
+        for row in pareto_front(rows):
+            marker = " (current)" if row['params'] == baseline else ""
+            params = ", ".join(f"{k}={v}" for k, v in row['params'].items())
+            print(f"   {params + marker:<52}{row['error']:>10.4f}{row['latency'] * 1000:>10.2f}ms"
+                  f"{row['size'] / 1e6:>10.1f}MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search forest hyperparameters with year-blocked CV")
+    parser.add_argument("--targets", nargs="+", choices=list(TARGETS), default=list(TARGETS))
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=-1, help="worker processes (-1 uses every core)")
+    args = parser.parse_args(argv)
+
+    predictor = backend.WeatherPredictor(train=False)
+    results = search(predictor.full_history(), {t: TARGETS[t] for t in args.targets},
+                     n_splits=args.folds, n_jobs=args.jobs)
+    report(results)
+
+
+if __name__ == "__main__":
+    sys.exit(main())